@@ -0,0 +1,80 @@
+"""Поля постов в API.
+
+Клиент выбирает поля параметром ``?fields=id,text,author``; из базы
+читаются только колонки этих полей (через ``values()``, без объектов
+моделей), а ключи курсора добавляются всегда.
+"""
+from django.conf import settings
+
+
+class FieldError(ValueError):
+    """Неизвестное поле или неверный параметр запроса."""
+
+
+def _date(column):
+    def value(row):
+        return row[column].isoformat()
+    return value
+
+
+def _column(column):
+    def value(row):
+        return row[column]
+    return value
+
+
+def _full_name(row):
+    return f'{row["author__first_name"]} {row["author__last_name"]}'.strip()
+
+
+# Поле API -> (колонки для values(), значение поля из строки).
+POST_FIELDS = {
+    'id': (('id',), _column('id')),
+    'text': (('text',), _column('text')),
+    'pub_date': (('pub_date',), _date('pub_date')),
+    'updated': (('updated',), _date('updated')),
+    'author': (('author__username',), _column('author__username')),
+    'author_name': (('author__first_name', 'author__last_name'),
+                    _full_name),
+    'group': (('group__slug',), _column('group__slug')),
+    'group_title': (('group__title',), _column('group__title')),
+}
+DEFAULT_FIELDS = ('id', 'text', 'pub_date', 'author', 'group')
+CURSOR_KEYS = ('pub_date', 'id')
+
+
+def parse_fields(value):
+    if not value:
+        return DEFAULT_FIELDS
+    fields = tuple(dict.fromkeys(
+        name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in POST_FIELDS]
+    if unknown or not fields:
+        raise FieldError(
+            f'Неизвестные поля: {", ".join(unknown)}. '
+            f'Доступны: {", ".join(POST_FIELDS)}')
+    return fields
+
+
+def parse_limit(value):
+    if not value:
+        return settings.POSTS_IN_PAGE
+    try:
+        limit = int(value)
+    except ValueError:
+        raise FieldError('limit должен быть числом')
+    if not 1 <= limit <= settings.API_MAX_LIMIT:
+        raise FieldError(f'limit - от 1 до {settings.API_MAX_LIMIT}')
+    return limit
+
+
+def columns(fields):
+    """Колонки для ``values()``: поля и ключи курсора."""
+    names = dict.fromkeys(CURSOR_KEYS)
+    for field in fields:
+        names.update(dict.fromkeys(POST_FIELDS[field][0]))
+    return list(names)
+
+
+def serialize(row, fields):
+    return {field: POST_FIELDS[field][1](row) for field in fields}
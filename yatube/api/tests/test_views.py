@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class ApiViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug',
+            description='Тестовое описание')
+        cls.posts = [
+            Post.objects.create(author=cls.user, group=cls.group,
+                                text=f'Пост {i}')
+            for i in range(3)
+        ]
+        cls.other = Post.objects.create(author=cls.user, text='Без группы')
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_default_fields(self):
+        '''Лента отдаёт поля по умолчанию, новые посты первыми.'''
+        response = self.client.get(reverse('api:index'))
+        self.assertEqual(response['Content-Type'], 'application/json')
+        data = response.json()
+        self.assertEqual([post['id'] for post in data['results']],
+                         [self.other.id] + [post.id
+                                            for post in self.posts[::-1]])
+        self.assertEqual(set(data['results'][0]),
+                         {'id', 'text', 'pub_date', 'author', 'group'})
+        self.assertEqual(data['results'][1]['group'], 'test-slug')
+        self.assertIsNone(data['next'])
+        self.assertNotIn(b', ', response.content)
+
+    def test_sparse_fields_read_only_their_columns(self):
+        '''?fields= сужает и ответ, и выбираемые из базы колонки.'''
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('api:index'), {'fields': 'id,author_name'})
+        self.assertEqual(response.json()['results'][0],
+                         {'id': self.other.id, 'author_name': 'Лев Толстой'})
+        sql = queries[-1]['sql']
+        self.assertNotIn('"text"', sql)
+        self.assertNotIn('posts_group', sql)
+        response = self.client.get(reverse('api:index'),
+                                   {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json()['detail'])
+
+    def test_cursor_pagination(self):
+        '''Курсоры проходят ленту группы без повторов и пропусков.'''
+        url = reverse('api:group_posts', kwargs={'slug': 'test-slug'})
+        data = self.client.get(url, {'limit': 2, 'fields': 'id'}).json()
+        self.assertEqual(data['group']['posts_count'], 3)
+        ids = [post['id'] for post in data['results']]
+        data = self.client.get(
+            url, {'limit': 2, 'fields': 'id', 'cursor': data['next']}).json()
+        ids += [post['id'] for post in data['results']]
+        self.assertIsNone(data['next'])
+        self.assertEqual(ids, [post.id for post in self.posts[::-1]])
+        response = self.client.get(url, {'limit': 1000})
+        self.assertEqual(response.status_code, 400)
+
+    def test_profile_and_post_detail(self):
+        '''Профиль и пост; неизвестные объекты - 404 в JSON.'''
+        data = self.client.get(reverse(
+            'api:profile', kwargs={'username': 'author'})).json()
+        self.assertEqual(data['author'], {
+            'username': 'author', 'name': 'Лев Толстой', 'posts_count': 4})
+        response = self.client.get(
+            reverse('api:post_detail', kwargs={'post_id': self.other.id}),
+            {'fields': 'text,group_title'})
+        self.assertEqual(response.json(),
+                         {'text': 'Без группы', 'group_title': None})
+        for url in (reverse('api:post_detail', kwargs={'post_id': 0}),
+                    reverse('api:profile', kwargs={'username': 'nobody'}),
+                    reverse('api:group_posts', kwargs={'slug': 'nothing'})):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 404)
+                self.assertIn('detail', response.json())
+
+    def test_read_only_and_conditional(self):
+        '''API только читает, а неизменные страницы отвечают 304.'''
+        url = reverse('api:index')
+        self.assertEqual(self.client.post(url).status_code, 405)
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(API_MAX_LIMIT=2)
+    def test_limit_bound(self):
+        '''limit не больше API_MAX_LIMIT.'''
+        response = self.client.get(reverse('api:index'), {'limit': 3})
+        self.assertEqual(response.status_code, 400)
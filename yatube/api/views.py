@@ -0,0 +1,95 @@
+from django.http import JsonResponse
+from django.views.decorators.http import require_safe
+
+from core.routers import read_from_replicas
+from posts.conditional import (conditional_page, group_state, index_state,
+                               page_state, post_state, profile_state)
+from posts.lookups import group_by_slug, user_by_username
+from posts.models import Post
+from posts.paginators import KeysetPaginator
+
+from .fields import (CURSOR_KEYS, FieldError, columns, parse_fields,
+                     parse_limit, serialize)
+
+# Без пробелов: ответ короче и до сжатия, и после.
+JSON_PARAMS = {'ensure_ascii': False, 'separators': (',', ':')}
+
+
+def api_response(data, status=200):
+    return JsonResponse(data, status=status, json_dumps_params=JSON_PARAMS)
+
+
+def not_found():
+    return api_response({'detail': 'Не найдено'}, status=404)
+
+
+def posts_count(request):
+    state = page_state(request)
+    return state[1] if state is not None else None
+
+
+def posts_page(request, posts, **extra):
+    """Страница постов по курсору ``?cursor=`` с полями ``?fields=``."""
+    try:
+        fields = parse_fields(request.GET.get('fields'))
+        limit = parse_limit(request.GET.get('limit'))
+    except FieldError as error:
+        return api_response({'detail': str(error)}, status=400)
+    paginator = KeysetPaginator(
+        posts.values(*columns(fields)), limit, CURSOR_KEYS)
+    page = paginator.get_page(request.GET.get('cursor'))
+    return api_response({
+        **extra,
+        'results': [serialize(row, fields) for row in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+
+
+@require_safe
+@read_from_replicas
+@conditional_page(index_state)
+def index(request):
+    return posts_page(request, Post.objects.all())
+
+
+@require_safe
+@read_from_replicas
+@conditional_page(group_state)
+def group_posts(request, slug):
+    group = group_by_slug(slug)
+    if group is None:
+        return not_found()
+    return posts_page(
+        request, Post.objects.filter(group_id=group.pk),
+        group={'slug': group.slug, 'title': group.title,
+               'description': group.description,
+               'posts_count': posts_count(request)})
+
+
+@require_safe
+@read_from_replicas
+@conditional_page(profile_state)
+def profile(request, username):
+    author = user_by_username(username)
+    if author is None:
+        return not_found()
+    return posts_page(
+        request, Post.objects.filter(author_id=author.pk),
+        author={'username': author.username,
+                'name': author.get_full_name(),
+                'posts_count': posts_count(request)})
+
+
+@require_safe
+@read_from_replicas
+@conditional_page(post_state)
+def post_detail(request, post_id):
+    try:
+        fields = parse_fields(request.GET.get('fields'))
+    except FieldError as error:
+        return api_response({'detail': str(error)}, status=400)
+    row = Post.objects.filter(pk=post_id).values(*columns(fields)).first()
+    if row is None:
+        return not_found()
+    return api_response(serialize(row, fields))
@@ -0,0 +1,185 @@
+"""ASGI-обёртка над WSGI-приложением Django.
+
+Django 2.2 не умеет асинхронные представления, поэтому асинхронной
+делается вся работа с клиентом: тело запроса читается и ответ
+отдаётся в цикле событий, а поток занимает только сам обработчик
+Django. Медленный клиент больше не держит воркер, пока шлёт запрос
+или читает ответ.
+
+Чтения (GET, HEAD, OPTIONS) - ленты, профиль, страница поста -
+выполняются в пуле на ``read_threads`` потоков, остальные запросы в
+отдельном пуле на ``write_threads``: SQLite всё равно пишет по
+одному. Число соединений с базой не превышает числа потоков, а
+запросы сверх ``max_pending`` сразу получают 503.
+"""
+import asyncio
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Ответ до этого размера собирается в потоке целиком и отдаётся
+# клиенту уже без потока; больший ответ потоково шлёт сам поток.
+BUFFER_SIZE = 64 * 1024
+# Тело запроса больше этого размера уходит из памяти во временный файл.
+SPOOL_SIZE = 1024 * 1024
+
+
+def build_environ(scope, body):
+    """Окружение WSGI (PEP 3333) по области ASGI."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode().decode('latin-1'),
+        'PATH_INFO': scope['path'].encode().decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        if name in environ:
+            # Повторные Cookie склеиваются через «; » (RFC 7540, 8.1.2.5),
+            # остальные заголовки — через запятую.
+            separator = '; ' if name == 'HTTP_COOKIE' else ','
+            value = f'{environ[name]}{separator}{value}'
+        environ[name] = value
+    return environ
+
+
+class ASGIHandler:
+    """Приложение ASGI 3, которое выполняет WSGI-приложение в пулах."""
+
+    def __init__(self, wsgi_application, read_threads=16, write_threads=1,
+                 max_pending=1000):
+        self.wsgi_application = wsgi_application
+        self.read_pool = ThreadPoolExecutor(read_threads, 'asgi-read')
+        self.write_pool = ThreadPoolExecutor(write_threads, 'asgi-write')
+        self.max_pending = max_pending
+        self.pending = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f'Протокол {scope["type"]} не поддерживается')
+        if self.pending >= self.max_pending:
+            return await self.send_simple(send, 503, b'Service Unavailable')
+        self.pending += 1
+        try:
+            body = await self.read_body(receive)
+            if body is None:
+                return
+            with body:
+                await self.handle(scope, body, send)
+        finally:
+            self.pending -= 1
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.read_pool.shutdown(wait=True)
+                self.write_pool.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        """Читает тело целиком; None, если клиент ушёл раньше."""
+        body = tempfile.SpooledTemporaryFile(SPOOL_SIZE)
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None
+            body.write(message.get('body', b''))
+            if not message.get('more_body'):
+                body.seek(0)
+                return body
+
+    async def send_simple(self, send, status, content):
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'text/plain; charset=utf-8'),
+                        (b'content-length', str(len(content)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': content})
+
+    async def handle(self, scope, body, send):
+        loop = asyncio.get_running_loop()
+        pool = (self.read_pool if scope['method'] in SAFE_METHODS
+                else self.write_pool)
+        environ = build_environ(scope, body)
+        buffered = await loop.run_in_executor(
+            pool, self.run_wsgi, environ, loop, send)
+        if buffered is None:
+            return
+        start, chunks = buffered
+        await send(start)
+        await send({'type': 'http.response.body', 'body': b''.join(chunks)})
+
+    def run_wsgi(self, environ, loop, send):
+        """Выполняет приложение в потоке пула.
+
+        Небольшой ответ возвращается целиком. Большой или потоковый
+        поток отправляет сам, дожидаясь каждой отправки: так размер
+        буфера не растёт, если клиент читает медленно. Ответ
+        закрывается в том же потоке: по сигналу request_finished
+        Django закрывает соединения с базой этого потока.
+        """
+        start = {}
+
+        def start_response(status, headers, exc_info=None):
+            start.update({
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(name.lower().encode('latin-1'),
+                             value.encode('latin-1'))
+                            for name, value in headers],
+            })
+
+        def send_now(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        result = self.wsgi_application(environ, start_response)
+        try:
+            chunks = []
+            size = 0
+            streaming = False
+            for chunk in result:
+                if not chunk:
+                    continue
+                if streaming:
+                    send_now({'type': 'http.response.body', 'body': chunk,
+                              'more_body': True})
+                    continue
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > BUFFER_SIZE:
+                    streaming = True
+                    send_now(start)
+                    send_now({'type': 'http.response.body',
+                              'body': b''.join(chunks), 'more_body': True})
+            if streaming:
+                send_now({'type': 'http.response.body', 'body': b''})
+                return None
+            return start, chunks
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
@@ -0,0 +1,246 @@
+"""Нагрузочный прогон маршрутов yatube через WSGI-приложение.
+
+Каждый маршрут из ``posts.urls``, ``users.urls``, ``about.urls``
+и ``api.urls`` вызывается напрямую через ``yatube.wsgi.application`` - со всеми
+middleware, но без сетевого стека. Для маршрута считаются перцентили
+задержки, пропускная способность, число SQL-запросов и пик памяти
+на запрос.
+"""
+import io
+import random
+import sys
+import time
+import tracemalloc
+from urllib.parse import urlsplit
+from wsgiref.util import setup_testing_defaults
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+from django.utils.http import urlencode
+
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+NAMESPACES = ('posts', 'users', 'about', 'api')
+BENCHMARK_USER = 'benchmark'
+MEMORY_SAMPLES = 20
+# Подписаться на этих авторов, чтобы лента подписок была не пустой.
+FOLLOWED_AUTHORS = 20
+
+
+class Sample:
+    """Случайные, но воспроизводимые аргументы для маршрутов."""
+
+    def __init__(self, seed=0):
+        self.rnd = random.Random(seed)
+        self.slugs = list(Group.objects.values_list('slug', flat=True))
+        self.usernames = list(
+            User.objects.values_list('username', flat=True)[:1000])
+        self.post_ids = list(
+            Post.objects.values_list('id', flat=True)[:1000])
+        self.user, _ = User.objects.get_or_create(username=BENCHMARK_USER)
+        for author in User.objects.exclude(pk=self.user.pk).order_by(
+                'id')[:FOLLOWED_AUTHORS]:
+            Follow.objects.get_or_create(user=self.user, author=author)
+        own = self.user.posts.values_list('id', flat=True)[:100]
+        self.own_post_ids = list(own) or [
+            Post.objects.create(author=self.user, text='Бенчмарк').id]
+        client = Client()
+        client.force_login(self.user)
+        self.cookie = (f'{settings.SESSION_COOKIE_NAME}='
+                       f'{client.cookies[settings.SESSION_COOKIE_NAME].value}')
+
+    def slug(self):
+        return {'slug': self.rnd.choice(self.slugs)}
+
+    def username(self):
+        return {'username': self.rnd.choice(self.usernames)}
+
+    def post_id(self):
+        return {'post_id': self.rnd.choice(self.post_ids)}
+
+    def own_post_id(self):
+        return {'post_id': self.rnd.choice(self.own_post_ids)}
+
+    def feed(self):
+        return {'fmt': self.rnd.choice(('atom', 'rss'))}
+
+    def group_feed(self):
+        return {**self.slug(), **self.feed()}
+
+    def profile_feed(self):
+        return {**self.username(), **self.feed()}
+
+
+# Имя маршрута -> (аргументы, строка запроса, нужен ли вход).
+ROUTES = {
+    'posts:index': (None, None, False),
+    'posts:group_list': ('slug', None, False),
+    'posts:profile': ('username', None, False),
+    'posts:search': (None, {'q': 'для'}, False),
+    'posts:post_detail': ('post_id', None, False),
+    'posts:post_create': (None, None, True),
+    'posts:post_edit': ('own_post_id', None, True),
+    'posts:add_comment': ('post_id', None, True),
+    'posts:follow_index': (None, None, True),
+    'posts:profile_follow': ('username', None, True),
+    'posts:profile_unfollow': ('username', None, True),
+    'posts:index_feed': ('feed', None, False),
+    'posts:group_feed': ('group_feed', None, False),
+    'posts:profile_feed': ('profile_feed', None, False),
+    'users:signup': (None, None, False),
+    'users:login': (None, None, False),
+    'users:logout': (None, None, False),
+    'about:author': (None, None, False),
+    'about:tech': (None, None, False),
+    'api:index': (None, None, False),
+    'api:group_posts': ('slug', None, False),
+    'api:profile': ('username', None, False),
+    'api:post_detail': ('post_id', None, False),
+}
+
+
+def route_names():
+    """Все именованные маршруты нужных приложений из URLconf."""
+    names = []
+    for namespace in NAMESPACES:
+        resolver = get_resolver().namespace_dict[namespace][1]
+        names += [f'{namespace}:{pattern.name}'
+                  for pattern in resolver.url_patterns if pattern.name]
+    return names
+
+
+def wsgi_get(application, path, query='', cookie=None, redirects=3):
+    """GET через WSGI-приложение; как браузер, проходит по редиректам
+    (подписка ведёт на профиль) и возвращает итоговый статус.
+    """
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+    }
+    if cookie:
+        environ['HTTP_COOKIE'] = cookie
+    setup_testing_defaults(environ)
+    status = []
+    headers = []
+
+    def start_response(code, response_headers, exc_info=None):
+        status.append(code)
+        headers.extend(response_headers)
+
+    result = application(environ, start_response)
+    try:
+        for _ in result:
+            pass
+    finally:
+        result.close()
+    code = int(status[0].split()[0])
+    location = dict(headers).get('Location')
+    if 300 <= code < 400 and location and redirects:
+        target = urlsplit(location)
+        return wsgi_get(application, target.path, target.query, cookie,
+                        redirects - 1)
+    return code
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    index = max(0, int(round(share * len(ordered) + 0.5)) - 1)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def measure(application, sample, name, requests, cold=False):
+    """Замеряет один маршрут: сначала задержку без профилирования,
+    потом на части запросов - SQL и пик памяти под tracemalloc.
+    """
+    args, query, login = ROUTES[name]
+    cookie = sample.cookie if login else None
+    query = urlencode(query or {})
+
+    def request():
+        kwargs = getattr(sample, args)() if args else {}
+        if cold:
+            for cache in caches.all():
+                cache.clear()
+        return wsgi_get(application, reverse(name, kwargs=kwargs),
+                        query, cookie)
+
+    latencies = []
+    statuses = set()
+    started = time.perf_counter()
+    for _ in range(requests):
+        begin = time.perf_counter()
+        statuses.add(request())
+        latencies.append(time.perf_counter() - begin)
+    elapsed = time.perf_counter() - started
+
+    queries = []
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(min(requests, MEMORY_SAMPLES)):
+            tracemalloc.clear_traces()
+            with CaptureQueriesContext(connection) as context:
+                request()
+            queries.append(len(context.captured_queries))
+            peaks.append(tracemalloc.get_traced_memory()[1])
+    finally:
+        tracemalloc.stop()
+    return {
+        'statuses': sorted(statuses),
+        'requests': requests,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'mean_ms': sum(latencies) / len(latencies) * 1000,
+        'rps': requests / elapsed if elapsed else None,
+        'queries': sum(queries) / len(queries),
+        'peak_kb': sum(peaks) / len(peaks) / 1024,
+    }
+
+
+def run(requests, seed=0, cold=False, names=None):
+    """Прогоняет все маршруты и возвращает отчёт."""
+    from yatube.wsgi import application
+
+    missing = set(route_names()) - set(ROUTES)
+    if missing:
+        raise ValueError(
+            f'Нет сценария для маршрутов: {", ".join(sorted(missing))}')
+    sample = Sample(seed)
+    routes = {}
+    for name in names or ROUTES:
+        routes[name] = measure(application, sample, name, requests, cold)
+    return {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': sys.version.split()[0],
+            'django': django.get_version(),
+            'users': User.objects.count(),
+            'groups': Group.objects.count(),
+            'posts': Post.objects.count(),
+            'requests': requests,
+            'cold': cold,
+        },
+        'routes': routes,
+    }
+
+
+def compare(old, new, metric='p95_ms'):
+    """Строки сравнения двух отчётов: маршрут, было, стало, изменение."""
+    rows = []
+    for name, result in new['routes'].items():
+        before = old.get('routes', {}).get(name, {}).get(metric)
+        after = result[metric]
+        change = (after - before) / before * 100 if before else None
+        rows.append((name, before, after, change))
+    return rows
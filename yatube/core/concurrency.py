@@ -0,0 +1,186 @@
+"""Сравнение синхронных WSGI-воркеров и ASGI под медленными клиентами.
+
+Оба сервера поднимаются в этом процессе на свободных портах. Медленные
+клиенты раз за разом по байту передают запрос в течение
+``slow_seconds``. Пока они это делают, быстрые клиенты читают ленты,
+профиль и страницу поста. Синхронный воркер занят медленным клиентом
+до конца запроса, поэтому быстрые ждут в очереди. ASGI-сервер читает
+запрос без потока и сразу отвечает быстрым.
+"""
+import asyncio
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from core.benchmark import percentile
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class PooledWSGIServer(WSGIServer):
+    """wsgiref с фиксированным числом потоков - как синхронные воркеры."""
+
+    def __init__(self, address, workers):
+        super().__init__(address, QuietHandler)
+        self.pool = ThreadPoolExecutor(workers, 'wsgi-worker')
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        future = self.pool.submit(self._process, request, client_address)
+        with self.lock:
+            self.pending[future] = request
+        future.add_done_callback(self._forget)
+
+    def _forget(self, future):
+        with self.lock:
+            self.pending.pop(future, None)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        # cancel_futures появился только в Python 3.9: снимаем
+        # ожидающие запросы сами и закрываем их сокеты.
+        with self.lock:
+            pending = list(self.pending.items())
+        for future, request in pending:
+            if future.cancel():
+                self.shutdown_request(request)
+        self.pool.shutdown(wait=False)
+
+
+def start_wsgi(application, workers):
+    server = PooledWSGIServer(('127.0.0.1', 0), workers)
+    server.set_app(application)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def stop():
+        server.shutdown()
+        server.server_close()
+    return server.server_address[1], stop
+
+
+def start_asgi(application):
+    import uvicorn
+
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    server = uvicorn.Server(uvicorn.Config(
+        application, log_level='warning', lifespan='off',
+        backlog=4096, timeout_keep_alive=30))
+    thread = threading.Thread(target=server.run, kwargs={'sockets': [sock]},
+                              daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    def stop():
+        server.should_exit = True
+        thread.join()
+    return sock.getsockname()[1], stop
+
+
+def request_bytes(path):
+    return (f'GET {path} HTTP/1.1\r\nHost: localhost\r\n'
+            f'Connection: close\r\n\r\n').encode()
+
+
+async def fetch(port, path, delay=0.0, timeout=None):
+    """Выполняет GET и возвращает (статус, секунды); статус None -
+    таймаут или обрыв. С ``delay`` запрос передаётся по байту.
+    """
+    started = time.perf_counter()
+    writer = None
+    try:
+        async def exchange():
+            nonlocal writer
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            data = request_bytes(path)
+            if delay:
+                for byte in range(len(data)):
+                    writer.write(data[byte:byte + 1])
+                    await writer.drain()
+                    await asyncio.sleep(delay)
+            else:
+                writer.write(data)
+            response = await reader.read()
+            return int(response.split(b' ', 2)[1])
+        status = await asyncio.wait_for(exchange(), timeout)
+    except (asyncio.TimeoutError, OSError, IndexError, ValueError):
+        status = None
+    finally:
+        if writer is not None:
+            writer.close()
+    return status, time.perf_counter() - started
+
+
+async def scenario(port, paths, slow_clients, slow_seconds, fast_requests,
+                   fast_concurrency, timeout):
+    delay = slow_seconds / len(request_bytes(paths[0]))
+    done = asyncio.Event()
+    slow_results = []
+
+    async def slow_client(i):
+        # Медленный клиент повторяет запросы, пока идёт замер.
+        while not done.is_set():
+            slow_results.append(
+                await fetch(port, paths[i % len(paths)], delay))
+
+    slow = [asyncio.ensure_future(slow_client(i))
+            for i in range(slow_clients)]
+    await asyncio.sleep(slow_seconds)
+    queue = list(range(fast_requests))
+    results = []
+
+    async def fast_worker():
+        while queue:
+            i = queue.pop()
+            results.append(await fetch(port, paths[i % len(paths)],
+                                       timeout=timeout))
+    started = time.perf_counter()
+    await asyncio.gather(*[fast_worker() for _ in range(fast_concurrency)])
+    elapsed = time.perf_counter() - started
+    done.set()
+    await asyncio.gather(*slow)
+    served = [seconds for status, seconds in results if status == 200]
+    return {
+        'fast_ok': len(served),
+        'fast_failed': len(results) - len(served),
+        'fast_p50_ms': percentile(served, 0.5) * 1000 if served else None,
+        'fast_p95_ms': percentile(served, 0.95) * 1000 if served else None,
+        'fast_rps': len(served) / elapsed if elapsed else None,
+        'slow_ok': sum(1 for status, _ in slow_results if status == 200),
+    }
+
+
+def run(paths, workers=4, slow_clients=100, slow_seconds=2.0,
+        fast_requests=200, fast_concurrency=10, timeout=10.0):
+    """Прогоняет сценарий на синхронном и на ASGI-сервере."""
+    from yatube.asgi import application as asgi_application
+    from yatube.wsgi import application as wsgi_application
+
+    report = {}
+    for name, start in (
+            ('wsgi', lambda: start_wsgi(wsgi_application, workers)),
+            ('asgi', lambda: start_asgi(asgi_application))):
+        port, stop = start()
+        try:
+            report[name] = asyncio.run(scenario(
+                port, paths, slow_clients, slow_seconds, fast_requests,
+                fast_concurrency, timeout))
+        finally:
+            stop()
+    return report
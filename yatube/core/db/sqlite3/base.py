@@ -0,0 +1,36 @@
+"""SQLite с настройками для работы под нагрузкой.
+
+Каждое новое соединение переводится в режим WAL: читатели видят
+последний зафиксированный снимок и не ждут пишущего, а пишущий не
+ждёт читателей. Остальные PRAGMA и их значения по умолчанию - в
+``PRAGMAS``; их можно переопределить в ``OPTIONS['pragmas']``.
+"""
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    # В режиме WAL NORMAL не теряет целостность, а fsync делает только
+    # при контрольной точке.
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64 * 1024,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.pragmas = {**PRAGMAS, **kwargs.pop('pragmas', {})}
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        pragmas = dict(self.pragmas)
+        if self.is_in_memory_db():
+            # У базы в памяти нет файла журнала.
+            pragmas.pop('journal_mode', None)
+        for name, value in pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
@@ -0,0 +1,99 @@
+import json
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from core import benchmark
+from core.seeding import seed
+from posts.models import Post
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = ('Наполняет отдельную базу данными и замеряет задержку, '
+            'запросы и память на каждом маршруте сайта.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--groups', type=int, default=500)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Запросов на каждый маршрут.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--route', action='append', dest='routes',
+                            help='Замерить только этот маршрут.')
+        parser.add_argument('--cold', action='store_true',
+                            help='Очищать кэши перед каждым запросом.')
+        parser.add_argument('--db',
+                            help='Файл базы для прогона; с --keepdb '
+                                 'наполненная база переживает запуск.')
+        parser.add_argument('--keepdb', action='store_true')
+        parser.add_argument('--output', help='Куда сохранить отчёт JSON.')
+        parser.add_argument('--compare',
+                            help='Отчёт JSON, с которым сравнить прогон.')
+
+    def handle(self, *args, **options):
+        if options['db']:
+            test_settings = connection.settings_dict.setdefault('TEST', {})
+            test_settings['NAME'] = options['db']
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False,
+            keepdb=options['keepdb'])
+        try:
+            report = self.run(options)
+        finally:
+            if not options['keepdb']:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+        report['meta']['commit'] = git_commit()
+        output = options['output'] or (
+            f'benchmark-{report["meta"]["commit"] or "local"}.json')
+        with open(output, 'w') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        self.print_report(report)
+        if options['compare']:
+            with open(options['compare']) as file:
+                self.print_compare(json.load(file), report)
+        self.stdout.write(self.style.SUCCESS(f'Отчёт сохранён в {output}'))
+
+    def run(self, options):
+        if not Post.objects.exists():
+            self.stdout.write('Наполнение базы...')
+            seed(options['users'], options['groups'], options['posts'],
+                 seed=options['seed'])
+        # Замеряем как в продакшене: без журнала SQL-запросов.
+        with override_settings(DEBUG=False):
+            return benchmark.run(options['requests'], options['seed'],
+                                 options['cold'], options['routes'])
+
+    def print_report(self, report):
+        self.stdout.write(
+            f'{"маршрут":<20} {"p50":>8} {"p95":>8} {"p99":>8} '
+            f'{"rps":>8} {"SQL":>5} {"КБ":>8}  статусы')
+        for name, result in report['routes'].items():
+            self.stdout.write(
+                f'{name:<20} {result["p50_ms"]:8.2f} {result["p95_ms"]:8.2f} '
+                f'{result["p99_ms"]:8.2f} {result["rps"]:8.1f} '
+                f'{result["queries"]:5.1f} {result["peak_kb"]:8.1f}  '
+                f'{result["statuses"]}')
+
+    def print_compare(self, old, new):
+        self.stdout.write(f'\nСравнение p95 с {old["meta"].get("commit")}:')
+        for name, before, after, change in benchmark.compare(old, new):
+            if change is None:
+                self.stdout.write(f'{name:<20} {"-":>8} {after:8.2f}')
+                continue
+            line = f'{name:<20} {before:8.2f} {after:8.2f} {change:+7.1f}%'
+            style = self.style.ERROR if change > 10 else self.style.SUCCESS
+            self.stdout.write(style(line))
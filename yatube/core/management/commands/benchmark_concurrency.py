@@ -0,0 +1,81 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core import concurrency
+from core.seeding import seed
+from posts.models import Group, Post
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает синхронные WSGI-воркеры и ASGI-приложение, '
+            'когда часть клиентов медленно передаёт запросы.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Число синхронных воркеров WSGI.')
+        parser.add_argument('--slow-clients', type=int, default=100)
+        parser.add_argument('--slow-seconds', type=float, default=2.0,
+                            help='За сколько медленный клиент передаёт '
+                                 'запрос.')
+        parser.add_argument('--fast-requests', type=int, default=200)
+        parser.add_argument('--fast-concurrency', type=int, default=10)
+        parser.add_argument('--timeout', type=float, default=10.0)
+        parser.add_argument('--db',
+                            help='Файл базы для прогона; с --keepdb '
+                                 'наполненная база переживает запуск.')
+        parser.add_argument('--keepdb', action='store_true')
+
+    def handle(self, *args, **options):
+        try:
+            import uvicorn  # noqa: F401
+        except ImportError:
+            raise CommandError('Для прогона нужен uvicorn: '
+                               'pip install -r requirements.txt')
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        # Серверы работают в своих потоках: нужна база в файле.
+        test_settings['NAME'] = options['db'] or 'benchmark.sqlite3'
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False,
+            keepdb=options['keepdb'])
+        try:
+            if not Post.objects.exists():
+                self.stdout.write('Наполнение базы...')
+                seed(options['users'], options['groups'], options['posts'])
+            with override_settings(DEBUG=False):
+                report = concurrency.run(
+                    self.paths(), options['workers'],
+                    options['slow_clients'], options['slow_seconds'],
+                    options['fast_requests'], options['fast_concurrency'],
+                    options['timeout'])
+        finally:
+            if not options['keepdb']:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+        self.print_report(report)
+
+    def paths(self):
+        post = Post.objects.select_related('author').first()
+        group = Group.objects.first()
+        return [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': post.author.username}),
+            reverse('posts:post_detail', kwargs={'post_id': post.id}),
+        ]
+
+    def print_report(self, report):
+        self.stdout.write(
+            f'{"сервер":<8} {"ok":>6} {"ошибки":>7} {"p50":>9} {"p95":>9} '
+            f'{"rps":>8} {"медленные ok":>13}')
+        for name, result in report.items():
+            p50 = result['fast_p50_ms']
+            p95 = result['fast_p95_ms']
+            self.stdout.write(
+                f'{name:<8} {result["fast_ok"]:6} {result["fast_failed"]:7} '
+                f'{p50 or 0:9.1f} {p95 or 0:9.1f} '
+                f'{result["fast_rps"] or 0:8.1f} {result["slow_ok"]:13}')
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.template_cache import precompile, touch
+
+
+class Command(BaseCommand):
+    help = ('Компилирует все шаблоны и показывает, сколько времени '
+            'занял каждый.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20,
+                            help='Сколько самых медленных шаблонов показать.')
+        parser.add_argument('--touch', action='store_true',
+                            help='Попросить работающие воркеры '
+                                 'перекомпилировать шаблоны.')
+
+    def handle(self, *args, **options):
+        timings, errors = precompile()
+        for name, ms in timings[:options['limit']]:
+            self.stdout.write(f'{ms:8.1f} мс  {name}')
+        self.stdout.write(
+            f'Шаблонов: {len(timings)}, '
+            f'всего {sum(ms for _, ms in timings):.1f} мс')
+        if errors:
+            raise CommandError('\n'.join(
+                f'{name}: {error}' for name, error in errors))
+        if options['touch']:
+            touch()
+            self.stdout.write(self.style.SUCCESS(
+                'Воркеры перекомпилируют шаблоны.'))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.transfer import FORMATS, export_posts, guess_format, open_dump
+
+
+class Command(BaseCommand):
+    help = ('Выгружает все посты в NDJSON или CSV потоком, '
+            'не загружая их в память.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-',
+                            help='Файл дампа, .gz - со сжатием; '
+                                 'по умолчанию стандартный вывод.')
+        parser.add_argument('--format', choices=FORMATS,
+                            help='По умолчанию - по расширению файла.')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Строк за одно чтение из базы.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+        started = time.perf_counter()
+        report_every = options['chunk_size'] * 50
+
+        def progress(done):
+            if done % report_every == 0:
+                elapsed = time.perf_counter() - started
+                self.stderr.write(f'Постов: {done} ({done / elapsed:.0f}/с)')
+
+        with open_dump(path, 'w') as stream:
+            count = export_posts(stream, fmt, options['chunk_size'],
+                                 progress)
+        # Дамп может идти в стандартный вывод, поэтому итог - в stderr.
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено постов: {count} за '
+            f'{time.perf_counter() - started:.1f} с'))
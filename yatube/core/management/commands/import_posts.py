@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.transfer import (FORMATS, DumpError, guess_format, import_posts,
+                           open_dump)
+
+
+class Command(BaseCommand):
+    help = ('Загружает посты из дампа NDJSON или CSV пачками '
+            'внутри транзакций.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-',
+                            help='Файл дампа, .gz - со сжатием; '
+                                 'по умолчанию стандартный ввод.')
+        parser.add_argument('--format', choices=FORMATS,
+                            help='По умолчанию - по расширению файла.')
+        parser.add_argument('--batch-size', type=int, default=10000,
+                            help='Постов в одной транзакции.')
+        parser.add_argument('--create-missing', action='store_true',
+                            help='Создавать неизвестных авторов и группы.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+        started = time.perf_counter()
+        report_every = options['batch_size'] * 10
+
+        def progress(done):
+            if done % report_every == 0:
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f'Постов: {done} ({done / elapsed:.0f}/с)')
+
+        try:
+            with open_dump(path, 'r') as stream:
+                posts, authors, groups = import_posts(
+                    stream, fmt, options['batch_size'],
+                    options['create_missing'], progress)
+        except DumpError as error:
+            raise CommandError(error)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено постов: {posts} ({posts / elapsed:.0f}/с), '
+            f'новых авторов: {authors}, групп: {groups}'))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.seeding import seed
+
+
+class Command(BaseCommand):
+    help = ('Наполняет базу пользователями, группами и постами '
+            'пачками внутри транзакций.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--groups', type=int, default=500)
+        parser.add_argument('--posts', type=int, default=1000000)
+        parser.add_argument('--batch-size', type=int, default=10000,
+                            help='Постов в одной транзакции.')
+        parser.add_argument('--skew', type=float, default=1.0,
+                            help='Показатель Ципфа для авторов и групп; '
+                                 '0 - равномерно.')
+        parser.add_argument('--days', type=int, default=365,
+                            help='За сколько дней распределить посты.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        def progress(done, total):
+            if done == total or done % (options['batch_size'] * 10) == 0:
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'Постов: {done}/{total} ({done / elapsed:.0f}/с)')
+
+        seed(options['users'], options['groups'], options['posts'],
+             batch_size=options['batch_size'], skew=options['skew'],
+             days=options['days'], seed=options['seed'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.perf_counter() - started:.1f} с'))
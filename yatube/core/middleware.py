@@ -0,0 +1,174 @@
+import json
+import logging
+import mimetypes
+import os
+import random
+import re
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import connections
+from django.http import FileResponse, HttpResponseNotModified
+from django.middleware.gzip import GZipMiddleware
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.utils.text import compress_string
+from django.views.static import was_modified_since
+
+from core.profiling import install_template_hook, profile, registry
+from core.storage import brotli
+
+logger = logging.getLogger('core.profiling')
+
+
+class ProfilingMiddleware:
+    """Профилирует долю ``PROFILING_SAMPLE_RATE`` запросов.
+
+    Остальные запросы стоят одного вызова random(). Стоит в MIDDLEWARE
+    сразу после раздачи статики, чтобы учесть запросы сессий
+    и аутентификации.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install_template_hook()
+
+    def __call__(self, request):
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+        with ExitStack() as stack:
+            sample = stack.enter_context(profile())
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(sample.execute_wrapper))
+            response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else '<unresolved>'
+        registry.add(view, sample)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(
+                {'view': view, 'path': request.path,
+                 'status': response.status_code, **sample.as_dict()},
+                ensure_ascii=False))
+        return response
+
+
+re_accepts_brotli = re.compile(r'\bbr\b')
+re_accepts_gzip = re.compile(r'\bgzip\b')
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную ``collectstatic`` статику из ``STATIC_ROOT``.
+
+    Файлы с хэшем в имени не меняются, поэтому кэшируются на
+    ``STATIC_MAX_AGE`` с пометкой immutable; остальные браузер
+    перепроверяет по Last-Modified. Если клиент принимает brotli или
+    gzip и рядом лежит сжатая копия, отдаётся она. Пока статику
+    не собирали, запросы идут дальше, к обычной раздаче.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        hashed_names = getattr(staticfiles_storage, 'hashed_names', None)
+        self.immutable = hashed_names() if hashed_names else set()
+
+    def __call__(self, request):
+        if (not settings.STATIC_ROOT
+                or request.method not in ('GET', 'HEAD')
+                or not request.path.startswith(settings.STATIC_URL)):
+            return self.get_response(request)
+        name = request.path[len(settings.STATIC_URL):]
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except SuspiciousFileOperation:
+            return self.get_response(request)
+        if not os.path.isfile(path):
+            return self.get_response(request)
+        return self.serve(request, name, path)
+
+    def serve(self, request, name, path):
+        stat = os.stat(path)
+        if name not in self.immutable and not was_modified_since(
+                request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                stat.st_mtime, stat.st_size):
+            return HttpResponseNotModified()
+        content_type, _ = mimetypes.guess_type(name)
+        accepts = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        encoding = None
+        for suffix, name_encoding, accepted in (
+                ('.br', 'br', re_accepts_brotli),
+                ('.gz', 'gzip', re_accepts_gzip)):
+            if accepted.search(accepts) and os.path.isfile(path + suffix):
+                path, encoding = path + suffix, name_encoding
+                break
+        response = FileResponse(
+            open(path, 'rb'),
+            content_type=content_type or 'application/octet-stream')
+        if encoding:
+            response['Content-Encoding'] = encoding
+        patch_vary_headers(response, ('Accept-Encoding',))
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if name in self.immutable:
+            response['Cache-Control'] = (
+                f'public, max-age={settings.STATIC_MAX_AGE}, immutable')
+        else:
+            response['Cache-Control'] = 'public, max-age=0, must-revalidate'
+        return response
+
+
+def accepted_encoding(request):
+    """Лучшее сжатие из тех, что принимает клиент, или ``None``."""
+    accepts = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    if brotli is not None and re_accepts_brotli.search(accepts):
+        return 'br'
+    if re_accepts_gzip.search(accepts):
+        return 'gzip'
+    return None
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=settings.BROTLI_QUALITY)
+    return compress_string(content)
+
+
+def encode_response(response, encoding, compressed):
+    """Подменяет тело ответа сжатым, если оно короче."""
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if len(compressed) >= len(response.content):
+        return response
+    response.content = compressed
+    # Как и GZipMiddleware: сжатое тело не равно байт в байт
+    # исходному, поэтому сильный ETag становится слабым.
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+    response['Content-Length'] = str(len(response.content))
+    response['Content-Encoding'] = encoding
+    return response
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Сжимает ответы не короче ``COMPRESS_MIN_SIZE`` байт.
+
+    Клиентам с brotli готовые ответы сжимаются им (если пакет
+    установлен), остальным и потоковые ответы - gzip. Ответы, которые
+    уже сжаты (например, страницы из кэша со сжатой копией), не
+    трогает.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming:
+            return super().process_response(request, response)
+        if (len(response.content) < settings.COMPRESS_MIN_SIZE
+                or response.has_header('Content-Encoding')):
+            return response
+        encoding = accepted_encoding(request)
+        if encoding is None:
+            patch_vary_headers(response, ('Accept-Encoding',))
+            return response
+        return encode_response(
+            response, encoding, compress(response.content, encoding))
@@ -0,0 +1,214 @@
+"""Выборочное профилирование запросов.
+
+На малую долю запросов (``PROFILING_SAMPLE_RATE``) записывается, сколько
+SQL выполнил обработчик и сколько времени на это ушло, самые медленные
+запросы с местом вызова в коде проекта, время отрисовки шаблонов и
+прирост числа выделенных блоков памяти. Результаты копятся в памяти
+процесса в виде гистограмм по именам маршрутов.
+"""
+import bisect
+import os
+import sys
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.template.base import Template
+
+# Верхние границы корзин гистограмм; последняя корзина - «больше».
+MS_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+BLOCK_BUCKETS = (100, 1000, 10000, 100000, 1000000)
+SLOWEST_QUERIES = 5
+
+# Кадры самого профилировщика местом вызова не считаются.
+OWN_FILES = {__file__, os.path.join(os.path.dirname(__file__),
+                                    'middleware.py')}
+
+_local = threading.local()
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами, сумма и максимум."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+        self.max = 0
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def as_dict(self):
+        samples = sum(self.counts)
+        labels = [f'<={bucket}' for bucket in self.buckets]
+        labels.append(f'>{self.buckets[-1]}')
+        return {
+            'buckets': dict(zip(labels, self.counts)),
+            'mean': self.total / samples if samples else 0,
+            'max': self.max,
+        }
+
+
+class ViewStats:
+    """Накопленные замеры одного маршрута."""
+
+    def __init__(self):
+        self.samples = 0
+        self.duration_ms = Histogram(MS_BUCKETS)
+        self.queries = Histogram(COUNT_BUCKETS)
+        self.sql_ms = Histogram(MS_BUCKETS)
+        self.template_ms = Histogram(MS_BUCKETS)
+        self.allocated_blocks = Histogram(BLOCK_BUCKETS)
+        self.slowest = []
+
+    def add(self, sample):
+        self.samples += 1
+        self.duration_ms.add(sample.duration_ms)
+        self.queries.add(len(sample.queries))
+        self.sql_ms.add(sample.sql_ms)
+        self.template_ms.add(sample.template_ms)
+        self.allocated_blocks.add(max(sample.allocated_blocks, 0))
+        self.slowest = sorted(self.slowest + sample.slowest(),
+                              key=lambda query: -query['ms'])
+        del self.slowest[SLOWEST_QUERIES:]
+
+    def as_dict(self):
+        return {
+            'samples': self.samples,
+            'duration_ms': self.duration_ms.as_dict(),
+            'queries': self.queries.as_dict(),
+            'sql_ms': self.sql_ms.as_dict(),
+            'template_ms': self.template_ms.as_dict(),
+            'allocated_blocks': self.allocated_blocks.as_dict(),
+            'slowest_queries': self.slowest,
+        }
+
+
+class Registry:
+    """Замеры всех маршрутов процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def add(self, view, sample):
+        with self.lock:
+            self.views.setdefault(view, ViewStats()).add(sample)
+
+    def report(self):
+        with self.lock:
+            return {view: stats.as_dict()
+                    for view, stats in sorted(self.views.items())}
+
+    def clear(self):
+        with self.lock:
+            self.views.clear()
+
+
+registry = Registry()
+
+
+def call_site():
+    """Ближайший к запросу кадр стека из кода проекта."""
+    for frame in reversed(traceback.extract_stack()):
+        if (frame.filename.startswith(settings.BASE_DIR)
+                and frame.filename not in OWN_FILES
+                and 'site-packages' not in frame.filename):
+            path = os.path.relpath(frame.filename, settings.BASE_DIR)
+            return f'{path}:{frame.lineno} {frame.name}'
+    return None
+
+
+class Sample:
+    """Замер одного запроса."""
+
+    def __init__(self):
+        self.queries = []
+        self.template_ms = 0
+        self.template_depth = 0
+        self.started = time.perf_counter()
+        self.blocks = sys.getallocatedblocks()
+        self.duration_ms = 0
+        self.allocated_blocks = 0
+
+    @property
+    def sql_ms(self):
+        return sum(query['ms'] for query in self.queries)
+
+    def slowest(self):
+        return sorted(self.queries,
+                      key=lambda query: -query['ms'])[:SLOWEST_QUERIES]
+
+    def finish(self):
+        self.duration_ms = (time.perf_counter() - self.started) * 1000
+        self.allocated_blocks = sys.getallocatedblocks() - self.blocks
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'ms': (time.perf_counter() - started) * 1000,
+                'site': call_site(),
+            })
+
+    def as_dict(self):
+        return {
+            'duration_ms': self.duration_ms,
+            'queries': len(self.queries),
+            'sql_ms': self.sql_ms,
+            'template_ms': self.template_ms,
+            'allocated_blocks': self.allocated_blocks,
+            'slowest_queries': self.slowest(),
+        }
+
+
+@contextmanager
+def profile():
+    """Замеряет код внутри блока и отдаёт объект замера."""
+    sample = Sample()
+    _local.sample = sample
+    try:
+        yield sample
+    finally:
+        _local.sample = None
+        sample.finish()
+
+
+def current_sample():
+    return getattr(_local, 'sample', None)
+
+
+def _render(self, context):
+    sample = current_sample()
+    if sample is None:
+        return _original_render(self, context)
+    # Вложенные шаблоны ({% include %}) уже учтены во внешнем.
+    sample.template_depth += 1
+    started = time.perf_counter()
+    try:
+        return _original_render(self, context)
+    finally:
+        sample.template_depth -= 1
+        if not sample.template_depth:
+            sample.template_ms += (time.perf_counter() - started) * 1000
+
+
+_original_render = Template.render
+
+
+def install_template_hook():
+    """Подменяет Template.render счётчиком времени отрисовки.
+
+    Вне замера обёртка стоит одну проверку thread-local.
+    """
+    if Template.render is not _render:
+        Template.render = _render
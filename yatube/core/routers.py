@@ -0,0 +1,97 @@
+"""Чтение лент с реплик базы данных.
+
+Представления, помеченные ``@read_from_replicas``, читают данные
+с одной из баз ``DATABASE_REPLICAS``, если запрос анонимный (без
+cookie сессии: сессию и пользователя читаем только с основной базы)
+и клиент недавно ничего не записывал. Реплика выбирается один раз на
+запрос: счётчик, валидаторы и строки страницы читаются из одной копии.
+Всё остальное, в том числе любая запись, идёт в ``default``.
+
+После запроса, который выполнил INSERT, UPDATE или DELETE,
+``ReplicaMiddleware`` ставит cookie, и ``REPLICA_PIN_SECONDS`` секунд
+этот клиент читает только основную базу: свою запись он увидит, даже
+если реплика отстаёт.
+"""
+import random
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'primary_until'
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+_state = threading.local()
+
+
+def using_replicas():
+    """Читает ли текущий запрос с реплик."""
+    return getattr(_state, 'replica', None) is not None
+
+
+def is_pinned(request):
+    try:
+        until = float(request.COOKIES.get(PIN_COOKIE, 0))
+    except ValueError:
+        return False
+    return until > time.time()
+
+
+def read_from_replicas(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (not settings.DATABASE_REPLICAS
+                or request.method not in ('GET', 'HEAD')
+                or settings.SESSION_COOKIE_NAME in request.COOKIES
+                or is_pinned(request)):
+            return view(request, *args, **kwargs)
+        _state.replica = random.choice(settings.DATABASE_REPLICAS)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _state.replica = None
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return getattr(_state, 'replica', None)
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики - копии основной базы, связи между ними допустимы.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схему реплик повторяет репликация, а не миграции.
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaMiddleware:
+    """Закрепляет за основной базой клиента, который что-то записал."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        _state.wrote = False
+        with connections[DEFAULT_DB_ALIAS].execute_wrapper(self.watch):
+            response = self.get_response(request)
+        if _state.wrote:
+            response.set_cookie(
+                PIN_COOKIE, str(time.time() + settings.REPLICA_PIN_SECONDS),
+                max_age=settings.REPLICA_PIN_SECONDS, httponly=True,
+                samesite='Lax')
+        return response
+
+    @staticmethod
+    def watch(execute, sql, params, many, context):
+        if sql.lstrip()[:7].upper().startswith(WRITE_STATEMENTS):
+            _state.wrote = True
+        return execute(sql, params, many, context)
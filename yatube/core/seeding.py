@@ -0,0 +1,159 @@
+"""Быстрое наполнение базы данными производственного объёма."""
+import datetime as dt
+import random
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.utils import timezone
+from faker import Faker
+
+from posts.counters import recount_posts
+from posts.front_page import rebuild_front_page
+from posts.lookups import clear_lookups
+from posts.models import Group, Post
+from posts.search import rebuild_index
+
+User = get_user_model()
+TEXT_POOL_SIZE = 1000
+POST_FIELDS = ('text', 'pub_date', 'updated', 'author', 'group')
+# У этих полей нет DEFAULT в базе, сырой INSERT пишет значения сам.
+DEFAULT_POST_VALUES = {'image': "''", 'thumbnails': "''",
+                       'comments_count': '0'}
+
+
+def skewed_weights(size, skew):
+    """Веса по закону Ципфа: первый в списке популярнее остальных."""
+    return [1 / (rank + 1) ** skew for rank in range(size)]
+
+
+def seed_users(fake, count):
+    password = make_password(None)
+    User.objects.bulk_create(
+        [
+            User(username=f'user{i}',
+                 first_name=fake.first_name(),
+                 last_name=fake.last_name(),
+                 password=password)
+            for i in range(count)
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def seed_groups(fake, count):
+    Group.objects.bulk_create(
+        [
+            Group(title=fake.catch_phrase()[:200],
+                  slug=f'group-{i}',
+                  description=fake.sentence())
+            for i in range(count)
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def insert_posts(rows):
+    """Вставляет строки постов одним executemany.
+
+    Для миллионов строк bulk_create слишком дорог: он строит объект
+    модели на строку и перезаписывает pub_date текущим временем.
+    """
+    fields = [Post._meta.get_field(name)
+              for name in POST_FIELDS + tuple(DEFAULT_POST_VALUES)]
+    columns = ', '.join(connection.ops.quote_name(field.column)
+                        for field in fields)
+    placeholders = ', '.join(
+        ['%s'] * len(POST_FIELDS) + list(DEFAULT_POST_VALUES.values()))
+    table = connection.ops.quote_name(Post._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {table} ({columns}) VALUES ({placeholders})', rows)
+
+
+@contextmanager
+def bulk_load(model):
+    """Ускоряет массовую вставку в таблицу модели на SQLite.
+
+    Вторичные индексы удаляются на время загрузки и строятся заново
+    одним проходом, а вне транзакции ещё и отключается синхронная
+    запись на диск. На других СУБД ничего не меняет.
+    """
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master "
+            "WHERE type = 'index' AND tbl_name = %s AND sql IS NOT NULL",
+            [table])
+        indexes = cursor.fetchall()
+        cursor.execute('PRAGMA synchronous')
+        synchronous = cursor.fetchone()[0]
+        if not connection.in_atomic_block:
+            cursor.execute('PRAGMA synchronous = OFF')
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for _, sql in indexes:
+                cursor.execute(sql)
+            if not connection.in_atomic_block:
+                cursor.execute(f'PRAGMA synchronous = {int(synchronous)}')
+
+
+def seed(users, groups, posts, batch_size=10000, skew=1.0, days=365,
+         seed=0, progress=None):
+    """Наполняет базу пользователями, группами и постами.
+
+    Авторы и группы постов выбираются с перекосом ``skew``, даты
+    публикаций равномерно растут за последние ``days`` дней. Каждая
+    пачка из ``batch_size`` постов пишется в своей транзакции;
+    сигналы не посылаются, поэтому в конце счётчики, поисковый индекс,
+    главная страница и кэши пересчитываются один раз.
+    """
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    rnd = random.Random(seed)
+    with transaction.atomic():
+        seed_users(fake, users)
+        seed_groups(fake, groups)
+    texts = [fake.paragraph(nb_sentences=rnd.randint(1, 6))
+             for _ in range(TEXT_POOL_SIZE)]
+    author_ids = list(
+        User.objects.order_by('id').values_list('id', flat=True))
+    group_ids = list(
+        Group.objects.order_by('id').values_list('id', flat=True)) + [None]
+    author_weights = skewed_weights(len(author_ids), skew)
+    group_weights = skewed_weights(len(group_ids), skew)
+
+    now = timezone.now()
+    start = now - dt.timedelta(days=days)
+    step = (now - start) / max(posts, 1)
+    adapt = connection.ops.adapt_datetimefield_value
+    with bulk_load(Post):
+        for offset in range(0, posts, batch_size):
+            size = min(batch_size, posts - offset)
+            authors = rnd.choices(author_ids, author_weights, k=size)
+            post_groups = rnd.choices(group_ids, group_weights, k=size)
+            post_texts = rnd.choices(texts, k=size)
+            rows = []
+            for i in range(size):
+                pub_date = adapt(start + step * (offset + i))
+                rows.append((post_texts[i], pub_date, pub_date,
+                             authors[i], post_groups[i]))
+            with transaction.atomic():
+                insert_posts(rows)
+            if progress is not None:
+                progress(offset + size, posts)
+    recount_posts()
+    rebuild_index()
+    rebuild_front_page()
+    for cache in caches.all():
+        cache.clear()
+    clear_lookups()
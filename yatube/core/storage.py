@@ -0,0 +1,83 @@
+"""Статика с хэшем в имени и заранее сжатыми копиями.
+
+``collectstatic`` кладёт в ``STATIC_ROOT`` файлы вида
+``bootstrap.min.<хэш>.css``, а рядом - ``.gz`` и, если установлен
+пакет brotli, ``.br``. Изменённый файл получает новое имя, поэтому
+браузеры могут хранить старое сколько угодно (см.
+``core.middleware.StaticFilesMiddleware``).
+"""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.storage import FileSystemStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.html', '.txt', '.xml', '.json',
+                '.map', '.ico')
+# Сжатая копия, которая выигрывает меньше 5%, не стоит лишнего файла.
+MIN_RATIO = 0.95
+
+
+def compress_file(path):
+    """Пишет рядом с файлом ``.gz`` и ``.br``; возвращает их имена."""
+    with open(path, 'rb') as original:
+        data = original.read()
+    variants = [('.gz', lambda: gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', lambda: brotli.compress(data, quality=11)))
+    written = []
+    for suffix, compress in variants:
+        compressed = compress()
+        if len(compressed) > len(data) * MIN_RATIO:
+            continue
+        with open(path + suffix, 'wb') as target:
+            target.write(compressed)
+        written.append(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Манифест хэшированных имён плюс сжатые копии файлов.
+
+    Для файла не из манифеста - например, пока ``collectstatic``
+    не запускали (разработка, тесты) - ``{% static %}`` отдаёт исходное
+    имя, а не роняет страницу.
+    """
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in set(self.hashed_files.values()):
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE:
+                compress_file(self.path(name))
+
+    def hashed_names(self):
+        return set(self.hashed_files.values())
+
+
+class ContentHashedStorage(FileSystemStorage):
+    """Хранилище файлов, названных хэшем содержимого.
+
+    Файл с таким именем уже хранит те же байты, поэтому повторная
+    загрузка не пишет копию с суффиксом, а ссылается на него.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        if self.exists(name):
+            return name
+        return super()._save(name, content)
@@ -0,0 +1,124 @@
+"""Скомпилированные шаблоны.
+
+С ``TEMPLATE_CACHE`` шаблоны читает кэширующий загрузчик: каждый шаблон
+разбирается один раз за жизнь процесса. ``start()`` при старте воркера
+(``yatube.wsgi``, ``yatube.asgi``) сразу компилирует все шаблоны, чтобы
+первые запросы после выкладки не тратили время на их разбор, и пишет в
+лог, сколько занял каждый.
+
+Работающие воркеры подхватывают новые шаблоны без перезапуска: выкладка
+меняет время изменения файла ``TEMPLATE_RELOAD_FILE`` (``manage.py
+compile_templates --touch``), и воркер в начале следующего запроса
+сбрасывает кэш и компилирует шаблоны заново.
+"""
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger(__name__)
+RELOAD_UID = 'core.template_cache.check_reload'
+
+_lock = threading.Lock()
+_reload_mtime = None
+
+
+def django_engines():
+    return [engine for engine in engines.all()
+            if isinstance(engine, DjangoTemplates)]
+
+
+def template_names(engine):
+    """Имена всех шаблонов, которые находят загрузчики движка."""
+    names = set()
+    for loader in engine.engine.template_loaders:
+        for loader in getattr(loader, 'loaders', [loader]):
+            for directory in getattr(loader, 'get_dirs', list)():
+                for root, _, files in os.walk(directory):
+                    names.update(
+                        os.path.relpath(os.path.join(root, name),
+                                        directory).replace(os.sep, '/')
+                        for name in files if not name.startswith('.'))
+    return sorted(names)
+
+
+def precompile():
+    """Компилирует все шаблоны.
+
+    Возвращает ``[(имя, мс)]`` от медленных к быстрым и
+    ``[(имя, ошибка)]`` для шаблонов, которые не разбираются.
+    """
+    timings = []
+    errors = []
+    for engine in django_engines():
+        for name in template_names(engine):
+            started = time.perf_counter()
+            try:
+                engine.get_template(name)
+            except (TemplateSyntaxError, UnicodeDecodeError) as error:
+                errors.append((name, error))
+                continue
+            timings.append((name, (time.perf_counter() - started) * 1000))
+    timings.sort(key=lambda timing: -timing[1])
+    return timings, errors
+
+
+def reset():
+    for engine in django_engines():
+        for loader in engine.engine.template_loaders:
+            loader.reset()
+
+
+def reload_mtime():
+    try:
+        return os.stat(settings.TEMPLATE_RELOAD_FILE).st_mtime
+    except OSError:
+        return None
+
+
+def touch():
+    """Просит работающие воркеры перекомпилировать шаблоны."""
+    with open(settings.TEMPLATE_RELOAD_FILE, 'a'):
+        os.utime(settings.TEMPLATE_RELOAD_FILE)
+
+
+def compile_all():
+    timings, errors = precompile()
+    for name, ms in timings:
+        logger.info('Шаблон %s скомпилирован за %.1f мс', name, ms)
+    for name, error in errors:
+        logger.warning('Шаблон %s не компилируется: %s', name, error)
+    logger.info('Скомпилировано шаблонов: %s за %.1f мс', len(timings),
+                sum(ms for _, ms in timings))
+
+
+def check_reload(**kwargs):
+    global _reload_mtime
+    mtime = reload_mtime()
+    if mtime == _reload_mtime:
+        return
+    with _lock:
+        if mtime == _reload_mtime:
+            return
+        reset()
+        compile_all()
+        _reload_mtime = mtime
+
+
+def start():
+    """Старт воркера: компилирует шаблоны и следит за файлом
+    перезагрузки. Без ``TEMPLATE_CACHE`` ничего не делает.
+    """
+    global _reload_mtime
+    if not settings.TEMPLATE_CACHE:
+        return
+    with _lock:
+        _reload_mtime = reload_mtime()
+        compile_all()
+    if settings.TEMPLATE_RELOAD_FILE:
+        request_started.connect(check_reload, dispatch_uid=RELOAD_UID)
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+
+from django.test import SimpleTestCase
+
+from core.asgi import BUFFER_SIZE, ASGIHandler, build_environ
+
+
+def call(handler, method='GET', path='/', body=b'', chunks=1):
+    '''Выполняет один HTTP-запрос к приложению ASGI.'''
+    scope = {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': b'q=1',
+        'headers': [(b'content-type', b'text/plain'),
+                    (b'x-test', b'yes')],
+    }
+    size = max(1, -(-len(body) // chunks))
+    parts = [body[i:i + size] for i in range(0, len(body), size)] or [b'']
+    messages = [{'type': 'http.request', 'body': part,
+                 'more_body': i < len(parts) - 1}
+                for i, part in enumerate(parts)]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(handler(scope, receive, send))
+    return sent
+
+
+class Recorder:
+    '''WSGI-приложение, которое запоминает окружение и потоки.'''
+
+    def __init__(self, body=(b'ok',)):
+        self.body = body
+        self.threads = []
+
+    def __call__(self, environ, start_response):
+        self.environ = environ
+        self.input = environ['wsgi.input'].read()
+        self.threads.append(threading.current_thread().name)
+        start_response('201 Created', [('Content-Type', 'text/plain')])
+        return self
+
+    def __iter__(self):
+        return iter(self.body)
+
+    def close(self):
+        self.threads.append(threading.current_thread().name)
+
+
+class ASGIHandlerTests(SimpleTestCase):
+    def test_reads_run_in_read_pool(self):
+        '''GET выполняется в пуле чтения и получает окружение WSGI.'''
+        app = Recorder()
+        sent = call(ASGIHandler(app), path='/группа/')
+        self.assertEqual(sent[0]['status'], 201)
+        self.assertIn((b'content-type', b'text/plain'), sent[0]['headers'])
+        self.assertEqual(sent[1]['body'], b'ok')
+        self.assertEqual(app.environ['QUERY_STRING'], 'q=1')
+        self.assertEqual(app.environ['HTTP_X_TEST'], 'yes')
+        self.assertEqual(app.environ['CONTENT_TYPE'], 'text/plain')
+        self.assertEqual(
+            app.environ['PATH_INFO'].encode('latin-1').decode(), '/группа/')
+        self.assertTrue(app.threads[0].startswith('asgi-read'))
+        # Ответ закрывается в том же потоке, где выполнялся.
+        self.assertEqual(app.threads[0], app.threads[1])
+
+    def test_repeated_headers(self):
+        '''Повторные Cookie склеиваются через «; », прочие — через запятую.'''
+        environ = build_environ({
+            'method': 'GET',
+            'path': '/',
+            'headers': [(b'cookie', b'sessionid=abc'),
+                        (b'cookie', b'csrftoken=xyz'),
+                        (b'accept', b'text/html'),
+                        (b'accept', b'*/*')],
+        }, None)
+        self.assertEqual(environ['HTTP_COOKIE'],
+                         'sessionid=abc; csrftoken=xyz')
+        self.assertEqual(environ['HTTP_ACCEPT'], 'text/html,*/*')
+
+    def test_writes_run_in_write_pool(self):
+        '''POST выполняется в пуле записи и получает всё тело.'''
+        app = Recorder()
+        call(ASGIHandler(app), method='POST', body=b'text=hello', chunks=3)
+        self.assertEqual(app.input, b'text=hello')
+        self.assertTrue(app.threads[0].startswith('asgi-write'))
+
+    def test_large_response_is_streamed(self):
+        '''Большой ответ уходит частями по мере готовности.'''
+        chunk = b'x' * (BUFFER_SIZE // 2 + 1)
+        app = Recorder(body=[chunk] * 4)
+        sent = call(ASGIHandler(app))
+        bodies = [message for message in sent
+                  if message['type'] == 'http.response.body']
+        self.assertGreater(len(bodies), 2)
+        self.assertEqual(b''.join(message['body'] for message in bodies),
+                         chunk * 4)
+        self.assertFalse(bodies[-1].get('more_body', False))
+
+    def test_overload_is_rejected(self):
+        '''Сверх лимита ожидающих запросов сервер отвечает 503.'''
+        handler = ASGIHandler(Recorder(), max_pending=1)
+        handler.pending = 1
+        sent = call(handler)
+        self.assertEqual(sent[0]['status'], 503)
+
+    def test_django_application(self):
+        '''Приложение проекта отвечает через ASGI.'''
+        from yatube.asgi import application
+
+        sent = call(application, path='/about/tech/')
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn('Технологии'.encode(), sent[1]['body'])
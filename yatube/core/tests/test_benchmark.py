@@ -0,0 +1,29 @@
+from django.core.signals import request_finished
+from django.db import close_old_connections
+from django.test import TestCase
+
+from core import benchmark
+from core.seeding import seed
+from posts.models import Group, Post
+
+
+class BenchmarkTests(TestCase):
+    def setUp(self):
+        # Как и тестовый клиент, не закрываем соединение между запросами.
+        request_finished.disconnect(close_old_connections)
+        self.addCleanup(request_finished.connect, close_old_connections)
+
+    def test_seed_and_run_all_routes(self):
+        '''Наполнение и прогон покрывают все маршруты сайта.'''
+        seed(users=5, groups=3, posts=40)
+        self.assertEqual(Post.objects.count(), 40)
+        self.assertEqual(Group.objects.count(), 3)
+        report = benchmark.run(requests=2)
+        self.assertCountEqual(report['routes'], benchmark.route_names())
+        for name, result in report['routes'].items():
+            with self.subTest(route=name):
+                self.assertEqual(result['statuses'], [200])
+                self.assertGreater(result['p50_ms'], 0)
+                self.assertGreater(result['peak_kb'], 0)
+        rows = benchmark.compare(report, report)
+        self.assertTrue(all(change == 0 for *_, change in rows))
@@ -0,0 +1,63 @@
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.profiling import registry
+from posts.models import Post
+
+User = get_user_model()
+
+
+class ProfilingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.admin = User.objects.create_user(username='admin', is_staff=True)
+        Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        caches[settings.PAGE_CACHE_ALIAS].clear()
+        registry.clear()
+        self.guest_client = Client()
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_sampled_request_is_recorded(self):
+        '''Замер запроса попадает в гистограммы своего маршрута.'''
+        with self.assertLogs('core.profiling', 'INFO') as logs:
+            self.guest_client.get(reverse('posts:index'))
+        stats = registry.report()['posts:index']
+        self.assertEqual(stats['samples'], 1)
+        self.assertGreater(stats['queries']['max'], 0)
+        self.assertGreater(stats['template_ms']['max'], 0)
+        self.assertEqual(sum(stats['duration_ms']['buckets'].values()), 1)
+        sites = [query['site'] for query in stats['slowest_queries']
+                 if 'posts_post' in query['sql']]
+        self.assertTrue(sites)
+        for site in sites:
+            self.assertTrue(site.startswith('posts/'), site)
+        self.assertIn('"view": "posts:index"', logs.output[0])
+
+    @override_settings(PROFILING_SAMPLE_RATE=0)
+    def test_unsampled_request_is_not_recorded(self):
+        '''Запросы вне выборки не профилируются.'''
+        self.guest_client.get(reverse('posts:index'))
+        self.assertEqual(registry.report(), {})
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_report_is_for_staff_only(self):
+        '''Отчёт доступен только персоналу.'''
+        url = reverse('profiling')
+        self.guest_client.get(reverse('posts:index'))
+        response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        client = Client()
+        client.force_login(self.user)
+        self.assertEqual(client.get(url).status_code, HTTPStatus.FOUND)
+        client.force_login(self.admin)
+        response = client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('posts:index', response.json())
@@ -0,0 +1,105 @@
+import os
+import random
+import sqlite3
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection, connections
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core.routers import PIN_COOKIE
+from posts.lookups import clear_lookups
+from posts.models import Group, Post
+
+User = get_user_model()
+REPLICA = 'replica_test'
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaRouterTests(TransactionTestCase):
+    # Копировать можно только зафиксированные данные, поэтому тест
+    # работает без обёртки в транзакцию.
+
+    def setUp(self):
+        caches[settings.PAGE_CACHE_ALIAS].clear()
+        self.user = User.objects.create_user(username='author')
+        self.old_post = Post.objects.create(
+            author=self.user, text='Старый пост')
+        # Реплика - копия основной базы в файле на этот момент.
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'replica.sqlite3')
+        connection.ensure_connection()
+        target = sqlite3.connect(path)
+        connection.connection.backup(target)
+        target.close()
+        connections.databases[REPLICA] = {
+            **connection.settings_dict, 'NAME': path}
+        self.addCleanup(self.drop_replica)
+        self.new_post = Post.objects.create(
+            author=self.user, text='Свежий пост')
+        self.new_group = Group.objects.create(
+            title='Новая группа', slug='new-group')
+        clear_lookups()
+        self.addCleanup(clear_lookups)
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def drop_replica(self):
+        connections[REPLICA].close()
+        delattr(connections._connections, REPLICA)
+        del connections.databases[REPLICA]
+
+    def index_ids(self, client):
+        response = client.get(reverse('posts:index'))
+        return [post.id for post in response.context['page_obj']]
+
+    def test_anonymous_reads_go_to_replica(self):
+        '''Анонимные ленты читаются с реплики, остальное - с основной.'''
+        self.assertEqual(self.index_ids(self.guest_client),
+                         [self.old_post.id])
+        response = self.guest_client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.new_post.id}))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.index_ids(self.authorized_client),
+                         [self.new_post.id, self.old_post.id])
+
+    def test_writer_is_pinned_to_primary(self):
+        '''После записи клиент видит её, даже выйдя из аккаунта.'''
+        response = self.authorized_client.post(
+            reverse('posts:post_create'), {'text': 'Мой пост'})
+        self.assertIn(PIN_COOKIE, response.cookies)
+        post = Post.objects.get(text='Мой пост')
+        del self.authorized_client.cookies[settings.SESSION_COOKIE_NAME]
+        self.assertIn(post.id, self.index_ids(self.authorized_client))
+        caches[settings.PAGE_CACHE_ALIAS].clear()
+        self.assertNotIn(post.id, self.index_ids(self.guest_client))
+
+    def test_replica_is_chosen_once_per_request(self):
+        '''Все чтения одного запроса идут в одну реплику.'''
+        with mock.patch('core.routers.random.choice',
+                        wraps=random.choice) as choice:
+            self.guest_client.get(reverse('posts:index'))
+        self.assertEqual(choice.call_count, 1)
+
+    def test_only_real_write_pins_client(self):
+        '''Запрос без записи в базу клиента не закрепляет.'''
+        url = reverse('posts:post_create')
+        response = self.authorized_client.post(url, {'text': ''})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_lookups_are_read_from_primary(self):
+        '''Группа, которой ещё нет на реплике, находится и не
+        кэшируется как отсутствующая.'''
+        url = reverse('posts:group_list', kwargs={'slug': 'new-group'})
+        for client in (self.guest_client, self.authorized_client):
+            with self.subTest(client=client):
+                self.assertEqual(client.get(url).status_code, 200)
@@ -0,0 +1,42 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import TestCase
+
+from posts.models import AuthorStats, Group, Post
+from posts.search import SearchResults
+
+User = get_user_model()
+
+
+class SeedCommandTests(TestCase):
+    def test_seed_creates_consistent_data(self):
+        '''seed наполняет базу пачками и пересчитывает производные данные.'''
+        call_command('seed', users=10, groups=4, posts=250, batch_size=100,
+                     days=10, stdout=StringIO())
+        self.assertEqual(User.objects.count(), 10)
+        self.assertEqual(Group.objects.count(), 4)
+        self.assertEqual(Post.objects.count(), 250)
+        for stats in AuthorStats.objects.all():
+            with self.subTest(author=stats.author_id):
+                self.assertEqual(stats.posts_count,
+                                 stats.author.posts.count())
+        dates = list(Post.objects.order_by('id').values_list(
+            'pub_date', flat=True))
+        self.assertEqual(dates, sorted(dates))
+        self.assertLess(dates[0], dates[-1])
+        top = Post.objects.values('author').annotate(
+            total=Count('id')).order_by('-total')
+        self.assertEqual(top[0]['author'], User.objects.order_by('id')[0].id)
+        text = Post.objects.first().text.split()[0]
+        self.assertGreater(SearchResults(Post.objects.all(), text).count(), 0)
+
+    def test_seed_can_run_twice(self):
+        '''Повторный запуск добавляет посты к существующим пользователям.'''
+        for _ in range(2):
+            call_command('seed', users=3, groups=2, posts=20,
+                         stdout=StringIO())
+        self.assertEqual(User.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 40)
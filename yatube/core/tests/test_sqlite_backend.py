@@ -0,0 +1,81 @@
+import os
+import tempfile
+import threading
+
+from django.db import OperationalError, connection
+from django.db.backends.sqlite3.base import DatabaseWrapper as StockWrapper
+from django.test import TestCase
+
+from core.db.sqlite3.base import DatabaseWrapper
+
+READER_TIMEOUT_MS: int = 100
+
+
+class SQLiteBackendTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'db.sqlite3')
+
+    def open(self, wrapper_class):
+        settings_dict = {
+            **connection.settings_dict,
+            'NAME': self.path,
+            'OPTIONS': {'timeout': READER_TIMEOUT_MS / 1000,
+                        'pragmas': {'busy_timeout': READER_TIMEOUT_MS}},
+        }
+        if wrapper_class is StockWrapper:
+            del settings_dict['OPTIONS']['pragmas']
+        return wrapper_class(settings_dict)
+
+    def read_during_write(self, wrapper_class):
+        '''Читает таблицу из другого потока, пока пишущий держит
+        блокировку записи, и возвращает прочитанное или ошибку.'''
+        writer = self.open(wrapper_class)
+        self.addCleanup(writer.close)
+        with writer.cursor() as cursor:
+            cursor.execute('CREATE TABLE post (text TEXT)')
+            cursor.execute("INSERT INTO post VALUES ('старый')")
+            # Так пишущий держит базу, пока фиксирует транзакцию.
+            cursor.execute('BEGIN EXCLUSIVE')
+            cursor.execute("INSERT INTO post VALUES ('новый')")
+        result = []
+
+        def read():
+            reader = self.open(wrapper_class)
+            try:
+                with reader.cursor() as cursor:
+                    cursor.execute('SELECT text FROM post')
+                    result.append([row[0] for row in cursor.fetchall()])
+            except OperationalError as error:
+                result.append(error)
+            finally:
+                reader.close()
+        thread = threading.Thread(target=read)
+        thread.start()
+        thread.join()
+        writer.cursor().execute('COMMIT')
+        return result[0]
+
+    def test_pragmas_are_applied(self):
+        '''Новое соединение получает WAL и остальные PRAGMA.'''
+        wrapper = self.open(DatabaseWrapper)
+        self.addCleanup(wrapper.close)
+        with wrapper.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], READER_TIMEOUT_MS)
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -64 * 1024)
+
+    def test_readers_are_not_blocked_by_writer(self):
+        '''В WAL читатель не ждёт пишущего и видит прошлый снимок,
+        а с журналом отката получает «database is locked».'''
+        self.assertIsInstance(
+            self.read_during_write(StockWrapper), OperationalError)
+        os.remove(self.path)
+        self.assertEqual(self.read_during_write(DatabaseWrapper), ['старый'])
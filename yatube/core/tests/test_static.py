@@ -0,0 +1,119 @@
+import gzip
+import os
+import tempfile
+from unittest import mock
+
+import brotli
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+
+from posts.models import Post
+
+User = get_user_model()
+CSS = 'css/bootstrap.min.css'
+
+
+class StaticPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.settings_override = override_settings(
+            STATIC_ROOT=cls.directory.name)
+        cls.settings_override.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.directory.cleanup()
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='author')
+        Post.objects.create(author=user, text='Тестовый пост')
+
+    def setUp(self):
+        caches[settings.PAGE_CACHE_ALIAS].clear()
+        self.client = Client()
+        with open(os.path.join(settings.STATICFILES_DIRS[0], CSS),
+                  'rb') as original:
+            self.css = original.read()
+
+    def test_collectstatic_writes_hashed_compressed_files(self):
+        '''collectstatic пишет файлы с хэшем и их сжатые копии.'''
+        hashed = staticfiles_storage.stored_name(CSS)
+        self.assertNotEqual(hashed, CSS)
+        path = staticfiles_storage.path(hashed)
+        with open(path + '.gz', 'rb') as compressed:
+            self.assertEqual(gzip.decompress(compressed.read()), self.css)
+        with open(path + '.br', 'rb') as compressed:
+            self.assertEqual(brotli.decompress(compressed.read()), self.css)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, staticfiles_storage.url(CSS))
+
+    def test_hashed_file_is_immutable_and_precompressed(self):
+        '''Файл с хэшем кэшируется навсегда и отдаётся сжатым.'''
+        url = staticfiles_storage.url(CSS)
+        for accept, encoding, decompress in (
+                ('gzip, deflate, br', 'br', brotli.decompress),
+                ('gzip', 'gzip', gzip.decompress),
+                ('', None, bytes)):
+            with self.subTest(accept=accept):
+                response = self.client.get(url, HTTP_ACCEPT_ENCODING=accept)
+                self.assertEqual(response.get('Content-Encoding'), encoding)
+                self.assertEqual(response['Content-Type'], 'text/css')
+                self.assertIn('immutable', response['Cache-Control'])
+                self.assertIn('Accept-Encoding', response['Vary'])
+                self.assertEqual(
+                    decompress(b''.join(response.streaming_content)),
+                    self.css)
+
+    def test_plain_file_is_revalidated(self):
+        '''Файл без хэша браузер перепроверяет по Last-Modified.'''
+        url = settings.STATIC_URL + CSS
+        response = self.client.get(url)
+        self.assertIn('must-revalidate', response['Cache-Control'])
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(0))
+        self.assertEqual(response.status_code, 200)
+
+    def test_pages_are_compressed(self):
+        '''Страницы сжимаются brotli или gzip, короткие ответы - нет.'''
+        plain = self.client.get(reverse('posts:index')).content
+        response = self.client.get(reverse('posts:index'),
+                                   HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), plain)
+        response = self.client.get(reverse('posts:index'),
+                                   HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain)
+        response = self.client.get(
+            reverse('api:post_detail', kwargs={'post_id': 0}),
+            HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_cached_page_is_not_compressed_again(self):
+        '''Страница из кэша отдаётся готовой сжатой копией.'''
+        url = reverse('posts:index')
+        with mock.patch('core.middleware.brotli.compress',
+                        wraps=brotli.compress) as compress:
+            first = self.client.get(url, HTTP_ACCEPT_ENCODING='br')
+            second = self.client.get(url, HTTP_ACCEPT_ENCODING='br')
+        self.assertEqual(compress.call_count, 1)
+        self.assertEqual(second['Content-Encoding'], 'br')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+        plain = self.client.get(url)
+        self.assertEqual(brotli.decompress(second.content), plain.content)
+        self.assertIn('Accept-Encoding', plain['Vary'])
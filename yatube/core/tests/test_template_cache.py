@@ -0,0 +1,71 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.signals import request_started
+from django.template import engines
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import template_cache
+
+LOADERS = [('django.template.loaders.cached.Loader', [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+])]
+
+
+class TemplateCacheTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'deploy.html')
+        self.write('старая версия')
+        templates = [dict(settings.TEMPLATES[0])]
+        templates[0]['DIRS'] = [self.directory.name,
+                                settings.TEMPLATES_DIR]
+        templates[0]['OPTIONS'] = dict(templates[0]['OPTIONS'],
+                                       loaders=LOADERS)
+        override = override_settings(
+            TEMPLATES=templates, TEMPLATE_CACHE=True,
+            TEMPLATE_RELOAD_FILE=os.path.join(self.directory.name, 'reload'))
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(request_started.disconnect,
+                        dispatch_uid=template_cache.RELOAD_UID)
+
+    def write(self, text):
+        with open(self.path, 'w', encoding='utf-8') as template:
+            template.write(text)
+
+    def render(self, name='deploy.html'):
+        return engines['django'].get_template(name).render()
+
+    def test_pages_render_without_parsing(self):
+        '''После старта воркера страницы не разбирают шаблоны.'''
+        with self.assertLogs('core.template_cache', 'INFO') as logs:
+            template_cache.start()
+        self.assertTrue(any('posts/index.html' in line
+                            for line in logs.output))
+        with mock.patch('django.template.base.Parser.parse',
+                        side_effect=AssertionError):
+            for url in (reverse('posts:index'), reverse('about:author')):
+                with self.subTest(url=url):
+                    self.assertEqual(Client().get(url).status_code, 200)
+
+    def test_touch_reloads_templates(self):
+        '''Шаблоны перечитываются только после сигнала выкладки.'''
+        with self.assertLogs('core.template_cache', 'INFO'):
+            template_cache.start()
+        self.write('новая версия')
+        Client().get(reverse('about:author'))
+        self.assertEqual(self.render(), 'старая версия')
+        out = StringIO()
+        call_command('compile_templates', touch=True, stdout=out)
+        self.assertIn('Шаблонов:', out.getvalue())
+        with self.assertLogs('core.template_cache', 'INFO'):
+            Client().get(reverse('about:author'))
+        self.assertEqual(self.render(), 'новая версия')
@@ -0,0 +1,94 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from posts.models import AuthorStats, FrontPageEntry, Group, Post
+from posts.search import SearchResults
+
+User = get_user_model()
+
+
+class TransferCommandTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug',
+            description='Тестовое описание')
+        Post.objects.create(author=cls.user, group=cls.group,
+                            text='Пост в группе')
+        Post.objects.create(author=cls.user,
+                            text='Текст, с "кавычками"\nи переносом')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def read(self, name):
+        with open(self.path(name), 'rb') as dump:
+            return dump.read()
+
+    def round_trip(self, first, second):
+        call_command('export_posts', self.path(first), stderr=StringIO())
+        Post.objects.all().delete()
+        call_command('import_posts', self.path(first), batch_size=1,
+                     stdout=StringIO())
+        call_command('export_posts', self.path(second), stderr=StringIO())
+
+    def test_ndjson_round_trip(self):
+        '''Дамп NDJSON после загрузки выгружается тем же файлом.'''
+        self.round_trip('posts.ndjson', 'again.ndjson')
+        self.assertEqual(self.read('posts.ndjson'), self.read('again.ndjson'))
+        rows = [json.loads(line) for line in
+                self.read('posts.ndjson').decode().splitlines()]
+        self.assertEqual([row['group'] for row in rows], ['test-slug', ''])
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(AuthorStats.objects.get(author=self.user)
+                         .posts_count, 2)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertEqual(FrontPageEntry.objects.count(), 2)
+        self.assertEqual(
+            SearchResults(Post.objects.all(), 'кавычками').count(), 1)
+
+    def test_compressed_csv_round_trip(self):
+        '''CSV со сжатием переносит тексты с запятыми и переносами.'''
+        self.round_trip('posts.csv.gz', 'again.csv.gz')
+        with open(self.path('posts.csv.gz'), 'rb') as dump:
+            self.assertEqual(dump.read(2), b'\x1f\x8b')
+        self.assertEqual(
+            set(Post.objects.values_list('text', flat=True)),
+            {'Пост в группе', 'Текст, с "кавычками"\nи переносом'})
+        call_command('export_posts', self.path('plain.csv'),
+                     stderr=StringIO())
+        call_command('export_posts', self.path('again.csv'),
+                     format='csv', stderr=StringIO())
+        self.assertEqual(self.read('plain.csv'), self.read('again.csv'))
+
+    def test_unknown_author(self):
+        '''Неизвестный автор - ошибка, если его не разрешено создать.'''
+        with open(self.path('posts.ndjson'), 'w') as dump:
+            dump.write(json.dumps({
+                'author': 'stranger', 'group': 'new-group',
+                'pub_date': '2022-01-01T00:00:00+00:00',
+                'updated': '2022-01-01T00:00:00', 'text': 'Чужой пост'}))
+        with self.assertRaisesMessage(CommandError, 'stranger'):
+            call_command('import_posts', self.path('posts.ndjson'),
+                         stdout=StringIO())
+        self.assertFalse(Post.objects.filter(text='Чужой пост').exists())
+        call_command('import_posts', self.path('posts.ndjson'),
+                     create_missing=True, stdout=StringIO())
+        post = Post.objects.get(text='Чужой пост')
+        self.assertEqual(post.author.username, 'stranger')
+        self.assertEqual(post.group.slug, 'new-group')
+        self.assertEqual(post.pub_date.year, 2022)
+        self.assertEqual(post.author.stats.posts_count, 1)
@@ -0,0 +1,204 @@
+"""Выгрузка и загрузка постов потоком в NDJSON или CSV.
+
+Посты читаются курсором по ``chunk_size`` строк и пишутся пачками
+по ``batch_size``, так что память не зависит от размера дампа.
+Автор и группа хранятся в дампе по имени пользователя и slug.
+Посты пишутся в порядке id, а загружаются в порядке файла, поэтому
+дамп, загруженный в пустую базу, выгружается обратно тем же файлом.
+"""
+import csv
+import gzip
+import json
+import sys
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.seeding import bulk_load, insert_posts
+from posts.counters import recount_posts
+from posts.front_page import rebuild_front_page
+from posts.lookups import clear_lookups
+from posts.models import Group, Post
+from posts.search import index_new_posts
+
+User = get_user_model()
+FIELDS = ('author', 'group', 'pub_date', 'updated', 'text')
+FORMATS = ('ndjson', 'csv')
+# Не больше переменных в одном запросе, чем позволяет SQLite.
+LOOKUP_BATCH = 900
+
+
+class DumpError(Exception):
+    """Строка дампа не читается или ссылается на неизвестные объекты."""
+
+
+def guess_format(path):
+    name = path[:-3] if path.endswith('.gz') else path
+    return 'csv' if name.endswith('.csv') else 'ndjson'
+
+
+def open_dump(path, mode):
+    """Открывает дамп как текст; ``-`` - стандартный поток,
+    ``.gz`` сжимается на лету.
+    """
+    if path == '-':
+        return open((sys.stdin if mode == 'r' else sys.stdout).fileno(),
+                    mode, encoding='utf-8', newline='', closefd=False)
+    if path.endswith('.gz'):
+        # Уровень как у утилиты gzip: девятый вдвое медленнее выгрузки.
+        return gzip.open(path, mode + 't', compresslevel=6,
+                         encoding='utf-8', newline='')
+    return open(path, mode, encoding='utf-8', newline='')
+
+
+def export_posts(stream, fmt='ndjson', chunk_size=2000, progress=None):
+    """Пишет все посты в ``stream`` и возвращает их число."""
+    rows = Post.objects.order_by('id').values_list(
+        'author__username', 'group__slug', 'pub_date', 'updated',
+        'text').iterator(chunk_size=chunk_size)
+    if fmt == 'csv':
+        writer = csv.writer(stream)
+        writer.writerow(FIELDS)
+        write = writer.writerow
+    else:
+        def write(row):
+            stream.write(json.dumps(dict(zip(FIELDS, row)),
+                                    ensure_ascii=False))
+            stream.write('\n')
+    count = 0
+    for author, group, pub_date, updated, text in rows:
+        write((author, group or '', pub_date.isoformat(),
+               updated.isoformat(), text))
+        count += 1
+        if progress is not None and count % chunk_size == 0:
+            progress(count)
+    if progress is not None:
+        progress(count)
+    return count
+
+
+def read_dump(stream, fmt='ndjson'):
+    """Строки дампа словарями с полями ``FIELDS``."""
+    if fmt == 'csv':
+        # Текст поста может быть длиннее стандартного предела поля.
+        csv.field_size_limit(sys.maxsize)
+        reader = csv.DictReader(stream)
+        if reader.fieldnames is not None and (
+                set(FIELDS) - set(reader.fieldnames)):
+            raise DumpError(
+                f'В заголовке CSV нужны поля: {", ".join(FIELDS)}')
+        for line, row in enumerate(reader, 2):
+            yield line, row
+        return
+    for line, raw in enumerate(stream, 1):
+        if not raw.strip():
+            continue
+        try:
+            row = json.loads(raw)
+        except ValueError as error:
+            raise DumpError(f'Строка {line}: {error}')
+        if not isinstance(row, dict) or set(FIELDS) - set(row):
+            raise DumpError(
+                f'Строка {line}: нужны поля {", ".join(FIELDS)}')
+        yield line, row
+
+
+def parse_date(line, value):
+    date = parse_datetime(value or '')
+    if date is None:
+        raise DumpError(f'Строка {line}: неверная дата {value!r}')
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date, timezone.utc)
+    return date
+
+
+class Resolver:
+    """Находит id авторов или групп пачками и помнит найденные.
+
+    Число авторов и групп много меньше числа постов, поэтому
+    словарь всех встреченных остаётся небольшим.
+    """
+
+    def __init__(self, model, field, create=None):
+        self.model = model
+        self.field = field
+        self.create = create
+        self.ids = {}
+        self.created = 0
+
+    def resolve(self, keys):
+        missing = list({key for key in keys if key not in self.ids})
+        for start in range(0, len(missing), LOOKUP_BATCH):
+            chunk = missing[start:start + LOOKUP_BATCH]
+            self.ids.update(self.model.objects.filter(
+                **{f'{self.field}__in': chunk}).values_list(self.field, 'id'))
+        missing = [key for key in missing if key not in self.ids]
+        if missing and self.create is None:
+            raise DumpError(
+                f'Нет в базе ({self.model._meta.verbose_name}): '
+                f'{", ".join(sorted(missing)[:10])}')
+        if missing:
+            self.model.objects.bulk_create(
+                [self.create(key) for key in missing], ignore_conflicts=True)
+            self.created += len(missing)
+            self.resolve(missing)
+
+
+def import_posts(stream, fmt='ndjson', batch_size=10000,
+                 create_missing=False, progress=None):
+    """Загружает посты из ``stream`` и возвращает (постов, авторов,
+    групп); авторы и группы - созданные заново.
+
+    Каждая пачка пишется в своей транзакции без сигналов; счётчики,
+    поиск, главная и кэши пересчитываются один раз в конце.
+    Неизвестные авторы и группы с ``create_missing`` создаются:
+    пользователи без пароля, группы с названием из slug.
+    """
+    password = make_password(None)
+    authors = Resolver(
+        User, 'username',
+        (lambda username: User(username=username, password=password))
+        if create_missing else None)
+    groups = Resolver(
+        Group, 'slug',
+        (lambda slug: Group(title=slug, slug=slug, description=''))
+        if create_missing else None)
+    adapt = connection.ops.adapt_datetimefield_value
+    rows = read_dump(stream, fmt)
+    count = 0
+    try:
+        with bulk_load(Post):
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                authors.resolve(row['author'] for _, row in batch)
+                groups.resolve(row['group'] for _, row in batch
+                               if row['group'])
+                values = [
+                    (row['text'],
+                     adapt(parse_date(line, row['pub_date'])),
+                     adapt(parse_date(line, row['updated'])),
+                     authors.ids[row['author']],
+                     groups.ids[row['group']] if row['group'] else None)
+                    for line, row in batch
+                ]
+                with transaction.atomic():
+                    insert_posts(values)
+                count += len(batch)
+                if progress is not None:
+                    progress(count)
+    finally:
+        if count:
+            recount_posts()
+            index_new_posts()
+            rebuild_front_page()
+            for cache in caches.all():
+                cache.clear()
+            clear_lookups()
+    return count, authors.created, groups.created
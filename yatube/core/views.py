@@ -0,0 +1,18 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from core.profiling import registry
+from posts.lookups import lookup_stats
+
+
+@staff_member_required
+def profiling_report(request):
+    """Гистограммы выборочного профилирования по маршрутам."""
+    return JsonResponse(registry.report(),
+                        json_dumps_params={'ensure_ascii': False})
+
+
+@staff_member_required
+def lookup_report(request):
+    """Попадания и промахи кэша групп и авторов в этом процессе."""
+    return JsonResponse(lookup_stats())
@@ -0,0 +1,20 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'run_at', 'attempts', 'failed',
+                    'locked_until')
+    list_filter = ('failed', 'name')
+    readonly_fields = ('created',)
+    actions = ('retry',)
+
+    def retry(self, request, queryset):
+        queryset.update(failed=False, attempts=0, run_at=timezone.now(),
+                        locked_by='', locked_until=None)
+    retry.short_description = 'Повторить выбранные задачи'
+
+
+admin.site.register(Job, JobAdmin)
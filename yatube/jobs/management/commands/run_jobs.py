@@ -0,0 +1,52 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs.queue import run_pending, work
+
+
+def worker():
+    stopping = []
+    # По SIGTERM воркер доделывает текущую пачку и выходит.
+    signal.signal(signal.SIGTERM, lambda *args: stopping.append(True))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    work(lambda: bool(stopping))
+
+
+def interrupt(*args):
+    raise KeyboardInterrupt
+
+
+class Command(BaseCommand):
+    help = 'Запускает воркеры очереди фоновых задач.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1,
+                            help='Число процессов-воркеров.')
+        parser.add_argument('--once', action='store_true',
+                            help='Выполнить готовые задачи и выйти.')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            done = run_pending()
+            self.stdout.write(self.style.SUCCESS(f'Выполнено задач: {done}'))
+            return
+        # Соединения с базой не должны достаться процессам по наследству.
+        connections.close_all()
+        processes = [multiprocessing.Process(target=worker, daemon=True)
+                     for _ in range(options['processes'])]
+        for process in processes:
+            process.start()
+        self.stdout.write(f'Воркеров: {len(processes)}, Ctrl+C - выход.')
+        signal.signal(signal.SIGTERM, interrupt)
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
@@ -0,0 +1,24 @@
+from django.db import models
+
+
+class Job(models.Model):
+    """Отложенный вызов задачи из ``jobs.queue``."""
+    name = models.CharField('Задача', max_length=200)
+    payload = models.TextField('Аргументы (JSON)')
+    run_at = models.DateTimeField('Не раньше')
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    locked_by = models.CharField(max_length=32, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    failed = models.BooleanField('Провалена', default=False)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        indexes = [
+            models.Index(fields=['failed', 'run_at'], name='job_due_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
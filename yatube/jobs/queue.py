@@ -0,0 +1,164 @@
+"""Очередь фоновых задач в базе данных.
+
+Задача - функция под ``@task``. ``func.delay(**kwargs)`` пишет строку
+``Job`` в той же транзакции, что и изменение, которое её вызвало: если
+транзакция откатится, задачи не будет, а воркер (``manage.py
+run_jobs``) увидит её только после фиксации.
+
+Воркер помечает забранные задачи своим токеном до ``locked_until``:
+два процесса не возьмут одну задачу, а задачи упавшего воркера
+вернутся в очередь, когда блокировка истечёт. Задачи с ``batch > 1``
+забираются пачкой и выполняются одним вызовом со списком аргументов.
+Упавшая задача откладывается с растущей паузой, а после
+``max_attempts`` попыток остаётся в таблице проваленной.
+"""
+import json
+import logging
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+TASKS = {}
+
+
+class Task:
+    def __init__(self, func, name, batch, max_attempts):
+        self.func = func
+        self.name = name
+        self.batch = batch
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, **kwargs):
+        return enqueue(self, kwargs)
+
+    def run(self, payloads):
+        if self.batch > 1:
+            self.func(payloads)
+            return
+        for payload in payloads:
+            self.func(**payload)
+
+
+def task(batch=1, max_attempts=None):
+    """Регистрирует функцию как задачу очереди.
+
+    При ``batch > 1`` функция получает список словарей аргументов
+    до ``batch`` задач сразу, иначе - аргументы одной задачи.
+    """
+    def register(func):
+        name = f'{func.__module__}.{func.__name__}'
+        TASKS[name] = Task(func, name, batch, max_attempts)
+        return TASKS[name]
+    return register
+
+
+def enqueue(task, payload, delay=0):
+    payload = json.dumps(payload, sort_keys=True)
+    if settings.JOBS_RUN_INLINE:
+        task.run([json.loads(payload)])
+        return None
+    return Job.objects.create(
+        name=task.name, payload=payload,
+        run_at=timezone.now() + timedelta(seconds=delay))
+
+
+def due(now):
+    return Job.objects.filter(failed=False, run_at__lte=now).filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+
+
+def claim():
+    """Забирает самые старые готовые задачи одного имени.
+
+    Возвращает задачу (``None``, если такой больше нет в коде) и
+    забранные строки.
+    """
+    now = timezone.now()
+    name = due(now).order_by('run_at', 'pk').values_list(
+        'name', flat=True).first()
+    if name is None:
+        return None, []
+    task = TASKS.get(name)
+    limit = task.batch if task else 1
+    ids = list(due(now).filter(name=name).order_by(
+        'run_at', 'pk').values_list('pk', flat=True)[:limit])
+    token = uuid.uuid4().hex
+    due(now).filter(pk__in=ids).update(
+        locked_by=token,
+        locked_until=now + timedelta(seconds=settings.JOBS_LOCK_TIMEOUT),
+        attempts=F('attempts') + 1)
+    return task, list(Job.objects.filter(locked_by=token))
+
+
+def fail(job, error, max_attempts):
+    """Откладывает задачу после ошибки или помечает проваленной."""
+    failed = job.attempts >= max_attempts
+    delay = settings.JOBS_RETRY_DELAY * 2 ** max(job.attempts - 1, 0)
+    Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+        failed=failed, last_error=error, locked_by='', locked_until=None,
+        run_at=timezone.now() + timedelta(seconds=delay))
+    logger.warning('Задача %s упала (попытка %s)%s:\n%s', job, job.attempts,
+                   ', больше не повторяется' if failed else '', error)
+
+
+def execute(task, jobs):
+    try:
+        with transaction.atomic():
+            task.run([json.loads(job.payload) for job in jobs])
+            Job.objects.filter(pk__in=[job.pk for job in jobs]).delete()
+    except Exception:
+        if len(jobs) > 1:
+            # Одна плохая задача не должна откладывать всю пачку.
+            for job in jobs:
+                execute(task, [job])
+            return
+        fail(jobs[0], traceback.format_exc(),
+             task.max_attempts or settings.JOBS_MAX_ATTEMPTS)
+
+
+def work_once():
+    """Выполняет одну пачку задач; возвращает её размер."""
+    task, jobs = claim()
+    if task is None:
+        for job in jobs:
+            fail(job, f'Задача {job.name} не зарегистрирована.', 0)
+    else:
+        execute(task, jobs)
+    return len(jobs)
+
+
+def run_pending():
+    """Выполняет все готовые задачи в этом процессе."""
+    done = 0
+    while True:
+        count = work_once()
+        if not count:
+            return done
+        done += count
+
+
+def work(should_stop=lambda: False):
+    """Цикл воркера: выполняет задачи, а без них ждёт
+    ``JOBS_POLL_INTERVAL`` секунд.
+    """
+    while not should_stop():
+        close_old_connections()
+        try:
+            count = work_once()
+        except Exception:
+            logger.exception('Ошибка очереди задач')
+            count = 0
+        if not count:
+            time.sleep(settings.JOBS_POLL_INTERVAL)
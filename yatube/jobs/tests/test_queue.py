@@ -0,0 +1,132 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import transaction
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import claim, run_pending, task, work_once
+from posts.models import Post
+from posts.search import filter_posts
+
+User = get_user_model()
+calls = []
+
+
+@task(batch=10)
+def collect(payloads):
+    if any(payload.get('fail') for payload in payloads):
+        raise ValueError('плохая задача')
+    calls.append(sorted(payload['value'] for payload in payloads))
+
+
+@task(max_attempts=2)
+def broken(value):
+    raise ValueError(value)
+
+
+class QueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_post_side_effects_are_queued(self):
+        '''Создание поста ставит индексацию в очередь, а не ждёт её.'''
+        user = User.objects.create_user(username='author')
+        client = Client()
+        client.force_login(user)
+        response = client.post(reverse('posts:post_create'),
+                               {'text': 'Суп харчо'})
+        self.assertRedirects(response, reverse(
+            'posts:profile', kwargs={'username': 'author'}))
+        self.assertEqual(set(Job.objects.values_list('name', flat=True)),
+                         {'posts.tasks.index_posts',
+                          'posts.tasks.fan_out_posts'})
+        self.assertFalse(filter_posts(Post.objects.all(), 'харчо').exists())
+        self.assertEqual(run_pending(), 2)
+        self.assertTrue(filter_posts(Post.objects.all(), 'харчо').exists())
+        self.assertFalse(Job.objects.exists())
+
+    def test_jobs_are_batched(self):
+        '''Задачи одного имени выполняются пачкой за один вызов.'''
+        for value in range(12):
+            collect.delay(value=value)
+        self.assertEqual(work_once(), 10)
+        self.assertEqual(work_once(), 2)
+        self.assertEqual(calls, [list(range(10)), [10, 11]])
+        self.assertEqual(work_once(), 0)
+
+    def test_failed_job_is_retried_with_backoff(self):
+        '''Упавшая задача откладывается, а после max_attempts
+        остаётся проваленной.'''
+        job = broken.delay(value='ошибка')
+        started = timezone.now()
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            work_once()
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 1)
+        self.assertFalse(job.failed)
+        self.assertIn('ошибка', job.last_error)
+        self.assertGreaterEqual(job.run_at, started + timedelta(seconds=10))
+        self.assertEqual(work_once(), 0)
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs('jobs.queue', 'WARNING') as logs:
+            work_once()
+        self.assertIn('больше не повторяется', logs.output[0])
+        job.refresh_from_db()
+        self.assertTrue(job.failed)
+        Job.objects.update(run_at=timezone.now())
+        self.assertEqual(work_once(), 0)
+
+    def test_bad_job_does_not_hold_back_batch(self):
+        '''Пачка с плохой задачей выполняется по одной.'''
+        collect.delay(value=1)
+        collect.delay(value=2, fail=True)
+        collect.delay(value=3)
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            work_once()
+        self.assertEqual(calls, [[1], [3]])
+        self.assertEqual(Job.objects.get().attempts, 1)
+
+    def test_locked_jobs_are_not_claimed_twice(self):
+        '''Забранную задачу другой воркер не возьмёт, пока не истечёт
+        блокировка.'''
+        collect.delay(value=1)
+        _, jobs = claim()
+        self.assertEqual(len(jobs), 1)
+        self.assertEqual(claim(), (None, []))
+        Job.objects.update(locked_until=timezone.now() - timedelta(1))
+        _, jobs = claim()
+        self.assertEqual(jobs[0].attempts, 2)
+
+    def test_rolled_back_job_is_not_queued(self):
+        '''Задача из откатившейся транзакции не выполняется.'''
+        try:
+            with transaction.atomic():
+                collect.delay(value=1)
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertFalse(Job.objects.exists())
+
+    @override_settings(JOBS_RUN_INLINE=True)
+    def test_inline_mode(self):
+        '''С JOBS_RUN_INLINE задача выполняется сразу.'''
+        self.assertIsNone(collect.delay(value=1))
+        self.assertEqual(calls, [[1]])
+
+    def test_run_jobs_once(self):
+        '''run_jobs --once выполняет готовые задачи, а неизвестные
+        помечает проваленными.'''
+        collect.delay(value=1)
+        Job.objects.create(name='gone.task', payload='{}',
+                           run_at=timezone.now())
+        out = StringIO()
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            call_command('run_jobs', once=True, stdout=out)
+        self.assertIn('Выполнено задач: 2', out.getvalue())
+        self.assertEqual(calls, [[1]])
+        self.assertTrue(Job.objects.get().failed)
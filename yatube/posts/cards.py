@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+CARD_TEMPLATE = 'posts/cards/{variant}.html'
+CARD_VARIANTS = ('index', 'front_page', 'group_list', 'profile')
+
+
+def card_key(post_id, version, variant):
+    """Ключ карточки: id поста, его версия и вид ленты."""
+    return f'post_card:{variant}:{post_id}:{version.timestamp()}'
+
+
+def render_cards(posts, variant):
+    """Возвращает отрисованные карточки постов страницы.
+
+    Все карточки читаются из кэша одним ``get_many``, отсутствующие
+    отрисовываются и кладутся обратно одним ``set_many``.
+    """
+    posts = list(posts)
+    keys = [card_key(post.id, post.updated, variant) for post in posts]
+    cached = cache.get_many(keys)
+    missing = {}
+    cards = []
+    for key, post in zip(keys, posts):
+        card = cached.get(key)
+        if card is None:
+            card = render_to_string(
+                CARD_TEMPLATE.format(variant=variant), {'post': post})
+            missing[key] = card
+        cards.append(mark_safe(card))
+    if missing:
+        cache.set_many(missing, settings.POST_CARD_CACHE_TIMEOUT)
+    return cards
+
+
+def invalidate_cards(versions):
+    """Удаляет из кэша карточки для пар ``(post_id, version)``."""
+    cache.delete_many([
+        card_key(post_id, version, variant)
+        for post_id, version in versions
+        for variant in CARD_VARIANTS
+    ])
@@ -0,0 +1,90 @@
+import hashlib
+
+from django.db.models import Subquery
+from django.middleware.csrf import get_token
+from django.views.decorators.http import condition
+
+from .models import AuthorStats, Group, Post, SiteStats
+
+
+def index_state(request):
+    """Состояние главной ленты.
+
+    Любое изменение поста отмечается в строке статистики его автора,
+    а изменение группы - в самой группе, поэтому хватает двух
+    максимумов по индексам, без прохода по таблице постов. Удаления
+    стирают эти строки, и максимум может не сдвинуться: их отмечает
+    строка ``SiteStats``. Всё читается одним запросом.
+    """
+    def latest(model):
+        return Subquery(model.objects.order_by('-updated').values(
+            'updated')[:1])
+
+    state = SiteStats.objects.annotate(
+        authors=latest(AuthorStats), groups=latest(Group),
+    ).values_list('updated', 'authors', 'groups').first()
+    stamps = [stamp for stamp in state or () if stamp is not None]
+    return (max(stamps) if stamps else None), None
+
+
+def group_state(request, slug):
+    return Group.objects.filter(slug=slug).values_list(
+        'updated', 'posts_count').first()
+
+
+def profile_state(request, username):
+    return AuthorStats.objects.filter(author__username=username).values_list(
+        'updated', 'posts_count').first()
+
+
+def post_state(request, post_id):
+    state = Post.objects.filter(pk=post_id).values_list(
+        'updated', 'group__updated',
+        'author__stats__updated', 'author__stats__posts_count').first()
+    if state is None:
+        return None
+    *stamps, posts_count = state
+    return max(stamp for stamp in stamps if stamp is not None), posts_count
+
+
+def page_state(request):
+    """Пара ``(время изменения, число записей)``, посчитанная
+    ``conditional_page`` для этого запроса, или ``None``.
+    """
+    return getattr(request, '_page_state', None)
+
+
+def conditional_page(get_state):
+    """Отвечает ``304 Not Modified`` до отрисовки шаблона.
+
+    ``get_state(request, **kwargs)`` возвращает пару
+    ``(время последнего изменения, число записей)`` или ``None``,
+    если валидаторы посчитать нельзя. ETag учитывает ещё адрес
+    со строкой запроса и пользователя: от него зависит шапка страницы,
+    а также CSRF-токен: после нового входа форма на странице со старым
+    токеном вернула бы 403.
+    """
+    def state(request, *args, **kwargs):
+        if not hasattr(request, '_page_state'):
+            request._page_state = get_state(request, *args, **kwargs)
+        return request._page_state
+
+    def etag(request, *args, **kwargs):
+        page_state = state(request, *args, **kwargs)
+        if page_state is None or page_state[0] is None:
+            return None
+        last_modified, count = page_state
+        # Формы с токеном видят только вошедшие: им токен выдаётся
+        # заранее, чтобы ETag совпал с тем, что окажется в странице.
+        if request.user.is_authenticated:
+            get_token(request)
+        csrf = request.META.get('CSRF_COOKIE', '')
+        raw = (f'{request.get_full_path()}:{request.user.pk}:{csrf}:'
+               f'{last_modified.timestamp()}:{count}')
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        page_state = state(request, *args, **kwargs)
+        return page_state[0] if page_state is not None else None
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
@@ -0,0 +1,170 @@
+from collections import Counter
+
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+
+def shifted(field, delta):
+    """Значение счётчика, сдвинутое на ``delta``, но не меньше нуля.
+
+    Счётчик мог отстать (загрузка через loaddata, ``update()``
+    в обход сигналов), а уйти в минус ему не даёт CHECK-ограничение
+    PositiveIntegerField: удаление упало бы с IntegrityError.
+    """
+    return Greatest(F(field) + delta, 0)
+
+
+def change_counters(author_id=None, group_id=None, delta=1):
+    """Сдвигает счётчики публикаций автора и группы на ``delta``."""
+    from .models import AuthorStats, Group, Post
+
+    now = timezone.now()
+    if author_id is not None:
+        updated = AuthorStats.objects.filter(author_id=author_id).update(
+            posts_count=shifted('posts_count', delta), updated=now)
+        if not updated and delta > 0:
+            # Строки статистики ещё нет: заводим её с точным значением.
+            AuthorStats.objects.get_or_create(
+                author_id=author_id,
+                defaults={'posts_count': Post.objects.filter(
+                    author_id=author_id).count()})
+    if group_id is not None:
+        Group.objects.filter(pk=group_id).update(
+            posts_count=shifted('posts_count', delta), updated=now)
+
+
+def change_followers(author_id, delta=1):
+    """Сдвигает счётчик подписчиков автора и возвращает новое значение
+    (``None``, если автора уже нет).
+    """
+    from .models import AuthorStats, Follow
+
+    updated = AuthorStats.objects.filter(author_id=author_id).update(
+        followers_count=shifted('followers_count', delta),
+        updated=timezone.now())
+    if not updated and delta > 0:
+        AuthorStats.objects.get_or_create(
+            author_id=author_id,
+            defaults={'followers_count': Follow.objects.filter(
+                author_id=author_id).count()})
+    return AuthorStats.objects.filter(author_id=author_id).values_list(
+        'followers_count', flat=True).first()
+
+
+def change_comments(post_id, delta=1):
+    """Сдвигает счётчик комментариев поста и его записи на главной.
+
+    Число видно в карточке поста, поэтому пост считается изменённым:
+    его карточки и страница получают новую версию.
+    """
+    from .models import FrontPageEntry, Post
+
+    now = timezone.now()
+    for model, field in ((Post, 'pk'), (FrontPageEntry, 'post_id')):
+        model.objects.filter(**{field: post_id}).update(
+            comments_count=shifted('comments_count', delta), updated=now)
+
+
+def touch_site():
+    """Отмечает изменение главной, которое не видно по строкам авторов
+    и групп: удаление поста, автора или группы.
+    """
+    from .models import SiteStats
+
+    now = timezone.now()
+    if not SiteStats.objects.filter(pk=1).update(updated=now):
+        SiteStats.objects.get_or_create(pk=1, defaults={'updated': now})
+
+
+def touch_feeds(author_ids=(), group_ids=()):
+    """Отмечает, что ленты авторов и групп изменились."""
+    from .models import AuthorStats, Group
+
+    now = timezone.now()
+    author_ids = {pk for pk in author_ids if pk is not None}
+    group_ids = {pk for pk in group_ids if pk is not None}
+    if author_ids:
+        AuthorStats.objects.filter(author_id__in=author_ids).update(
+            updated=now)
+    if group_ids:
+        Group.objects.filter(pk__in=group_ids).update(updated=now)
+
+
+def add_posts_to_counters(posts):
+    """Учитывает в счётчиках публикации, созданные в обход сигналов."""
+    for author_id, delta in Counter(
+            post.author_id for post in posts).items():
+        change_counters(author_id=author_id, delta=delta)
+    for group_id, delta in Counter(
+            post.group_id for post in posts if post.group_id).items():
+        change_counters(group_id=group_id, delta=delta)
+
+
+def author_posts_count(author):
+    """Число публикаций автора из счётчика, а без счётчика - по факту."""
+    from .models import AuthorStats
+
+    try:
+        return author.stats.posts_count
+    except AuthorStats.DoesNotExist:
+        return author.posts.count()
+
+
+def _count_posts(post_model, field):
+    return Coalesce(
+        Subquery(
+            post_model.objects.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+def recount_posts(apps=global_apps):
+    """Пересчитывает все счётчики публикаций по фактическим данным."""
+    Post = apps.get_model('posts', 'Post')
+    Group = apps.get_model('posts', 'Group')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    with transaction.atomic():
+        AuthorStats.objects.bulk_create(
+            [
+                AuthorStats(author_id=pk)
+                for pk in User.objects.filter(
+                    stats__isnull=True).values_list('pk', flat=True)
+            ]
+        )
+        authors = AuthorStats.objects.update(
+            posts_count=_count_posts(Post, 'author'))
+        groups = Group.objects.update(
+            posts_count=_count_posts(Post, 'group'))
+    return authors, groups
+
+
+def recount_comments():
+    """Пересчитывает счётчики комментариев постов и главной."""
+    from .models import Comment, FrontPageEntry, Post
+
+    comments = Coalesce(
+        Subquery(
+            Comment.objects.filter(post=OuterRef('pk'))
+            .order_by()
+            .values('post')
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+    with transaction.atomic():
+        posts = Post.objects.update(comments_count=comments)
+        FrontPageEntry.objects.update(comments_count=Subquery(
+            Post.objects.filter(pk=OuterRef('post_id')).values(
+                'comments_count')))
+    return posts
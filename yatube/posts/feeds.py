@@ -0,0 +1,124 @@
+"""Ленты Atom и RSS для читалок.
+
+Лента пишется по частям из курсора: заголовок уходит клиенту сразу,
+записи - по мере чтения из базы. Из постов выбираются только поля,
+которые попадают в ленту.
+"""
+from xml.sax.saxutils import escape, quoteattr
+
+from django.conf import settings
+from django.db import router
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.feedgenerator import (get_tag_uri, rfc2822_date,
+                                        rfc3339_date)
+from django.utils.text import Truncator
+
+from .models import Post
+
+CONTENT_TYPES = {
+    'atom': 'application/atom+xml; charset=utf-8',
+    'rss': 'application/rss+xml; charset=utf-8',
+}
+FEED_FIELDS = ('text', 'pub_date', 'updated', 'author__username',
+               'author__first_name', 'author__last_name', 'group__title')
+
+
+def feed_posts(posts):
+    """Последние ``FEED_SIZE`` постов ленты с полями для записей.
+
+    Курсор читается уже после выхода из представления, поэтому база
+    выбирается сразу: иначе лента с реплики дочитывалась бы с основной.
+    """
+    return posts.select_related('author', 'group').only(
+        *FEED_FIELDS).using(router.db_for_read(Post))[:settings.FEED_SIZE]
+
+
+def entry_title(post):
+    return Truncator(post.text).words(settings.FEED_TITLE_WORDS)
+
+
+def author_name(post):
+    return post.author.get_full_name() or post.author.username
+
+
+def tag(name, value, **attrs):
+    attributes = ''.join(f' {key}={quoteattr(str(attr))}'
+                         for key, attr in attrs.items())
+    return f'<{name}{attributes}>{escape(str(value))}</{name}>'
+
+
+def atom_feed(request, feed, posts):
+    yield ('<?xml version="1.0" encoding="utf-8"?>\n'
+           '<feed xmlns="http://www.w3.org/2005/Atom" xml:lang="ru">')
+    yield (tag('title', feed['title'])
+           + tag('subtitle', feed['description'])
+           + f'<link href={quoteattr(feed["link"])} rel="alternate"/>'
+           + f'<link href={quoteattr(feed["self"])} rel="self"/>'
+           + tag('id', feed['link'])
+           + tag('updated', rfc3339_date(feed['updated'])))
+    for post in posts.iterator():
+        link = request.build_absolute_uri(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}))
+        category = (f'<category term={quoteattr(post.group.title)}/>'
+                    if post.group_id else '')
+        yield ('<entry>'
+               + tag('title', entry_title(post))
+               + f'<link href={quoteattr(link)} rel="alternate"/>'
+               + tag('id', get_tag_uri(link, post.pub_date))
+               + tag('published', rfc3339_date(post.pub_date))
+               + tag('updated', rfc3339_date(post.updated))
+               + f'<author>{tag("name", author_name(post))}</author>'
+               + category
+               + tag('content', post.text, type='text')
+               + '</entry>')
+    yield '</feed>\n'
+
+
+def rss_feed(request, feed, posts):
+    yield ('<?xml version="1.0" encoding="utf-8"?>\n'
+           '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom" '
+           'xmlns:dc="http://purl.org/dc/elements/1.1/"><channel>')
+    yield (tag('title', feed['title'])
+           + tag('link', feed['link'])
+           + tag('description', feed['description'])
+           + f'<atom:link href={quoteattr(feed["self"])} rel="self"/>'
+           + tag('language', 'ru')
+           + tag('lastBuildDate', rfc2822_date(feed['updated'])))
+    for post in posts.iterator():
+        link = request.build_absolute_uri(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}))
+        category = tag('category', post.group.title) if post.group_id else ''
+        yield ('<item>'
+               + tag('title', entry_title(post))
+               + tag('link', link)
+               + tag('description', post.text)
+               + tag('pubDate', rfc2822_date(post.pub_date))
+               + tag('guid', link, isPermaLink='true')
+               + tag('dc:creator', author_name(post))
+               + category
+               + '</item>')
+    yield '</channel></rss>\n'
+
+
+WRITERS = {'atom': atom_feed, 'rss': rss_feed}
+
+
+def feed_response(request, fmt, title, description, link, posts,
+                  updated=None):
+    """Потоковый ответ с лентой ``fmt`` (``atom`` или ``rss``).
+
+    ``updated`` - время последнего изменения ленты, обычно из
+    состояния страницы для условных запросов.
+    """
+    feed = {
+        'title': title,
+        'description': description,
+        'link': request.build_absolute_uri(link),
+        'self': request.build_absolute_uri(request.path),
+        'updated': updated or timezone.now(),
+    }
+    return StreamingHttpResponse(
+        WRITERS[fmt](request, feed, feed_posts(posts)),
+        content_type=CONTENT_TYPES[fmt])
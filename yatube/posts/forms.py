@@ -1,7 +1,7 @@
 from django import forms
 from django.utils.translation import gettext_lazy as ht
 
-from .models import Post
+from .models import Comment, Post
 
 
 class PostForm(forms.ModelForm):
@@ -15,3 +15,20 @@ class PostForm(forms.ModelForm):
             'text': ht('Текст новой публикации'),
             'group': ht('Группа, к которой будет относиться публикация')
         }
+
+
+class PostImageForm(forms.ModelForm):
+    """Картинка поста отдельной формой рядом с ``PostForm``."""
+
+    class Meta:
+        model = Post
+        fields = ('image',)
+
+
+class CommentForm(forms.ModelForm):
+    class Meta:
+        model = Comment
+        fields = ('text',)
+        labels = {
+            'text': ht('Текст комментария'),
+        }
@@ -0,0 +1,128 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils.text import Truncator
+
+from .paginators import KeysetPaginator
+
+FRONT_PAGE_KEYS = ('pub_date', 'post_id')
+
+
+def author_name(user):
+    return user.get_full_name()
+
+
+def author_names(post):
+    """Имя пользователя и полное имя автора поста.
+
+    Если автор не загружен вместе с постом, имена берутся из кэша
+    ``lookups`` без запроса целого пользователя.
+    """
+    if post._meta.get_field('author').is_cached(post):
+        return post.author.username, author_name(post.author)
+    from .lookups import display_name
+
+    return display_name(post.author_id)
+
+
+def entry_fields(post):
+    """Денормализованные поля записи главной для поста."""
+    group = post.group
+    username, full_name = author_names(post)
+    return {
+        'pub_date': post.pub_date,
+        'updated': post.updated,
+        'author_id': post.author_id,
+        'author_username': username,
+        'author_name': full_name,
+        'group_id': post.group_id,
+        'group_slug': group.slug if group else '',
+        'group_title': group.title if group else '',
+        'excerpt': Truncator(post.text).chars(
+            settings.FRONT_PAGE_EXCERPT_LENGTH),
+        'truncated': len(post.text) > settings.FRONT_PAGE_EXCERPT_LENGTH,
+        'image': post.image.name or '',
+        'thumbnails': post.thumbnails,
+        'comments_count': post.comments_count,
+    }
+
+
+def _add_entries(entry_model, posts):
+    entry_model.objects.bulk_create(
+        [entry_model(post_id=post.pk, **entry_fields(post))
+         for post in posts])
+
+
+def rebuild_front_page():
+    """Заполняет главную заново самыми новыми постами."""
+    from .models import FrontPageEntry, Post
+
+    posts = Post.objects.select_related('author', 'group').order_by(
+        '-pub_date', '-id')[:settings.FRONT_PAGE_SIZE]
+    with transaction.atomic():
+        FrontPageEntry.objects.all().delete()
+        _add_entries(FrontPageEntry, posts)
+    return len(posts)
+
+
+def _oldest_entry():
+    from .models import FrontPageEntry
+
+    return FrontPageEntry.objects.order_by(*FRONT_PAGE_KEYS).only(
+        *FRONT_PAGE_KEYS).first()
+
+
+def save_to_front_page(post):
+    """Обновляет запись поста, а новый пост ставит на главную,
+    вытесняя самую старую запись.
+    """
+    from .models import FrontPageEntry
+
+    if FrontPageEntry.objects.filter(post_id=post.pk).update(
+            **entry_fields(post)):
+        return
+    oldest = _oldest_entry()
+    full = (oldest is not None and FrontPageEntry.objects.count()
+            >= settings.FRONT_PAGE_SIZE)
+    if full and (post.pub_date, post.pk) < (oldest.pub_date, oldest.post_id):
+        return
+    with transaction.atomic():
+        _add_entries(FrontPageEntry, [post])
+        if full:
+            oldest.delete()
+
+
+def fill_front_page():
+    """Добирает на главную посты после удаления записей."""
+    from .models import FrontPageEntry, Post
+
+    missing = settings.FRONT_PAGE_SIZE - FrontPageEntry.objects.count()
+    if missing <= 0:
+        return
+    posts = Post.objects.select_related('author', 'group').order_by(
+        '-pub_date', '-id')
+    oldest = _oldest_entry()
+    if oldest is not None:
+        posts = posts.filter(
+            Q(pub_date__lt=oldest.pub_date)
+            | Q(pub_date=oldest.pub_date, id__lt=oldest.post_id))
+    _add_entries(FrontPageEntry, posts[:missing])
+
+
+def front_page(request):
+    """Страница главной из готовых записей или None, если её там нет.
+
+    Записи кончаются на ``FRONT_PAGE_SIZE`` постах: страницу у этой
+    границы и старые ссылки с ``?page=`` отдаёт обычная лента.
+    """
+    from .models import FrontPageEntry
+
+    if 'page' in request.GET:
+        return None
+    paginator = KeysetPaginator(FrontPageEntry.objects.all(),
+                                settings.POSTS_IN_PAGE, FRONT_PAGE_KEYS)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    if len(page_obj) < settings.POSTS_IN_PAGE or not page_obj.has_next():
+        return None
+    page_obj.object_list = [entry.as_post() for entry in page_obj]
+    return page_obj
@@ -0,0 +1,47 @@
+"""Картинки постов и их миниатюры.
+
+Оригинал сохраняется под именем из хэша содержимого, миниатюры всех
+размеров ``POST_IMAGE_SIZES`` готовит очередь задач сразу после
+загрузки (``posts.tasks.make_thumbnails``). Их имена и размеры пишутся
+в пост, поэтому карточки лент строят ``<img>`` по готовым данным и при
+отрисовке не открывают и не проверяют файлы.
+"""
+import hashlib
+import json
+import os
+
+from django.conf import settings
+
+
+def post_image_path(instance, filename):
+    """Имя оригинала - хэш его содержимого: новый файл получает новый
+    адрес, и старый можно кэшировать без проверок.
+    """
+    digest = hashlib.sha256()
+    for chunk in instance.image.chunks():
+        digest.update(chunk)
+    extension = os.path.splitext(filename)[1].lower()
+    return f'posts/{digest.hexdigest()[:32]}{extension}'
+
+
+def make_thumbnails(image):
+    """Создаёт миниатюры картинки; возвращает их описание в JSON."""
+    from sorl.thumbnail import get_thumbnail
+
+    thumbnails = {}
+    for size, (geometry, options) in settings.POST_IMAGE_SIZES.items():
+        thumbnail = get_thumbnail(image, geometry, **options)
+        thumbnails[size] = [thumbnail.name, thumbnail.width, thumbnail.height]
+    return json.dumps(thumbnails)
+
+
+def thumbnail_map(thumbnails):
+    """Адреса и размеры миниатюр из описания - без обращения к файлам."""
+    from sorl.thumbnail import default
+
+    return {
+        size: {'url': default.storage.url(name),
+               'width': width, 'height': height}
+        for size, (name, width, height) in json.loads(
+            thumbnails or '{}').items()
+    }
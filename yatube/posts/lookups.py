@@ -0,0 +1,156 @@
+"""Кэш групп по slug и авторов по имени пользователя.
+
+Группы и пользователи меняются редко, а ищутся на каждом открытии
+ленты группы и профиля. Найденные объекты живут в LRU-кэше процесса
+``LOOKUP_CACHE_TTL`` секунд; если задан ``LOOKUP_CACHE_ALIAS``, промах
+сначала ищется в общем кэше и только потом в базе. Сигналы моделей
+сбрасывают записи в этом процессе и в общем кэше; в других процессах
+изменение станет видно не позже чем через TTL.
+
+Прочитанное внутри транзакции не кэшируется: её могут откатить,
+а сигналы об откате не сообщают. Не кэшируется и «не найдено»: только
+что созданная группа или пользователь не должны отвечать 404 до
+истечения TTL. Объекты всегда читаются с основной базы: отстающая
+реплика не должна попасть в общий для всех запросов кэш.
+
+У пользователя кэшируются только имя и полное имя - хэш пароля и
+прочие поля в общий кэш не попадают.
+
+Счётчики публикаций в кэшируемых объектах могут отставать: ленты
+берут их из состояния страницы (см. ``conditional.page_state``).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .models import Group
+
+User = get_user_model()
+MISSING = object()
+
+
+class LookupCache:
+    """LRU-кэш с временем жизни записей и счётчиками попаданий."""
+
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def shared_key(self, key):
+        return f'lookup:{self.name}:{key}'
+
+    def shared_cache(self):
+        alias = settings.LOOKUP_CACHE_ALIAS
+        return caches[alias] if alias else None
+
+    def get(self, key):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        shared = self.shared_cache()
+        value = MISSING
+        if shared is not None:
+            value = shared.get(self.shared_key(key), MISSING)
+        if value is MISSING:
+            value = self.loader(key)
+            if (value is None
+                    or transaction.get_connection().in_atomic_block):
+                return value
+            if shared is not None:
+                shared.set(self.shared_key(key), value,
+                           settings.LOOKUP_CACHE_TTL)
+        with self.lock:
+            self.entries[key] = (now + settings.LOOKUP_CACHE_TTL, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > settings.LOOKUP_CACHE_SIZE:
+                self.entries.popitem(last=False)
+        return value
+
+    def invalidate(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+        shared = self.shared_cache()
+        if shared is not None:
+            shared.delete_many([self.shared_key(key) for key in keys])
+
+    def invalidate_object(self, key, pk):
+        """Сбрасывает запись по ключу и все записи объекта с этим pk:
+        так уходит и запись под старым slug или именем.
+        """
+        with self.lock:
+            keys = {key} | {
+                cached_key for cached_key, (_, value) in self.entries.items()
+                if getattr(value, 'pk', None) == pk
+            }
+        self.invalidate(*keys)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self.lock:
+            return {'size': len(self.entries),
+                    'hits': self.hits,
+                    'misses': self.misses}
+
+
+def _load_group(slug):
+    return Group.objects.using(DEFAULT_DB_ALIAS).filter(slug=slug).first()
+
+
+def _load_user(username):
+    return User.objects.using(DEFAULT_DB_ALIAS).filter(
+        username=username).only('username', 'first_name', 'last_name').first()
+
+
+def _load_display_name(user_id):
+    user = User.objects.using(DEFAULT_DB_ALIAS).filter(pk=user_id).only(
+        'username', 'first_name', 'last_name').first()
+    return (user.username, user.get_full_name()) if user else None
+
+
+groups = LookupCache('group', _load_group)
+users = LookupCache('user', _load_user)
+display_names = LookupCache('display_name', _load_display_name)
+CACHES = (groups, users, display_names)
+
+
+def group_by_slug(slug):
+    """Группа по slug или None."""
+    return groups.get(slug)
+
+
+def user_by_username(username):
+    """Пользователь по имени или None."""
+    return users.get(username)
+
+
+def display_name(user_id):
+    """Пара (имя пользователя, полное имя) автора или None."""
+    return display_names.get(user_id)
+
+
+def lookup_stats():
+    return {cache.name: cache.stats() for cache in CACHES}
+
+
+def clear_lookups():
+    for cache in CACHES:
+        cache.clear()
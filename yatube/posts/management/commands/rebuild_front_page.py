@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts.front_page import rebuild_front_page
+
+
+class Command(BaseCommand):
+    help = 'Заново заполняет готовые посты главной страницы.'
+
+    def handle(self, *args, **options):
+        added = rebuild_front_page()
+        self.stdout.write(self.style.SUCCESS(
+            f'Постов на главной: {added}'))
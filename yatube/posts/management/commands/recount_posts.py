@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import recount_comments, recount_posts
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики публикаций авторов и групп '
+            'и комментариев постов.')
+
+    def handle(self, *args, **options):
+        authors, groups = recount_posts()
+        posts = recount_comments()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано авторов: {authors}, групп: {groups}, '
+            f'постов: {posts}'))
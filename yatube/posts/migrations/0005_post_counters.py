@@ -0,0 +1,66 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:04
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def count_posts(post_model, field):
+    return Coalesce(
+        Subquery(
+            post_model.objects.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+def fill_counters(apps, schema_editor):
+    # Копия posts.counters.recount_posts на момент миграции: миграция
+    # не должна меняться вместе с кодом приложения.
+    Post = apps.get_model('posts', 'Post')
+    Group = apps.get_model('posts', 'Group')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    AuthorStats.objects.bulk_create(
+        [
+            AuthorStats(author_id=pk)
+            for pk in User.objects.filter(
+                stats__isnull=True).values_list('pk', flat=True)
+        ]
+    )
+    AuthorStats.objects.update(posts_count=count_posts(Post, 'author'))
+    Group.objects.update(posts_count=count_posts(Post, 'group'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0004_post_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Число публикаций')),
+            ],
+            options={
+                'verbose_name': 'Статистика автора',
+                'verbose_name_plural': 'Статистика авторов',
+            },
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число публикаций'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:23
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils.text import Truncator
+import django.db.models.deletion
+
+# Копия posts.front_page.rebuild_front_page и настроек на момент
+# миграции: миграция не должна меняться вместе с кодом приложения.
+FRONT_PAGE_SIZE = 100
+EXCERPT_LENGTH = 1000
+
+
+def fill_front_page(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    FrontPageEntry = apps.get_model('posts', 'FrontPageEntry')
+    posts = Post.objects.select_related('author', 'group').order_by(
+        '-pub_date', '-id')[:FRONT_PAGE_SIZE]
+    FrontPageEntry.objects.bulk_create([
+        FrontPageEntry(
+            post_id=post.pk,
+            pub_date=post.pub_date,
+            updated=post.updated,
+            author_id=post.author_id,
+            author_username=post.author.username,
+            author_name=f'{post.author.first_name} '
+                        f'{post.author.last_name}'.strip(),
+            group_id=post.group_id,
+            group_slug=post.group.slug if post.group else '',
+            group_title=post.group.title if post.group else '',
+            excerpt=Truncator(post.text).chars(EXCERPT_LENGTH),
+            truncated=len(post.text) > EXCERPT_LENGTH,
+        )
+        for post in posts
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0008_post_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FrontPageEntry',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='front_page_entry', serialize=False, to='posts.Post', verbose_name='Публикация')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('updated', models.DateTimeField(verbose_name='Дата изменения')),
+                ('author_username', models.CharField(max_length=150, verbose_name='Логин автора')),
+                ('author_name', models.CharField(blank=True, max_length=300, verbose_name='Имя автора')),
+                ('group_slug', models.SlugField(blank=True, max_length=255, verbose_name='URL группы')),
+                ('group_title', models.CharField(blank=True, max_length=200, verbose_name='Название группы')),
+                ('excerpt', models.TextField(verbose_name='Начало текста')),
+                ('truncated', models.BooleanField(default=False, verbose_name='Текст обрезан')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='posts.Group', verbose_name='Группа')),
+            ],
+            options={
+                'ordering': ['-pub_date', '-post'],
+                'verbose_name': 'Пост главной страницы',
+                'verbose_name_plural': 'Посты главной страницы',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='frontpageentry',
+            index=models.Index(fields=['-pub_date', '-post'], name='front_page_pub_date_idx'),
+        ),
+        migrations.RunPython(fill_front_page, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:06
+
+import core.storage
+from django.db import migrations, models
+import posts.images
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_follow_timeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='frontpageentry',
+            name='image',
+            field=models.CharField(blank=True, max_length=100, verbose_name='Картинка'),
+        ),
+        migrations.AddField(
+            model_name='frontpageentry',
+            name='thumbnails',
+            field=models.TextField(blank=True, verbose_name='Миниатюры'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, storage=core.storage.ContentHashedStorage(), upload_to=posts.images.post_image_path, verbose_name='Картинка'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='thumbnails',
+            field=models.TextField(blank=True, editable=False, verbose_name='Миниатюры'),
+        ),
+    ]
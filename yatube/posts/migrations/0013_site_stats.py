@@ -0,0 +1,29 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:37
+
+from django.db import migrations, models
+
+
+def create_row(apps, schema_editor):
+    apps.get_model('posts', 'SiteStats').objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_comments'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Дата изменения ленты')),
+            ],
+            options={
+                'verbose_name': 'Статистика сайта',
+                'verbose_name_plural': 'Статистика сайта',
+            },
+        ),
+        migrations.RunPython(create_row, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,17 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.dispatch import Signal
+
+from core.storage import ContentHashedStorage
+
+from .images import post_image_path, thumbnail_map
 
 User = get_user_model()
 
+# bulk_create не посылает post_save, поэтому о пакетной вставке
+# публикаций сообщаем отдельным сигналом.
+posts_bulk_created = Signal(providing_args=['posts'])
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200, verbose_name='Название группы')
@@ -13,6 +22,12 @@ class Group(models.Model):
     description = models.TextField(null=True,
                                    blank=True,
                                    verbose_name='Описание')
+    posts_count = models.PositiveIntegerField(default=0,
+                                              editable=False,
+                                              verbose_name='Число публикаций')
+    updated = models.DateTimeField(auto_now=True,
+                                   db_index=True,
+                                   verbose_name='Дата изменения ленты')
 
     class Meta:
         verbose_name = 'Группа публикации'
@@ -22,10 +37,19 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        posts_bulk_created.send(sender=self.model, posts=objs)
+        return objs
+
+
 class Post(models.Model):
     text = models.TextField(verbose_name='Текст публикации')
     pub_date = models.DateTimeField(auto_now_add=True,
                                     verbose_name='Дата публикации')
+    updated = models.DateTimeField(auto_now=True,
+                                   verbose_name='Дата изменения')
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -40,11 +64,267 @@ class Post(models.Model):
         related_name='posts',
         verbose_name='Группа'
     )
+    image = models.ImageField(upload_to=post_image_path,
+                              storage=ContentHashedStorage(),
+                              blank=True,
+                              verbose_name='Картинка')
+    # Имена и размеры готовых миниатюр (см. posts.images).
+    thumbnails = models.TextField(blank=True,
+                                  editable=False,
+                                  verbose_name='Миниатюры')
+    comments_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Число комментариев')
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
+        # Индексы повторяют фильтр и сортировку каждой ленты,
+        # чтобы LIMIT применялся без сортировки всей выборки.
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+        ]
         verbose_name = 'Публикация'
         verbose_name_plural = 'Публикации'
 
     def __str__(self):
         return self.text[:15]
+
+    @property
+    def thumbnail_map(self):
+        return thumbnail_map(self.thumbnails)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем загруженные значения, чтобы при сохранении знать,
+        # из какой группы и от какого автора ушла публикация.
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+
+class AuthorStats(models.Model):
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Автор'
+    )
+    posts_count = models.PositiveIntegerField(default=0,
+                                              verbose_name='Число публикаций')
+    followers_count = models.PositiveIntegerField(
+        default=0, verbose_name='Число подписчиков')
+    updated = models.DateTimeField(auto_now=True,
+                                   db_index=True,
+                                   verbose_name='Дата изменения ленты')
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        return f'{self.author}: {self.posts_count}'
+
+
+class SiteStats(models.Model):
+    """Единственная строка с временем изменения главной, которое не
+    видно по строкам авторов и групп: при удалении они исчезают, и их
+    максимум может не сдвинуться.
+    """
+    updated = models.DateTimeField(auto_now=True,
+                                   verbose_name='Дата изменения ленты')
+
+    class Meta:
+        verbose_name = 'Статистика сайта'
+        verbose_name_plural = 'Статистика сайта'
+
+    def __str__(self):
+        return str(self.updated)
+
+
+class FrontPageEntry(models.Model):
+    """Готовая карточка поста для первых страниц главной.
+
+    Хранит только самые новые публикации вместе с именем автора и
+    группой, чтобы страница читалась одним запросом без JOIN.
+    """
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='front_page_entry',
+        verbose_name='Публикация'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+    updated = models.DateTimeField(verbose_name='Дата изменения')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    author_username = models.CharField(max_length=150,
+                                       verbose_name='Логин автора')
+    author_name = models.CharField(max_length=300,
+                                   blank=True,
+                                   verbose_name='Имя автора')
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        verbose_name='Группа'
+    )
+    group_slug = models.SlugField(max_length=255,
+                                  blank=True,
+                                  verbose_name='URL группы')
+    group_title = models.CharField(max_length=200,
+                                   blank=True,
+                                   verbose_name='Название группы')
+    excerpt = models.TextField(verbose_name='Начало текста')
+    truncated = models.BooleanField(default=False,
+                                    verbose_name='Текст обрезан')
+    image = models.CharField(max_length=100,
+                             blank=True,
+                             verbose_name='Картинка')
+    thumbnails = models.TextField(blank=True, verbose_name='Миниатюры')
+    comments_count = models.PositiveIntegerField(
+        default=0, verbose_name='Число комментариев')
+
+    class Meta:
+        ordering = ['-pub_date', '-post']
+        indexes = [
+            models.Index(fields=['-pub_date', '-post'],
+                         name='front_page_pub_date_idx'),
+        ]
+        verbose_name = 'Пост главной страницы'
+        verbose_name_plural = 'Посты главной страницы'
+
+    def __str__(self):
+        return self.excerpt[:15]
+
+    def as_post(self):
+        """Публикация, собранная из записи без обращения к базе."""
+        post = Post(id=self.post_id, text=self.excerpt,
+                    pub_date=self.pub_date, updated=self.updated,
+                    author_id=self.author_id, group_id=self.group_id,
+                    image=self.image, thumbnails=self.thumbnails,
+                    comments_count=self.comments_count)
+        post.author = User(id=self.author_id, username=self.author_username)
+        if self.group_id is not None:
+            post.group = Group(id=self.group_id, slug=self.group_slug,
+                               title=self.group_title)
+        post.author_name = self.author_name
+        post.truncated = self.truncated
+        return post
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower',
+        verbose_name='Подписчик'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following',
+        verbose_name='Автор'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='unique_follow'),
+            models.CheckConstraint(check=~models.Q(user=models.F('author')),
+                                   name='no_self_follow'),
+        ]
+        verbose_name = 'Подписка'
+        verbose_name_plural = 'Подписки'
+
+    def __str__(self):
+        return f'{self.user} -> {self.author}'
+
+
+class TimelineEntry(models.Model):
+    """Пост в ленте подписок читателя (fan-out on write).
+
+    Строки раскладываются при публикации поста всем подписчикам
+    автора, и лента читается одним проходом по индексу
+    ``(owner, pub_date, post)``. Посты авторов с очень большим числом
+    подписчиков сюда не пишутся, а читаются вместе с лентой (см.
+    ``posts.timeline``).
+    """
+    owner = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Публикация'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'post'],
+                                    name='unique_timeline_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['owner', '-pub_date', '-post'],
+                         name='timeline_owner_pub_date_idx'),
+        ]
+        verbose_name = 'Пост ленты подписок'
+        verbose_name_plural = 'Посты лент подписок'
+
+    def __str__(self):
+        return f'{self.owner}: {self.post_id}'
+
+
+class Comment(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name='Публикация'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name='Автор'
+    )
+    text = models.TextField(verbose_name='Текст комментария')
+    created = models.DateTimeField(auto_now_add=True,
+                                   verbose_name='Дата комментария')
+
+    class Meta:
+        ordering = ['-created', '-id']
+        # Страница обсуждения - проход по индексу одного поста.
+        indexes = [
+            models.Index(fields=['post', '-created', '-id'],
+                         name='comment_post_created_idx'),
+        ]
+        verbose_name = 'Комментарий'
+        verbose_name_plural = 'Комментарии'
+
+    def __str__(self):
+        return self.text[:15]
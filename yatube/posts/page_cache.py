@@ -0,0 +1,118 @@
+import hashlib
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.http import urlencode
+
+from core.middleware import accepted_encoding, compress, encode_response
+from core.routers import using_replicas
+
+# Области кэша страниц. Новый пост сдвигает только первую страницу
+# главной (и старые ссылки с ?page=), а страницы по курсору остаются
+# верными, поэтому у главной две области.
+ALL_PAGES = 'all'
+INDEX_HEAD = 'index-head'
+INDEX_PAGES = 'index'
+# Заголовки, которые сохраняются вместе со страницей: по валидаторам
+# ConditionalGetMiddleware отвечает 304 и на страницы из кэша.
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+def group_scope(slug):
+    return f'group:{slug}'
+
+
+def profile_scope(username):
+    return f'profile:{username}'
+
+
+def index_scope(request):
+    return INDEX_PAGES if 'cursor' in request.GET else INDEX_HEAD
+
+
+def _page_cache():
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+
+def _generations(scopes):
+    """Текущие поколения областей; недостающие заводятся заново."""
+    page_cache = _page_cache()
+    keys = [f'page_gen:{scope}' for scope in scopes]
+    generations = page_cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            page_cache.add(key, uuid.uuid4().hex, None)
+            generations[key] = page_cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def invalidate_pages(*scopes):
+    """Сбрасывает все закэшированные страницы указанных областей.
+
+    Вместо перебора ключей меняем поколение области: старые записи
+    больше не находятся и вытесняются кэшем по таймауту.
+    """
+    _page_cache().set_many(
+        {f'page_gen:{scope}': uuid.uuid4().hex for scope in set(scopes)},
+        None)
+
+
+def page_key(request, scope):
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    url = hashlib.md5(f'{request.path}?{query}'.encode()).hexdigest()
+    generations = ':'.join(_generations((ALL_PAGES, scope)))
+    return f'page:{url}:{generations}'
+
+
+def cache_anonymous_page(get_scope):
+    """Кэширует страницу целиком для анонимных GET-запросов.
+
+    ``get_scope(request, **kwargs)`` возвращает область, по которой
+    сигналы моделей сбрасывают страницу.
+
+    Рядом со страницей хранится её сжатая копия для каждого способа
+    сжатия, который принимают клиенты: попадание в кэш не тратит
+    процессор на повторное сжатие (см. ``CompressionMiddleware``).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (request.method not in ('GET', 'HEAD')
+                    or request.user.is_authenticated):
+                return view(request, *args, **kwargs)
+            page_cache = _page_cache()
+            key = page_key(request, get_scope(request, *args, **kwargs))
+            encoding = accepted_encoding(request)
+            encoded_key = f'{key}:{encoding}'
+            cached = page_cache.get_many([key, encoded_key])
+            if key in cached:
+                content, headers, timeout = cached[key]
+                response = HttpResponse(content)
+                for header, value in headers.items():
+                    response[header] = value
+            else:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200 or response.streaming:
+                    return response
+                headers = {header: response[header]
+                           for header in CACHED_HEADERS if header in response}
+                # Страница с реплики могла не застать последние записи:
+                # храним её не дольше допустимого отставания реплики.
+                timeout = (settings.REPLICA_PAGE_CACHE_TIMEOUT
+                           if using_replicas()
+                           else settings.PAGE_CACHE_TIMEOUT)
+                page_cache.set(key, (response.content, headers, timeout),
+                               timeout)
+            if (encoding is None or len(response.content)
+                    < settings.COMPRESS_MIN_SIZE):
+                return response
+            compressed = cached.get(encoded_key)
+            if compressed is None:
+                compressed = compress(response.content, encoding)
+                page_cache.set(encoded_key, compressed, timeout)
+            return encode_response(response, encoding, compressed)
+        return wrapper
+    return decorator
@@ -0,0 +1,145 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def encode_cursor(direction, values):
+    """Упаковывает направление и значения ключа в непрозрачный токен."""
+    raw = json.dumps([direction, [str(value) for value in values]])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """Распаковывает токен; для битого токена возвращает None."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        direction, values = json.loads(raw.decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        return None
+    if direction not in (NEXT, PREVIOUS) or not isinstance(values, list):
+        return None
+    if len(values) != size:
+        return None
+    return direction, values
+
+
+class KeysetPage(Page):
+    """Страница, которая знает только соседние курсоры, а не своё число."""
+    is_keyset = True
+
+    def __init__(self, object_list, paginator,
+                 next_cursor=None, previous_cursor=None):
+        super().__init__(object_list, None, paginator)
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<KeysetPage>'
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class KeysetPaginator(Paginator):
+    """Паджинатор по ключу (seek pagination).
+
+    Записи упорядочены по убыванию ``keys``; каждая страница выбирается
+    одним запросом ``WHERE key < cursor ORDER BY key DESC LIMIT n + 1``
+    без ``COUNT(*)`` и ``OFFSET``, поэтому её цена не зависит от глубины.
+    """
+
+    def __init__(self, object_list, per_page, keys=('pub_date', 'id')):
+        super().__init__(object_list, per_page)
+        self.keys = tuple(keys)
+
+    def _seek_filter(self, values, direction):
+        op = 'lt' if direction == NEXT else 'gt'
+        first_key, first_value = self.keys[0], values[0]
+        tail = Q(**{f'{first_key}__{op}': first_value})
+        for i in range(1, len(self.keys)):
+            equal = {key: value
+                     for key, value in zip(self.keys[:i], values[:i])}
+            tail |= Q(**equal, **{f'{self.keys[i]}__{op}': values[i]})
+        # Отдельное условие по первому ключу позволяет СУБД сузить
+        # диапазон индекса ещё до проверки составного условия.
+        return Q(**{f'{first_key}__{op}e': first_value}) & tail
+
+    def _cursor(self, direction, item):
+        # Записи - объекты моделей или словари из values().
+        if isinstance(item, dict):
+            values = [item[key] for key in self.keys]
+        else:
+            values = [getattr(item, key) for key in self.keys]
+        return encode_cursor(direction, values)
+
+    def _fetch(self, queryset, values, direction):
+        """До ``per_page + 1`` записей за курсором в порядке выборки."""
+        ordering = [f'-{key}' for key in self.keys]
+        if values is not None:
+            queryset = queryset.filter(self._seek_filter(values, direction))
+        if direction == PREVIOUS:
+            ordering = [key[1:] for key in ordering]
+        return list(queryset.order_by(*ordering)[:self.per_page + 1])
+
+    def fetch(self, values, direction):
+        return self._fetch(self.object_list, values, direction)
+
+    def get_page(self, cursor=None):
+        decoded = decode_cursor(cursor, len(self.keys))
+        direction, values = decoded or (NEXT, None)
+        try:
+            items = self.fetch(values, direction)
+        except (ValidationError, ValueError):
+            direction, values = NEXT, None
+            items = self.fetch(values, direction)
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if direction == PREVIOUS:
+            items.reverse()
+        # Лишняя (n + 1)-я запись говорит, что дальше в направлении
+        # выборки есть ещё страница; а раз мы пришли по курсору,
+        # то страница есть и с противоположной стороны.
+        has_next = has_more if direction == NEXT else values is not None
+        has_previous = has_more if direction == PREVIOUS else (
+            values is not None)
+        next_cursor = previous_cursor = None
+        if items and has_next:
+            next_cursor = self._cursor(NEXT, items[-1])
+        if items and has_previous:
+            previous_cursor = self._cursor(PREVIOUS, items[0])
+        return KeysetPage(items, self, next_cursor, previous_cursor)
+
+
+class MergedKeysetPaginator(KeysetPaginator):
+    """Паджинатор по ключу для ленты из нескольких выборок.
+
+    ``object_list`` - список querysets с общими ключами ``keys``.
+    Каждая выборка читает свою страницу за курсором, страницы
+    сливаются по ключу, повторы одной записи отбрасываются.
+    """
+
+    def fetch(self, values, direction):
+        items = []
+        for queryset in self.object_list:
+            items += self._fetch(queryset, values, direction)
+        items.sort(key=lambda item: [getattr(item, key) for key in self.keys],
+                   reverse=direction == NEXT)
+        seen = set()
+        unique = []
+        for item in items:
+            if item.pk not in seen:
+                seen.add(item.pk)
+                unique.append(item)
+        return unique[:self.per_page + 1]
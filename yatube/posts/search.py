@@ -0,0 +1,135 @@
+import re
+
+from django.db import connection, transaction
+
+FTS_TABLE = 'posts_post_fts'
+FTS_CREATE = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} '
+    "USING fts5(text, tokenize='unicode61 remove_diacritics 2', "
+    "prefix='2 3')"
+)
+TERM_RE = re.compile(r'\w+')
+
+
+def fts_available(using=connection):
+    """Полнотекстовый индекс есть только у SQLite (FTS5)."""
+    return using.vendor == 'sqlite'
+
+
+def match_expression(query):
+    """Строит выражение MATCH: все слова запроса, каждое в кавычках,
+    чтобы пользовательский ввод не разбирался как синтаксис FTS5.
+    Слова ищутся по префиксу: так «борщ» находит и «борща».
+    """
+    return ' '.join(f'"{term}"*' for term in TERM_RE.findall(query))
+
+
+def index_posts(posts):
+    """Добавляет или обновляет посты в поисковом индексе."""
+    if not fts_available():
+        return
+    rows = [(post.pk, post.text) for post in posts]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+            [(pk,) for pk, _ in rows])
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE}(rowid, text) VALUES (%s, %s)', rows)
+
+
+def index_new_posts():
+    """Индексирует посты новее последнего проиндексированного.
+
+    Нужна после bulk_create: на SQLite он не возвращает id, но id
+    постов растут монотонно (AUTOINCREMENT), так что хватает диапазона.
+    """
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE}(rowid, text) SELECT id, text '
+            f'FROM posts_post WHERE id > '
+            f'(SELECT coalesce(max(rowid), 0) FROM {FTS_TABLE})')
+
+
+def unindex_posts(ids):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+            [(pk,) for pk in ids])
+
+
+def rebuild_index(using=connection, table='posts_post'):
+    """Перестраивает индекс целиком по таблице постов."""
+    if not fts_available(using):
+        return 0
+    with using.cursor() as cursor:
+        cursor.execute(FTS_CREATE)
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE}(rowid, text) '
+            f'SELECT id, text FROM {table}')
+        cursor.execute(f'SELECT count(*) FROM {FTS_TABLE}')
+        return cursor.fetchone()[0]
+
+
+def filter_posts(queryset, query):
+    """Оставляет в queryset посты, подходящие под запрос."""
+    expression = match_expression(query)
+    if not expression:
+        return queryset.none()
+    if not fts_available():
+        for term in TERM_RE.findall(query):
+            queryset = queryset.filter(text__icontains=term)
+        return queryset
+    table = queryset.model._meta.db_table
+    return queryset.extra(
+        where=[f'{table}.id IN (SELECT rowid FROM {FTS_TABLE} '
+               f'WHERE {FTS_TABLE} MATCH %s)'],
+        params=[expression],
+    )
+
+
+class SearchResults:
+    """Ранжированная выдача поиска для ``Paginator``.
+
+    Срез читает из индекса только id нужной страницы в порядке
+    релевантности (bm25), а посты подгружаются одним запросом по id.
+    """
+
+    def __init__(self, queryset, query):
+        self.queryset = queryset
+        self.expression = match_expression(query)
+        self.fallback = None
+        if not fts_available():
+            self.fallback = filter_posts(queryset, query)
+
+    def count(self):
+        if self.fallback is not None:
+            return self.fallback.count()
+        if not self.expression:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s', [self.expression])
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, page):
+        if self.fallback is not None:
+            return self.fallback[page]
+        if not self.expression or page.start >= page.stop:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                'ORDER BY rank LIMIT %s OFFSET %s',
+                [self.expression, page.stop - page.start, page.start])
+            ids = [row[0] for row in cursor.fetchall()]
+        posts = self.queryset.in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
@@ -0,0 +1,238 @@
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cards import invalidate_cards
+from .counters import (add_posts_to_counters, change_comments,
+                       change_counters, change_followers, touch_feeds,
+                       touch_site)
+from .front_page import (author_name, fill_front_page, rebuild_front_page,
+                         save_to_front_page)
+from .lookups import display_names, groups, users
+from .models import (AuthorStats, Comment, Follow, FrontPageEntry, Group,
+                     Post, posts_bulk_created)
+from .page_cache import (ALL_PAGES, INDEX_HEAD, INDEX_PAGES, group_scope,
+                         invalidate_pages, profile_scope)
+from .search import index_new_posts, unindex_posts
+from .tasks import fan_out_posts, index_posts, make_thumbnails
+from .timeline import backfill, fans_out, remove_author
+
+User = get_user_model()
+# Поля пользователя, которые видны в карточках постов.
+AUTHOR_FIELDS = {'username', 'first_name', 'last_name'}
+
+# Посты и пользователи, которые сейчас удаляются. Их комментарии
+# удаляются каскадом, и счётчики правятся один раз на пост, а не
+# отдельным набором запросов на каждый комментарий.
+_deleting = threading.local()
+
+
+def deleting(kind):
+    if not hasattr(_deleting, kind):
+        setattr(_deleting, kind, set())
+    return getattr(_deleting, kind)
+
+
+def invalidate_feed_pages(author_ids, group_ids, head_only=False):
+    """Сбрасывает страницы лент, в которых есть посты этих авторов
+    и групп. Для нового поста достаточно головы главной страницы.
+    """
+    scopes = [INDEX_HEAD] if head_only else [INDEX_HEAD, INDEX_PAGES]
+    scopes += [
+        profile_scope(username) for username in User.objects.filter(
+            pk__in=set(author_ids)).values_list('username', flat=True)
+    ]
+    group_ids = {pk for pk in group_ids if pk is not None}
+    if group_ids:
+        scopes += [
+            group_scope(slug) for slug in Group.objects.filter(
+                pk__in=group_ids).values_list('slug', flat=True)
+        ]
+    invalidate_pages(*scopes)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw, update_fields, **kwargs):
+    if raw:
+        return
+    if created:
+        AuthorStats.objects.get_or_create(author=instance)
+        users.invalidate(instance.username)
+    elif update_fields is None or AUTHOR_FIELDS & set(update_fields):
+        users.invalidate_object(instance.username, instance.pk)
+        display_names.invalidate(instance.pk)
+        # Логин входит в адрес профиля, а имя - в карточки постов.
+        FrontPageEntry.objects.filter(author=instance).update(
+            author_username=instance.username,
+            author_name=author_name(instance))
+        invalidate_cards(instance.posts.values_list('id', 'updated'))
+        invalidate_pages(ALL_PAGES)
+        # Карточки автора есть и в лентах групп, где он публиковался.
+        touch_feeds(author_ids=[instance.pk],
+                    group_ids=instance.posts.exclude(group=None).values_list(
+                        'group_id', flat=True).distinct())
+
+
+@receiver(pre_delete, sender=User)
+def user_deleting(sender, instance, **kwargs):
+    deleting('authors').add(instance.pk)
+    # Посты самого пользователя удаляются вместе с ним, счётчики
+    # правим только у чужих постов, которые он комментировал.
+    comments_changed({
+        post_id: -count for post_id, count in Comment.objects.filter(
+            author=instance).exclude(post__author=instance).values_list(
+            'post').annotate(count=Count('id')).order_by()
+    })
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    deleting('authors').discard(instance.pk)
+    touch_site()
+    users.invalidate_object(instance.username, instance.pk)
+    display_names.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    loaded = getattr(instance, '_loaded_values', {})
+    if created:
+        change_counters(instance.author_id, instance.group_id, 1)
+        fan_out_posts.delay(post_id=instance.pk)
+        invalidate_feed_pages(
+            [instance.author_id], [instance.group_id], head_only=True)
+    else:
+        for field in ('author_id', 'group_id'):
+            old, new = loaded.get(field), getattr(instance, field)
+            if field in loaded and old != new:
+                change_counters(**{field: old, 'delta': -1})
+                change_counters(**{field: new, 'delta': 1})
+        author_ids = [instance.author_id, loaded.get('author_id')]
+        group_ids = [instance.group_id, loaded.get('group_id')]
+        touch_feeds(author_ids, group_ids)
+        invalidate_feed_pages(author_ids, group_ids)
+    image = instance.image.name or ''
+    if loaded.get('image', '') != image:
+        # Старые миниатюры не подходят, новые готовит очередь.
+        if instance.thumbnails:
+            instance.thumbnails = ''
+            Post.objects.filter(pk=instance.pk).update(thumbnails='')
+        if image:
+            make_thumbnails.delay(post_id=instance.pk, image=image)
+    if loaded.get('updated') is not None:
+        invalidate_cards([(instance.pk, loaded['updated'])])
+    if created or loaded.get('text') != instance.text:
+        index_posts.delay(post_id=instance.pk)
+    save_to_front_page(instance)
+    instance._loaded_values = {
+        'author_id': instance.author_id,
+        'group_id': instance.group_id,
+        'updated': instance.updated,
+        'text': instance.text,
+        'image': image,
+    }
+
+
+@receiver(posts_bulk_created, sender=Post)
+def posts_bulk_saved(sender, posts, **kwargs):
+    add_posts_to_counters(posts)
+    for author_id in {post.author_id for post in posts}:
+        if fans_out(author_id):
+            backfill(author_id)
+    index_new_posts()
+    rebuild_front_page()
+    invalidate_feed_pages([post.author_id for post in posts],
+                          [post.group_id for post in posts],
+                          head_only=True)
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    deleting('posts').add(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    deleting('posts').discard(instance.pk)
+    change_counters(instance.author_id, instance.group_id, -1)
+    touch_site()
+    invalidate_cards([(instance.pk, instance.updated)])
+    unindex_posts([instance.pk])
+    fill_front_page()
+    invalidate_feed_pages([instance.author_id], [instance.group_id])
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, raw, **kwargs):
+    groups.invalidate_object(instance.slug, instance.pk)
+    # Название и адрес группы есть в карточках её постов на всех лентах.
+    if not created and not raw:
+        FrontPageEntry.objects.filter(group=instance).update(
+            group_slug=instance.slug, group_title=instance.title)
+        invalidate_cards(instance.posts.values_list('id', 'updated'))
+        invalidate_pages(ALL_PAGES)
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    groups.invalidate_object(instance.slug, instance.pk)
+    touch_site()
+    FrontPageEntry.objects.filter(group__isnull=True).exclude(
+        group_slug='').update(group_slug='', group_title='')
+    invalidate_pages(ALL_PAGES)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw, **kwargs):
+    if raw or not created:
+        return
+    change_followers(instance.author_id, 1)
+    if fans_out(instance.author_id):
+        backfill(instance.author_id, owner_id=instance.user_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    remove_author(instance.user_id, instance.author_id)
+    followers = change_followers(instance.author_id, -1)
+    if followers == settings.TIMELINE_FANOUT_LIMIT:
+        # Автор снова раскладывает посты при публикации: догружаем
+        # подписчикам то, что раньше читалось вместе с лентой.
+        backfill(instance.author_id)
+
+
+def comments_changed(deltas):
+    """Сдвигает счётчики комментариев постов: {id поста: на сколько}."""
+    if not deltas:
+        return
+    posts = list(Post.objects.filter(pk__in=deltas).values(
+        'id', 'author_id', 'group_id', 'updated'))
+    if not posts:
+        return
+    for post in posts:
+        change_comments(post['id'], deltas[post['id']])
+    invalidate_cards([(post['id'], post['updated']) for post in posts])
+    author_ids = [post['author_id'] for post in posts]
+    group_ids = [post['group_id'] for post in posts]
+    touch_feeds(author_ids, group_ids)
+    invalidate_feed_pages(author_ids, group_ids)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        comments_changed({instance.post_id: 1})
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    if (instance.post_id in deleting('posts')
+            or instance.author_id in deleting('authors')):
+        return
+    comments_changed({instance.post_id: -1})
@@ -0,0 +1,32 @@
+"""Побочные эффекты сохранения поста, которые выполняет очередь."""
+from jobs.queue import task
+
+from . import images, search, timeline
+from .models import Post
+
+
+def existing_posts(payloads, *fields):
+    # Пост могли удалить, пока задача ждала в очереди.
+    ids = {payload['post_id'] for payload in payloads}
+    return Post.objects.filter(pk__in=ids).only('id', *fields)
+
+
+@task(batch=100)
+def index_posts(payloads):
+    search.index_posts(existing_posts(payloads, 'text'))
+
+
+@task(batch=100)
+def fan_out_posts(payloads):
+    for post in existing_posts(payloads, 'author_id', 'pub_date'):
+        timeline.fan_out_post(post)
+
+
+@task()
+def make_thumbnails(post_id, image):
+    post = Post.objects.filter(pk=post_id, image=image).first()
+    if post is None:
+        # Пост удалили или картинку уже заменили.
+        return
+    post.thumbnails = images.make_thumbnails(post.image)
+    post.save(update_fields=['thumbnails', 'updated'])
@@ -0,0 +1,151 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.db import connection
+from django.db.models.sql.constants import GET_ITERATOR_CHUNK_SIZE
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.counters import recount_comments
+from posts.models import Comment, FrontPageEntry, Post
+
+User = get_user_model()
+
+
+class CommentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        cls.URL_POST = reverse('posts:post_detail',
+                               kwargs={'post_id': cls.post.id})
+        cls.URL_COMMENT = reverse('posts:add_comment',
+                                  kwargs={'post_id': cls.post.id})
+
+    def setUp(self):
+        cache.clear()
+        caches[settings.PAGE_CACHE_ALIAS].clear()
+        self.guest_client = Client()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def add_comments(self, post, count, author=None):
+        Comment.objects.bulk_create(
+            Comment(post=post, author=author or self.reader,
+                    text=f'Комментарий {i}')
+            for i in range(count))
+        recount_comments()
+
+    def count_queries(self, func):
+        with CaptureQueriesContext(connection) as context:
+            func()
+        return len(context.captured_queries)
+
+    def test_add_comment_updates_counters_and_feeds(self):
+        '''Комментарий виден на странице поста, а его счётчик -
+        в карточках лент, в том числе закэшированных.'''
+        index = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(index, 'Комментариев: <a')
+        response = self.client.post(self.URL_COMMENT, {'text': 'Отлично!'})
+        self.assertRedirects(response, self.URL_POST)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        self.assertEqual(
+            FrontPageEntry.objects.get(post=self.post).comments_count, 1)
+        response = self.client.get(self.URL_POST)
+        self.assertEqual([comment.text for comment in response.context[
+            'comments']], ['Отлично!'])
+        for url in (reverse('posts:index'),
+                    reverse('posts:profile', kwargs={'username': 'author'})):
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url),
+                                    '#comments">1</a>')
+        Comment.objects.get().delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+
+    def test_lagging_counter_does_not_break_delete(self):
+        '''Удаление комментария при отставшем счётчике не уводит его
+        в минус.'''
+        comment = Comment.objects.create(post=self.post, author=self.reader,
+                                         text='Комментарий')
+        Post.objects.update(comments_count=0)
+        FrontPageEntry.objects.update(comments_count=0)
+        comment.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+
+    def test_guest_cannot_comment(self):
+        '''Гостя отправляют войти, комментарий не создаётся.'''
+        response = self.guest_client.post(self.URL_COMMENT, {'text': 'Эй'})
+        self.assertRedirects(
+            response, reverse('users:login') + '?next=' + self.URL_COMMENT)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_comments_are_paginated_by_cursor(self):
+        '''Обсуждение листается по курсору без повторов и пропусков.'''
+        self.add_comments(self.post, settings.COMMENTS_IN_PAGE * 2 + 5)
+        ids = []
+        cursor = None
+        while True:
+            comments = self.guest_client.get(
+                self.URL_POST, {'cursor': cursor} if cursor else {}
+            ).context['comments']
+            self.assertLessEqual(len(comments), settings.COMMENTS_IN_PAGE)
+            ids += [comment.id for comment in comments]
+            if not comments.has_next():
+                break
+            cursor = comments.next_cursor
+        self.assertEqual(ids, list(Comment.objects.values_list(
+            'id', flat=True)))
+
+    def test_detail_query_count_does_not_grow(self):
+        '''Страница поста с тысячами комментариев стоит столько же
+        запросов, сколько с несколькими, и читает их по индексу.'''
+        other = Post.objects.create(author=self.author, text='Обсуждаемый')
+        self.add_comments(self.post, 3)
+        self.add_comments(other, 2000)
+        counts = []
+        for post in (self.post, other):
+            with CaptureQueriesContext(connection) as context:
+                response = self.guest_client.get(
+                    reverse('posts:post_detail', kwargs={'post_id': post.id}))
+            counts.append(len(context.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(len(response.context['comments']),
+                         settings.COMMENTS_IN_PAGE)
+        sql = next(query['sql'] for query in context.captured_queries
+                   if Comment._meta.db_table in query['sql'])
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('comment_post_created_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_cascade_delete_does_not_query_per_comment(self):
+        '''Удаление поста или пользователя с тысячей комментариев
+        стоит столько же запросов, сколько с одним, не считая пачек
+        DELETE, которыми Django удаляет сами комментарии.'''
+        batches = 1000 // GET_ITERATOR_CHUNK_SIZE - 1
+        small = Post.objects.create(author=self.author, text='Тихий')
+        self.add_comments(small, 1)
+        large = Post.objects.create(author=self.author, text='Шумный')
+        self.add_comments(large, 1000)
+        queries = self.count_queries(small.delete)
+        with self.assertNumQueries(queries + batches):
+            large.delete()
+        self.assertFalse(Comment.objects.filter(post=large).exists())
+
+        quiet = User.objects.create_user(username='quiet')
+        noisy = User.objects.create_user(username='noisy')
+        self.add_comments(self.post, 1, author=quiet)
+        self.add_comments(self.post, 1000, author=noisy)
+        queries = self.count_queries(quiet.delete)
+        with self.assertNumQueries(queries + batches):
+            noisy.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+        self.assertEqual(
+            FrontPageEntry.objects.get(post=self.post).comments_count, 0)
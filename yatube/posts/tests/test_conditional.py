@@ -0,0 +1,134 @@
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='тестовое описание группы'
+        )
+        cls.post = Post.objects.create(
+            text='тестовый текст',
+            author=cls.user,
+            group=cls.group,
+        )
+        cls.URLS = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': cls.user.username}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.id}),
+        )
+
+    def setUp(self):
+        caches[settings.PAGE_CACHE_ALIAS].clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def revalidate(self, client, url, response):
+        return client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_page_is_not_modified(self):
+        '''Совпавший ETag даёт 304 без отрисовки шаблона.'''
+        for client in (self.guest_client, self.authorized_client):
+            for url in self.URLS:
+                with self.subTest(url=url):
+                    caches[settings.PAGE_CACHE_ALIAS].clear()
+                    response = client.get(url)
+                    self.assertIn('ETag', response)
+                    self.assertIn('Last-Modified', response)
+                    again = self.revalidate(client, url, response)
+                    self.assertEqual(again.status_code,
+                                     HTTPStatus.NOT_MODIFIED)
+                    self.assertIsNone(again.context)
+
+    def test_deleted_author_changes_index(self):
+        '''Удаление автора меняет ETag главной, даже если его строка
+        статистики не была самой свежей.'''
+        gone = User.objects.create_user(username='gone')
+        Post.objects.create(author=gone, text='Пост удалённого')
+        Post.objects.create(author=self.user, text='Пост после него')
+        url = reverse('posts:index')
+        response = self.guest_client.get(url)
+        gone.delete()
+        caches[settings.PAGE_CACHE_ALIAS].clear()
+        again = self.revalidate(self.guest_client, url, response)
+        self.assertEqual(again.status_code, HTTPStatus.OK)
+        self.assertNotContains(again, 'Пост удалённого')
+
+    def test_renamed_author_changes_group_page(self):
+        '''Новое имя автора меняет ETag лент групп с его постами.'''
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        response = self.guest_client.get(url)
+        author = User.objects.get(pk=self.user.pk)
+        author.first_name = 'Лев'
+        author.save()
+        for client in (self.guest_client, Client()):
+            with self.subTest(client=client):
+                again = self.revalidate(client, url, response)
+                self.assertEqual(again.status_code, HTTPStatus.OK)
+                self.assertContains(again, 'Лев')
+
+    def test_new_csrf_token_changes_etag(self):
+        '''После смены CSRF-токена страница с формой отдаётся заново.'''
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        self.authorized_client.cookies[settings.CSRF_COOKIE_NAME] = 'a' * 64
+        response = self.authorized_client.get(url)
+        self.authorized_client.cookies[settings.CSRF_COOKIE_NAME] = 'b' * 64
+        again = self.revalidate(self.authorized_client, url, response)
+        self.assertEqual(again.status_code, HTTPStatus.OK)
+        self.assertNotEqual(again['ETag'], response['ETag'])
+
+    def test_cached_page_is_not_modified(self):
+        '''Страница из кэша тоже отвечает 304 по своему ETag.'''
+        url = self.URLS[0]
+        self.guest_client.get(url)
+        response = self.guest_client.get(url)
+        self.assertIsNone(response.context)
+        again = self.revalidate(self.guest_client, url, response)
+        self.assertEqual(again.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_validators_depend_on_user(self):
+        '''ETag анонима не подходит авторизованному пользователю.'''
+        url = self.URLS[0]
+        response = self.guest_client.get(url)
+        again = self.revalidate(self.authorized_client, url, response)
+        self.assertEqual(again.status_code, HTTPStatus.OK)
+
+    def test_edit_changes_validators(self):
+        '''После правки поста страницы отдаются заново.'''
+        responses = [self.authorized_client.get(url) for url in self.URLS]
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+            data={'text': 'новый текст', 'group': self.group.id})
+        for url, response in zip(self.URLS, responses):
+            with self.subTest(url=url):
+                again = self.revalidate(self.authorized_client, url, response)
+                self.assertEqual(again.status_code, HTTPStatus.OK)
+                self.assertContains(again, 'новый текст')
+
+    def test_new_post_changes_validators(self):
+        '''Новый пост меняет валидаторы лент своего автора и группы.'''
+        responses = [self.authorized_client.get(url) for url in self.URLS]
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'ещё пост', 'group': self.group.id})
+        for url, response in zip(self.URLS, responses):
+            with self.subTest(url=url):
+                again = self.revalidate(self.authorized_client, url, response)
+                self.assertEqual(again.status_code, HTTPStatus.OK)
@@ -0,0 +1,99 @@
+from xml.etree import ElementTree
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug',
+            description='Тестовое описание')
+        cls.group_post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Пост <в> группе')
+        cls.post = Post.objects.create(author=cls.user, text='Пост & текст')
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def get_feed(self, url, **headers):
+        response = self.guest_client.get(url, **headers)
+        self.assertTrue(response.streaming)
+        return response, ElementTree.fromstring(
+            b''.join(response.streaming_content))
+
+    def test_index_atom_feed(self):
+        '''Общая лента Atom отдаёт посты, новые первыми.'''
+        with CaptureQueriesContext(connection) as queries:
+            response, feed = self.get_feed(
+                reverse('posts:index_feed', kwargs={'fmt': 'atom'}))
+        self.assertEqual(response['Content-Type'],
+                         'application/atom+xml; charset=utf-8')
+        entries = feed.findall(f'{ATOM}entry')
+        self.assertEqual([entry.find(f'{ATOM}content').text
+                          for entry in entries],
+                         ['Пост & текст', 'Пост <в> группе'])
+        self.assertEqual(entries[0].find(f'{ATOM}author/{ATOM}name').text,
+                         'Лев Толстой')
+        self.assertEqual(entries[1].find(f'{ATOM}category').get('term'),
+                         'Тестовая группа')
+        feed_query = queries[-1]['sql']
+        self.assertIn('posts_post', feed_query)
+        self.assertNotIn('password', feed_query)
+
+    def test_group_and_profile_rss_feeds(self):
+        '''Ленты RSS группы и автора содержат только их посты.'''
+        _, feed = self.get_feed(reverse(
+            'posts:group_feed', kwargs={'slug': 'test-slug', 'fmt': 'rss'}))
+        self.assertEqual(feed.find('channel/title').text,
+                         'Yatube: Тестовая группа')
+        self.assertEqual([item.find('description').text
+                          for item in feed.findall('channel/item')],
+                         ['Пост <в> группе'])
+        _, feed = self.get_feed(reverse(
+            'posts:profile_feed', kwargs={'username': 'author',
+                                          'fmt': 'rss'}))
+        self.assertEqual(len(feed.findall('channel/item')), 2)
+        response = self.guest_client.get(reverse(
+            'posts:profile_feed', kwargs={'username': 'nobody',
+                                          'fmt': 'atom'}))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(FEED_SIZE=1)
+    def test_feed_size(self):
+        '''Лента ограничена FEED_SIZE последними постами.'''
+        _, feed = self.get_feed(
+            reverse('posts:index_feed', kwargs={'fmt': 'rss'}))
+        self.assertEqual(len(feed.findall('channel/item')), 1)
+
+    def test_conditional_get(self):
+        '''Неизменившаяся лента отвечает 304 без чтения постов.'''
+        url = reverse('posts:group_feed',
+                      kwargs={'slug': 'test-slug', 'fmt': 'atom'})
+        response, _ = self.get_feed(url)
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(author=self.user, group=self.group, text='Новый')
+        response = self.guest_client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_pages_link_their_feeds(self):
+        '''Страницы лент ссылаются на свои ленты для читалок.'''
+        response = self.guest_client.get(
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}))
+        self.assertContains(response, reverse(
+            'posts:group_feed', kwargs={'slug': 'test-slug', 'fmt': 'rss'}))
@@ -0,0 +1,135 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from jobs.queue import run_pending
+from posts.models import AuthorStats, Follow, Post, TimelineEntry
+from posts.tests.test_indexes import unindexed_plans
+
+User = get_user_model()
+
+
+class FollowTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.old_post = Post.objects.create(author=cls.author,
+                                           text='Старый пост')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def follow(self, author, client=None):
+        return (client or self.client).get(reverse(
+            'posts:profile_follow', kwargs={'username': author.username}))
+
+    def timeline_ids(self, client=None):
+        response = (client or self.client).get(reverse('posts:follow_index'))
+        return [post.id for post in response.context['page_obj']]
+
+    def followers(self, author):
+        return AuthorStats.objects.get(author=author).followers_count
+
+    def test_follow_and_unfollow(self):
+        '''Подписка и отписка меняют ленту и счётчик подписчиков.'''
+        response = self.follow(self.author)
+        self.assertRedirects(response, reverse(
+            'posts:profile', kwargs={'username': 'author'}))
+        self.assertTrue(Follow.objects.filter(
+            user=self.reader, author=self.author).exists())
+        self.assertEqual(self.followers(self.author), 1)
+        self.assertEqual(self.timeline_ids(), [self.old_post.id])
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'author'}))
+        self.assertTrue(response.context['following'])
+        self.client.get(reverse('posts:profile_unfollow',
+                                kwargs={'username': 'author'}))
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.followers(self.author), 0)
+        self.assertEqual(self.timeline_ids(), [])
+
+    def test_lagging_counter_does_not_break_unfollow(self):
+        '''Отписка при отставшем счётчике не уводит его в минус.'''
+        self.follow(self.author)
+        AuthorStats.objects.update(followers_count=0)
+        self.client.get(reverse('posts:profile_unfollow',
+                                kwargs={'username': 'author'}))
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(self.followers(self.author), 0)
+
+    def test_cannot_follow_self_or_anonymously(self):
+        '''На себя подписаться нельзя, гостя отправляют войти.'''
+        self.follow(self.reader)
+        self.assertFalse(Follow.objects.exists())
+        response = self.follow(self.author, Client())
+        self.assertRedirects(
+            response, reverse('users:login') + '?next=' + reverse(
+                'posts:profile_follow', kwargs={'username': 'author'}))
+        self.assertFalse(Follow.objects.exists())
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        '''Очередь кладёт новый пост в ленты подписчиков, и только их.'''
+        self.follow(self.author)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        run_pending()
+        self.assertTrue(TimelineEntry.objects.filter(
+            owner=self.reader, post=post).exists())
+        self.assertEqual(self.timeline_ids(), [post.id, self.old_post.id])
+        other_client = Client()
+        other_client.force_login(self.other)
+        self.assertEqual(self.timeline_ids(other_client), [])
+        post.delete()
+        self.assertEqual(self.timeline_ids(), [self.old_post.id])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1, POSTS_IN_PAGE=2)
+    def test_popular_authors_are_read_with_timeline(self):
+        '''Посты популярных авторов читаются при чтении и сливаются
+        с остальной лентой без повторов.'''
+        self.follow(self.author)
+        self.follow(self.other)
+        fan = Client()
+        fan.force_login(self.other)
+        self.follow(self.author, fan)
+        self.assertEqual(self.followers(self.author), 2)
+        posts = [self.old_post]
+        for i in range(4):
+            author = self.author if i % 2 else self.other
+            posts.append(Post.objects.create(author=author, text=f'Пост {i}'))
+        run_pending()
+        self.assertFalse(TimelineEntry.objects.filter(
+            owner=self.reader, post=posts[-1]).exists())
+        ids = []
+        url = reverse('posts:follow_index')
+        cursor = None
+        while True:
+            page_obj = self.client.get(
+                url, {'cursor': cursor} if cursor else {}
+            ).context['page_obj']
+            ids += [post.id for post in page_obj]
+            if not page_obj.has_next():
+                break
+            cursor = page_obj.next_cursor
+        self.assertEqual(ids, [post.id for post in reversed(posts)])
+        page_obj = self.client.get(url, {'cursor': cursor}).context[
+            'page_obj']
+        previous = self.client.get(
+            url, {'cursor': page_obj.previous_cursor}).context['page_obj']
+        self.assertEqual([post.id for post in previous], ids[2:4])
+
+    def test_timeline_uses_index(self):
+        '''Лента подписок читается по индексу без сортировки.'''
+        self.follow(self.author)
+        for i in range(5):
+            Post.objects.create(author=self.author, text=f'Пост {i}')
+        run_pending()
+        with CaptureQueriesContext(connection) as context:
+            ids = self.timeline_ids()
+        self.assertEqual(len(ids), 6)
+        self.assertEqual(unindexed_plans(context.captured_queries), [])
@@ -0,0 +1,109 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.front_page import rebuild_front_page
+from posts.models import FrontPageEntry, Group, Post
+
+User = get_user_model()
+FRONT_PAGE_SIZE: int = 15
+POSTS_COUNT: int = 35
+
+
+@override_settings(FRONT_PAGE_SIZE=FRONT_PAGE_SIZE,
+                   FRONT_PAGE_EXCERPT_LENGTH=50)
+class FrontPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='тестовое описание группы'
+        )
+        for i in range(POSTS_COUNT):
+            Post.objects.create(
+                author=cls.user,
+                text=f'тестовый текст {i}',
+                group=cls.group if i % 2 else None,
+            )
+
+    def setUp(self):
+        caches[settings.PAGE_CACHE_ALIAS].clear()
+        self.guest_client = Client()
+
+    def front_page_ids(self):
+        return list(FrontPageEntry.objects.values_list('post_id', flat=True))
+
+    def newest_ids(self):
+        return list(Post.objects.values_list(
+            'id', flat=True)[:FRONT_PAGE_SIZE])
+
+    def test_new_post_displaces_oldest(self):
+        '''Новый пост попадает на главную и вытесняет самый старый.'''
+        self.assertEqual(self.front_page_ids(), self.newest_ids())
+        post = Post.objects.create(author=self.user, text='Новый пост')
+        self.assertEqual(self.front_page_ids(), self.newest_ids())
+        self.assertEqual(self.front_page_ids()[0], post.id)
+
+    def test_changes_are_applied_incrementally(self):
+        '''Правка, удаление, переименование автора и группы
+        отражаются в готовых записях.'''
+        post = Post.objects.first()
+        post.text = 'Исправленный текст ' * 5
+        post.save()
+        entry = FrontPageEntry.objects.get(post=post)
+        self.assertTrue(entry.truncated)
+        self.assertLessEqual(len(entry.excerpt), 50)
+        post.delete()
+        self.assertEqual(self.front_page_ids(), self.newest_ids())
+        self.user.first_name = 'Фёдор'
+        self.user.save()
+        self.group.slug = 'new-slug'
+        self.group.save()
+        entry = FrontPageEntry.objects.filter(group=self.group).first()
+        self.assertEqual(entry.author_name, 'Фёдор Толстой')
+        self.assertEqual(entry.group_slug, 'new-slug')
+        self.group.delete()
+        self.assertFalse(
+            FrontPageEntry.objects.exclude(group_slug='').exists())
+
+    def test_first_page_is_read_without_joins(self):
+        '''Первая страница читается одним запросом без JOIN.'''
+        with CaptureQueriesContext(connection) as context:
+            response = self.guest_client.get(reverse('posts:index'))
+        queries = [query['sql'] for query in context.captured_queries]
+        self.assertFalse([sql for sql in queries if '"posts_post"' in sql])
+        entries = [sql for sql in queries if 'posts_frontpageentry' in sql]
+        self.assertEqual(len(entries), 1)
+        self.assertNotIn('JOIN', entries[0])
+        first = response.context['page_obj'][0]
+        self.assertEqual(first, Post.objects.first())
+        self.assertContains(response, 'Лев Толстой')
+
+    def test_cursor_walk_crosses_front_page_boundary(self):
+        '''Курсоры ведут через границу готовых записей без пропусков.'''
+        ids = []
+        url = reverse('posts:index')
+        page_obj = self.guest_client.get(url).context['page_obj']
+        while True:
+            ids += [post.id for post in page_obj]
+            if not page_obj.has_next():
+                break
+            page_obj = self.guest_client.get(
+                url, {'cursor': page_obj.next_cursor}).context['page_obj']
+        self.assertEqual(ids, list(Post.objects.values_list('id', flat=True)))
+
+    def test_rebuild_after_bulk_create(self):
+        '''Пакетная вставка и пересборка дают свежие записи.'''
+        Post.objects.bulk_create(
+            [Post(author=self.user, text=f'пакет {i}') for i in range(3)])
+        self.assertEqual(self.front_page_ids(), self.newest_ids())
+        FrontPageEntry.objects.all().delete()
+        self.assertEqual(rebuild_front_page(), FRONT_PAGE_SIZE)
+        self.assertEqual(self.front_page_ids(), self.newest_ids())
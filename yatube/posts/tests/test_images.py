@@ -0,0 +1,117 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from jobs.queue import run_pending
+from posts.models import FrontPageEntry, Group, Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostImageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Тестовая группа',
+                                         slug='test-slug')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        caches[settings.PAGE_CACHE_ALIAS].clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def create_post(self, name='small.gif'):
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Пост с картинкой',
+            'group': self.group.pk,
+            'image': SimpleUploadedFile(name, SMALL_GIF, 'image/gif'),
+        })
+        return Post.objects.get()
+
+    def test_image_is_stored_under_content_hash(self):
+        '''Картинка сохраняется под именем из хэша содержимого.'''
+        post = self.create_post('котик.GIF')
+        self.assertRegex(post.image.name, r'^posts/[0-9a-f]{32}\.gif$')
+        with post.image.open() as image:
+            self.assertEqual(image.read(), SMALL_GIF)
+
+    def test_thumbnails_are_made_by_queue(self):
+        '''Миниатюры всех размеров создаёт очередь, до этого карточка
+        показывает оригинал.'''
+        post = self.create_post()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, post.image.url)
+        run_pending()
+        post.refresh_from_db()
+        self.assertEqual(set(post.thumbnail_map),
+                         set(settings.POST_IMAGE_SIZES))
+        card = post.thumbnail_map['card']
+        self.assertEqual((card['width'], card['height']), (960, 339))
+        storage = FileSystemStorage()
+        for thumbnail in post.thumbnail_map.values():
+            self.assertTrue(storage.exists(
+                thumbnail['url'][len(settings.MEDIA_URL):]))
+        self.assertEqual(FrontPageEntry.objects.get(post=post).thumbnails,
+                         post.thumbnails)
+
+    def test_feeds_do_not_touch_files(self):
+        '''Ленты выводят миниатюры, не открывая и не проверяя файлы.'''
+        post = self.create_post()
+        run_pending()
+        post.refresh_from_db()
+        card = post.thumbnail_map['card']['url']
+        pages = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+        ]
+        with mock.patch.object(FileSystemStorage, 'exists',
+                               side_effect=AssertionError), \
+                mock.patch.object(FileSystemStorage, 'open',
+                                  side_effect=AssertionError), \
+                mock.patch('sorl.thumbnail.get_thumbnail',
+                           side_effect=AssertionError):
+            for url in pages:
+                with self.subTest(url=url):
+                    self.assertContains(self.client.get(url), card)
+
+    def test_new_image_replaces_thumbnails(self):
+        '''Новая картинка сбрасывает миниатюры старой.'''
+        post = self.create_post()
+        run_pending()
+        old = Post.objects.get().thumbnails
+        self.client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}), {
+                'text': 'Другая картинка',
+                'image': SimpleUploadedFile(
+                    'big.gif', SMALL_GIF + b'\x00', 'image/gif'),
+            })
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnails, '')
+        run_pending()
+        post.refresh_from_db()
+        self.assertNotIn(post.thumbnails, ('', old))
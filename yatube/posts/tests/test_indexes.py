@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+POSTS_TABLE = Post._meta.db_table
+
+
+def unindexed_plans(queries):
+    """Возвращает запросы к таблице постов, план которых не использует
+    индекс: полный проход таблицы или сортировка во временном B-дереве.
+    """
+    problems = []
+    with connection.cursor() as cursor:
+        for query in queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or POSTS_TABLE not in sql:
+                continue
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            details = [row[-1] for row in cursor.fetchall()]
+            for detail in details:
+                full_scan = (POSTS_TABLE in detail
+                             and detail.startswith('SCAN')
+                             and 'INDEX' not in detail)
+                if full_scan or 'TEMP B-TREE' in detail:
+                    problems.append((sql, detail))
+    return problems
+
+
+class FeedIndexTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='тестовое описание группы'
+        )
+        Post.objects.bulk_create(
+            [
+                Post(
+                    text='тестовый текст ' + str(i),
+                    author=cls.user if i % 2 else cls.other,
+                    group=cls.group if i % 3 else None,
+                )
+                for i in range(50)
+            ]
+        )
+        cls.post = Post.objects.filter(author=cls.user).first()
+        cls.guest_client = Client()
+
+    def setUp(self):
+        caches[settings.PAGE_CACHE_ALIAS].clear()
+
+    def test_feed_views_use_indexes(self):
+        '''Запросы каждой ленты обслуживаются индексом без сортировки.'''
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': self.user.username}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as context:
+                    response = self.guest_client.get(url)
+                    page_obj = response.context.get('page_obj')
+                    if page_obj is not None and page_obj.has_next():
+                        self.guest_client.get(
+                            url, {'cursor': page_obj.next_cursor})
+                    self.guest_client.get(url, {'page': 2})
+                problems = unindexed_plans(context.captured_queries)
+                self.assertEqual(problems, [])
@@ -0,0 +1,119 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from posts.lookups import (clear_lookups, group_by_slug, lookup_stats,
+                           user_by_username)
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class LookupCacheTests(TransactionTestCase):
+    # Внутри транзакции кэш не заполняется, поэтому тест работает
+    # без обёртки TestCase.
+
+    def setUp(self):
+        clear_lookups()
+        self.addCleanup(clear_lookups)
+        caches[settings.PAGE_CACHE_ALIAS].clear()
+        self.user = User.objects.create_user(username='author')
+        self.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug',
+            description='Тестовое описание')
+
+    def test_repeated_lookup_is_cached(self):
+        '''Повторный поиск группы и автора обходится без запросов.'''
+        self.assertEqual(group_by_slug('test-slug'), self.group)
+        self.assertEqual(user_by_username('author'), self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(group_by_slug('test-slug'), self.group)
+            self.assertEqual(user_by_username('author'), self.user)
+        stats = lookup_stats()
+        self.assertEqual(stats['group'], {'size': 1, 'hits': 1, 'misses': 1})
+        self.assertEqual(stats['user'], {'size': 1, 'hits': 1, 'misses': 1})
+
+    def test_missing_object_is_not_cached(self):
+        '''«Не найдено» не кэшируется: новая группа видна сразу.'''
+        self.assertIsNone(group_by_slug('new-slug'))
+        with self.assertNumQueries(1):
+            self.assertIsNone(group_by_slug('new-slug'))
+        self.assertEqual(lookup_stats()['group']['size'], 0)
+        group = Group.objects.bulk_create([
+            Group(title='Новая группа', slug='new-slug')])[0]
+        self.assertEqual(group_by_slug('new-slug').title, group.title)
+
+    @override_settings(LOOKUP_CACHE_ALIAS='default')
+    def test_shared_cache_has_no_password(self):
+        '''В общий кэш пользователь попадает без хэша пароля.'''
+        caches['default'].clear()
+        self.addCleanup(caches['default'].clear)
+        self.user.first_name = 'Лев'
+        self.user.save()
+        user_by_username('author')
+        cached = caches['default'].get('lookup:user:author')
+        self.assertEqual(cached.get_full_name(), 'Лев')
+        self.assertNotIn('password', cached.__dict__)
+
+    @override_settings(LOOKUP_CACHE_TTL=0)
+    def test_expired_entry_is_reloaded(self):
+        '''Просроченная запись читается из базы заново.'''
+        group_by_slug('test-slug')
+        with self.assertNumQueries(1):
+            group_by_slug('test-slug')
+
+    def test_nothing_is_cached_inside_transaction(self):
+        '''Прочитанное в транзакции не попадает в кэш.'''
+        with transaction.atomic():
+            self.assertEqual(group_by_slug('test-slug'), self.group)
+        self.assertEqual(lookup_stats()['group']['size'], 0)
+
+    def test_signals_invalidate_entries(self):
+        '''Переименование, создание и удаление сбрасывают записи.'''
+        self.assertIsNone(user_by_username('newcomer'))
+        newcomer = User.objects.create_user(username='newcomer')
+        self.assertEqual(user_by_username('newcomer'), newcomer)
+        group_by_slug('test-slug')
+        self.group.slug = 'renamed'
+        self.group.save()
+        self.assertIsNone(group_by_slug('test-slug'))
+        self.assertEqual(group_by_slug('renamed'), self.group)
+        user_by_username('author')
+        self.user.delete()
+        self.assertIsNone(user_by_username('author'))
+
+    def test_pages_take_counts_from_page_state(self):
+        '''Число постов на страницах не отстаёт от кэшированных объектов.'''
+        client = Client()
+        client.get(reverse('posts:group_list', kwargs={'slug': 'test-slug'}))
+        client.get(reverse('posts:profile', kwargs={'username': 'author'}))
+        Post.objects.create(author=self.user, group=self.group, text='Пост')
+        response = client.get(
+            reverse('posts:profile', kwargs={'username': 'author'}))
+        self.assertEqual(response.context['posts_count'], 1)
+        response = client.get(
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}))
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
+        self.assertGreater(lookup_stats()['group']['hits'], 0)
+
+
+class LookupReportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user')
+        cls.admin = User.objects.create_user(username='admin', is_staff=True)
+
+    def test_report_is_for_staff_only(self):
+        '''Статистику кэша видит только персонал.'''
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(reverse('lookups'))
+        self.assertEqual(response.status_code, 302)
+        client.force_login(self.admin)
+        response = client.get(reverse('lookups'))
+        self.assertEqual(set(response.json()),
+                         {'group', 'user', 'display_name'})
@@ -1,8 +1,11 @@
+from io import StringIO
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
-from ..models import Group, Post
+from ..models import AuthorStats, Group, Post
 
 User = get_user_model()
 
@@ -44,3 +47,57 @@ class PostModelTest(TestCase):
                 self.assertEqual(
                     self.post._meta.get_field(field).verbose_name,
                     expected_value, error_name)
+
+
+class PostCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(title='Первая группа',
+                                         slug='first')
+        cls.other_group = Group.objects.create(title='Вторая группа',
+                                               slug='second')
+
+    def assertCounters(self, author_count, group_count, other_count):
+        self.user.stats.refresh_from_db()
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.user.stats.posts_count, author_count)
+        self.assertEqual(self.group.posts_count, group_count)
+        self.assertEqual(self.other_group.posts_count, other_count)
+
+    def test_counters_follow_post_changes(self):
+        '''Счётчики меняются при создании, переносе и удалении поста'''
+        post = Post.objects.create(author=self.user, text='Текст',
+                                   group=self.group)
+        Post.objects.create(author=self.user, text='Текст')
+        self.assertCounters(2, 1, 0)
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.other_group
+        post.save()
+        post.save()
+        self.assertCounters(2, 0, 1)
+        post.delete()
+        self.assertCounters(1, 0, 0)
+
+    def test_lagging_counter_does_not_break_delete(self):
+        '''Удаление поста при отставшем счётчике не уводит его в минус'''
+        post = Post.objects.create(author=self.user, text='Текст',
+                                   group=self.group)
+        AuthorStats.objects.update(posts_count=0)
+        Group.objects.update(posts_count=0)
+        post.delete()
+        self.assertCounters(0, 0, 0)
+
+    def test_recount_command_fixes_drift(self):
+        '''Команда recount_posts восстанавливает счётчики'''
+        Post.objects.bulk_create([
+            Post(author=self.user, text='Текст', group=self.group)
+            for _ in range(3)
+        ])
+        self.assertCounters(3, 3, 0)
+        Post.objects.update(group=self.other_group)
+        self.assertCounters(3, 3, 0)
+        call_command('recount_posts', stdout=StringIO())
+        self.assertCounters(3, 0, 3)
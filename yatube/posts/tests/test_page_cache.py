@@ -0,0 +1,131 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+TEMP_CACHE_DIR = tempfile.mkdtemp()
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='тестовое описание группы'
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+        )
+        Post.objects.bulk_create(
+            [
+                Post(text='тестовый текст ' + str(i),
+                     author=cls.other,
+                     group=cls.other_group)
+                for i in range(settings.POSTS_IN_PAGE + 1)
+            ]
+        )
+        cls.URL_INDEX = reverse('posts:index')
+        cls.URL_USER = reverse(
+            'posts:profile', kwargs={'username': cls.user.username})
+        cls.URL_OTHER = reverse(
+            'posts:profile', kwargs={'username': cls.other.username})
+        cls.URL_GROUP = reverse(
+            'posts:group_list', kwargs={'slug': cls.group.slug})
+        cls.URL_OTHER_GROUP = reverse(
+            'posts:group_list', kwargs={'slug': cls.other_group.slug})
+
+    def setUp(self):
+        caches[settings.PAGE_CACHE_ALIAS].clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def assertCached(self, url, data=None):
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url, data or {})
+        self.assertIsNone(response.context)
+
+    def assertNotCached(self, url, data=None):
+        response = self.guest_client.get(url, data or {})
+        self.assertIsNotNone(response.context)
+
+    def test_anonymous_page_is_cached(self):
+        '''Повторный анонимный запрос отдаётся из кэша без SQL.'''
+        for url in (self.URL_INDEX, self.URL_USER, self.URL_GROUP):
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                self.assertCached(url)
+                self.assertEqual(
+                    self.guest_client.get(url).content, first.content)
+
+    def test_authorized_page_is_not_cached(self):
+        '''Страницы авторизованного пользователя не кэшируются.'''
+        self.authorized_client.get(self.URL_INDEX)
+        response = self.authorized_client.get(self.URL_INDEX)
+        self.assertIsNotNone(response.context)
+
+    def test_new_post_drops_only_affected_pages(self):
+        '''Новый пост сбрасывает голову главной, профиль и группу автора.'''
+        cursor = self.guest_client.get(
+            self.URL_INDEX).context['page_obj'].next_cursor
+        urls = [
+            (self.URL_INDEX, None),
+            (self.URL_INDEX, {'cursor': cursor}),
+            (self.URL_USER, None),
+            (self.URL_GROUP, None),
+            (self.URL_OTHER, None),
+            (self.URL_OTHER_GROUP, None),
+        ]
+        for url, data in urls:
+            self.guest_client.get(url, data or {})
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Новый пост', 'group': self.group.id})
+        self.assertNotCached(self.URL_INDEX)
+        self.assertNotCached(self.URL_USER)
+        self.assertNotCached(self.URL_GROUP)
+        self.assertCached(self.URL_INDEX, {'cursor': cursor})
+        self.assertCached(self.URL_OTHER)
+        self.assertCached(self.URL_OTHER_GROUP)
+
+    def test_group_change_drops_all_pages(self):
+        '''Изменение группы сбрасывает все страницы лент.'''
+        self.guest_client.get(self.URL_OTHER)
+        self.other_group.title = 'Новое название'
+        self.other_group.save()
+        response = self.guest_client.get(self.URL_OTHER)
+        self.assertIsNotNone(response.context)
+
+    @override_settings(CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        settings.PAGE_CACHE_ALIAS: {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': TEMP_CACHE_DIR,
+        },
+    })
+    def test_file_based_backend(self):
+        '''Кэш страниц работает с файловым бэкендом.'''
+        self.guest_client.get(self.URL_USER)
+        self.assertCached(self.URL_USER)
+        self.authorized_client.post(
+            reverse('posts:post_create'), data={'text': 'Новый пост'})
+        self.assertNotCached(self.URL_USER)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_CACHE_DIR, ignore_errors=True)
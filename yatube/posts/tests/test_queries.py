@@ -0,0 +1,93 @@
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.counters import recount_posts
+from posts.models import Group, Post
+
+User = get_user_model()
+AUTHORS_COUNT: int = 50
+GROUPS_COUNT: int = 20
+POSTS_COUNT: int = 3000
+
+
+class QueryBudgetTests(TestCase):
+    """Число запросов на страницу не зависит от объёма данных."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create(
+            [
+                User(username=f'author{i}',
+                     first_name=f'Имя{i}',
+                     last_name=f'Фамилия{i}')
+                for i in range(AUTHORS_COUNT)
+            ]
+        )
+        Group.objects.bulk_create(
+            [
+                Group(title=f'Группа {i}', slug=f'group-{i}')
+                for i in range(GROUPS_COUNT)
+            ]
+        )
+        authors = list(User.objects.order_by('id'))
+        groups = list(Group.objects.order_by('id'))
+        Post.objects.bulk_create(
+            [
+                Post(
+                    text='тестовый текст ' + str(i),
+                    author=authors[i % AUTHORS_COUNT],
+                    group=groups[i % GROUPS_COUNT] if i % 4 else None,
+                )
+                for i in range(POSTS_COUNT)
+            ]
+        )
+        recount_posts()
+        cls.author = authors[1]
+        cls.group = groups[1]
+        cls.post = Post.objects.filter(author=cls.author).first()
+
+    def setUp(self):
+        caches[settings.PAGE_CACHE_ALIAS].clear()
+        self.guest_client = Client()
+
+    def assertMaxQueries(self, budget, url, data=None):
+        with CaptureQueriesContext(connection) as context:
+            response = self.guest_client.get(url, data or {})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        executed = len(context.captured_queries)
+        self.assertLessEqual(
+            executed, budget,
+            f'{url}: {executed} запросов при бюджете {budget}:\n'
+            + '\n'.join(query['sql'] for query in context.captured_queries)
+        )
+        return response
+
+    def test_views_stay_within_query_budget(self):
+        '''Каждая страница укладывается в свой бюджет запросов.'''
+        # Бюджет первой страницы и бюджет старой ссылки с ?page=:
+        # у главной нет счётчика, и паджинатор добавляет COUNT(*).
+        # Валидаторы условного GET стоят ещё запрос (у главной - два).
+        budgets = [
+            (3, 4, reverse('posts:index')),
+            (3, 3, reverse('posts:group_list',
+                           kwargs={'slug': self.group.slug})),
+            (3, 3, reverse('posts:profile',
+                           kwargs={'username': self.author.username})),
+            (2, None, reverse('posts:post_detail',
+                              kwargs={'post_id': self.post.id})),
+        ]
+        for budget, page_budget, url in budgets:
+            with self.subTest(url=url):
+                response = self.assertMaxQueries(budget, url)
+                page_obj = response.context.get('page_obj')
+                if page_obj is not None:
+                    self.assertMaxQueries(
+                        budget, url, {'cursor': page_obj.next_cursor})
+                    self.assertMaxQueries(page_budget, url, {'page': 5})
@@ -0,0 +1,85 @@
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from jobs.queue import run_pending
+from posts.admin import PostAdmin
+from posts.models import Post
+from posts.search import filter_posts
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(
+            text='Рецепт борща со сметаной',
+            author=cls.user,
+        )
+        cls.other = Post.objects.create(
+            text='Борщ, борщ и ещё раз борщ',
+            author=cls.user,
+        )
+        Post.objects.bulk_create(
+            [
+                Post(text=f'Пельмени номер {i}', author=cls.user)
+                for i in range(settings.POSTS_IN_PAGE + 2)
+            ]
+        )
+        cls.URL_SEARCH = reverse('posts:search')
+        cls.guest_client = Client()
+
+    def search(self, query, **params):
+        response = self.guest_client.get(
+            self.URL_SEARCH, {'q': query, **params})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return response.context['page_obj']
+
+    def test_search_is_ranked(self):
+        '''Выдача отсортирована по релевантности.'''
+        page_obj = self.search('борщ')
+        self.assertEqual(list(page_obj), [self.other, self.post])
+
+    def test_search_uses_all_terms(self):
+        '''Пост находится только по всем словам запроса.'''
+        self.assertEqual(list(self.search('борщ сметана')), [])
+        self.assertEqual(list(self.search('БОРЩА сметаной')), [self.post])
+
+    def test_search_is_paginated(self):
+        '''Поиск, в том числе по постам из bulk_create, разбит на страницы.'''
+        self.assertEqual(self.search('пельмени').paginator.count,
+                         settings.POSTS_IN_PAGE + 2)
+        self.assertEqual(len(self.search('пельмени', page=2)), 2)
+
+    def test_index_follows_edit_and_delete(self):
+        '''Индекс обновляется при правке и удалении поста.'''
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Окрошка на квасе'
+        post.save()
+        run_pending()
+        self.assertEqual(list(self.search('сметаной')), [])
+        self.assertEqual(list(self.search('окрошка')), [post])
+        post.delete()
+        self.assertEqual(list(self.search('окрошка')), [])
+
+    def test_query_syntax_is_escaped(self):
+        '''Служебные символы FTS в запросе не ломают поиск.'''
+        for query in ('"', 'борщ OR', 'NEAR(', '*', ''):
+            with self.subTest(query=query):
+                self.search(query)
+
+    def test_admin_search_uses_index(self):
+        '''Поиск в админке идёт через индекс.'''
+        model_admin = PostAdmin(Post, admin.site)
+        queryset, _ = model_admin.get_search_results(
+            None, Post.objects.all(), 'борщ')
+        self.assertIn('posts_post_fts', str(queryset.query))
+        self.assertCountEqual(queryset, [self.post, self.other])
+        self.assertEqual(list(filter_posts(Post.objects.all(), '')), [])
@@ -1,9 +1,13 @@
+from unittest import mock
+
 from django.conf import settings
 from django import forms
 from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
 from django.test import Client, TestCase
 from django.urls import reverse
 
+from posts.cards import card_key
 from posts.models import Group, Post
 
 User = get_user_model()
@@ -142,3 +146,131 @@ class PaginatorTests(TestCase):
                            f'должно {pages_rest}')
             self.assertEqual(count_posts1, settings.POSTS_IN_PAGE, error_name1)
             self.assertEqual(count_posts2, pages_rest, error_name2)
+
+
+class KeysetPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='тестовое описание группы'
+        )
+        cls.guest_client = Client()
+        Post.objects.bulk_create(
+            [
+                Post(
+                    text='тестовый текст ' + str(i),
+                    author=cls.user,
+                    group=cls.group,
+                )
+                for i in range(POST_COUTN_FOR_TEST)
+            ]
+        )
+        cls.URL_INDEX = reverse('posts:index')
+        cls.URL_USER = reverse(
+            'posts:profile', kwargs={'username': cls.user.username})
+        cls.URL_GROUP = reverse(
+            'posts:group_list', kwargs={'slug': cls.group.slug})
+
+    def setUp(self):
+        caches[settings.PAGE_CACHE_ALIAS].clear()
+
+    def test_cursor_walks_all_posts(self):
+        '''Курсоры вперёд и назад обходят ленту без пропусков и повторов.'''
+        expected = list(
+            Post.objects.order_by('-pub_date', '-id')
+            .values_list('id', flat=True))
+        for url in (self.URL_INDEX, self.URL_USER, self.URL_GROUP):
+            with self.subTest(url=url):
+                seen = []
+                pages = []
+                page_obj = self.guest_client.get(url).context['page_obj']
+                self.assertFalse(page_obj.has_previous())
+                while True:
+                    pages.append([post.id for post in page_obj])
+                    seen.extend(pages[-1])
+                    if not page_obj.has_next():
+                        break
+                    page_obj = self.guest_client.get(
+                        url, {'cursor': page_obj.next_cursor}
+                    ).context['page_obj']
+                self.assertEqual(seen, expected)
+                page_obj = self.guest_client.get(
+                    url, {'cursor': page_obj.previous_cursor}
+                ).context['page_obj']
+                self.assertEqual([post.id for post in page_obj], pages[-2])
+
+    def test_page_does_not_count_rows(self):
+        '''Страница по курсору выбирается одним запросом без COUNT.'''
+        first = self.guest_client.get(self.URL_INDEX).context['page_obj']
+        with self.assertNumQueries(1):
+            page_obj = first.paginator.get_page(first.next_cursor)
+            self.assertEqual(len(page_obj), settings.POSTS_IN_PAGE)
+
+    def test_broken_cursor_shows_first_page(self):
+        '''Битый курсор отдаёт первую страницу.'''
+        for cursor in ('not-a-cursor', 'WyJuIiwgWyJ4IiwgInkiXV0'):
+            with self.subTest(cursor=cursor):
+                response = self.guest_client.get(
+                    self.URL_INDEX, {'cursor': cursor})
+                page_obj = response.context['page_obj']
+                self.assertFalse(page_obj.has_previous())
+                self.assertEqual(len(page_obj), settings.POSTS_IN_PAGE)
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='тестовое описание группы'
+        )
+        cls.post = Post.objects.create(
+            text='тестовый текст',
+            author=cls.user,
+            group=cls.group,
+        )
+        cls.URL_INDEX = reverse('posts:index')
+        cls.URL_POST_EDIT = reverse(
+            'posts:post_edit', kwargs={'post_id': cls.post.id})
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_cards_are_read_from_cache(self):
+        '''Карточки страницы берутся из кэша одним get_many.'''
+        self.authorized_client.get(self.URL_INDEX)
+        key = card_key(self.post.id, self.post.updated, 'index')
+        cache.set(key, 'карточка из кэша')
+        with mock.patch('posts.cards.render_to_string') as render:
+            response = self.authorized_client.get(self.URL_INDEX)
+        render.assert_not_called()
+        self.assertContains(response, 'карточка из кэша')
+
+    def test_edit_invalidates_card(self):
+        '''Редактирование поста сбрасывает его карточку.'''
+        self.authorized_client.get(self.URL_INDEX)
+        old_key = card_key(self.post.id, self.post.updated, 'index')
+        self.assertIsNotNone(cache.get(old_key))
+        self.authorized_client.post(
+            self.URL_POST_EDIT,
+            data={'text': 'новый текст', 'group': self.group.id})
+        self.assertIsNone(cache.get(old_key))
+        response = self.authorized_client.get(self.URL_INDEX)
+        self.assertContains(response, 'новый текст')
+
+    def test_group_rename_invalidates_cards(self):
+        '''Переименование группы сбрасывает карточки её постов.'''
+        self.authorized_client.get(self.URL_INDEX)
+        self.group.title = 'Новое название'
+        self.group.save()
+        response = self.authorized_client.get(self.URL_INDEX)
+        self.assertContains(response, 'Новое название')
@@ -0,0 +1,104 @@
+"""Лента подписок: fan-out on write с чтением популярных авторов.
+
+Новый пост одним ``INSERT ... SELECT`` раскладывается в строки
+``TimelineEntry`` всех подписчиков автора, и лента читателя - проход
+по его индексу. У автора больше ``TIMELINE_FANOUT_LIMIT`` подписчиков
+раскладка стоила бы слишком дорого: его посты читаются вместе с лентой
+отдельной выборкой (fan-out on read) и сливаются с ней по ключу.
+
+При подписке в ленту копируются ``TIMELINE_BACKFILL`` последних постов
+автора, при отписке его строки удаляются.
+"""
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+
+from .models import AuthorStats, Follow, Post, TimelineEntry
+from .paginators import MergedKeysetPaginator
+
+TIMELINE_KEYS = ('feed_date', 'feed_id')
+
+
+def fans_out(author_id):
+    """Раскладываются ли посты автора по лентам при публикации."""
+    followers = AuthorStats.objects.filter(author_id=author_id).values_list(
+        'followers_count', flat=True).first()
+    return (followers or 0) <= settings.TIMELINE_FANOUT_LIMIT
+
+
+def _tables():
+    quote = connection.ops.quote_name
+    return (quote(TimelineEntry._meta.db_table),
+            quote(Follow._meta.db_table), quote(Post._meta.db_table))
+
+
+def fan_out_post(post):
+    """Кладёт новый пост в ленты подписчиков автора.
+
+    Подписавшийся после публикации мог уже получить пост при
+    подгрузке ленты - такие строки пропускаются.
+    """
+    if not fans_out(post.author_id):
+        return
+    timeline, follow, _ = _tables()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {timeline} (owner_id, post_id, author_id, pub_date) '
+            f'SELECT f.user_id, %s, f.author_id, %s FROM {follow} f '
+            f'WHERE f.author_id = %s AND NOT EXISTS ('
+            f'  SELECT 1 FROM {timeline} t '
+            f'  WHERE t.owner_id = f.user_id AND t.post_id = %s)',
+            [post.pk, connection.ops.adapt_datetimefield_value(post.pub_date),
+             post.author_id, post.pk])
+
+
+def backfill(author_id, owner_id=None):
+    """Копирует последние посты автора в ленты его подписчиков
+    (или одного ``owner_id``), пропуская уже лежащие там.
+    """
+    timeline, follow, posts = _tables()
+    owner_filter = 'AND f.user_id = %s' if owner_id is not None else ''
+    params = [author_id, settings.TIMELINE_BACKFILL, author_id]
+    if owner_id is not None:
+        params.append(owner_id)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {timeline} (owner_id, post_id, author_id, pub_date) '
+            f'SELECT f.user_id, p.id, p.author_id, p.pub_date '
+            f'FROM {follow} f JOIN ('
+            f'  SELECT id, author_id, pub_date FROM {posts} '
+            f'  WHERE author_id = %s ORDER BY pub_date DESC, id DESC '
+            f'  LIMIT %s) p ON p.author_id = f.author_id '
+            f'WHERE f.author_id = %s {owner_filter} AND NOT EXISTS ('
+            f'  SELECT 1 FROM {timeline} t '
+            f'  WHERE t.owner_id = f.user_id AND t.post_id = p.id)',
+            params)
+
+
+def remove_author(owner_id, author_id):
+    TimelineEntry.objects.filter(owner_id=owner_id,
+                                 author_id=author_id).delete()
+
+
+def timeline_sources(user):
+    """Выборки ленты: строки из ящика читателя и посты популярных
+    авторов, которые в ящик не раскладываются.
+    """
+    posts = Post.objects.select_related('author', 'group')
+    inbox = posts.filter(timeline_entries__owner=user).annotate(
+        feed_date=F('timeline_entries__pub_date'),
+        feed_id=F('timeline_entries__post_id'))
+    popular = list(Follow.objects.filter(
+        user=user,
+        author__stats__followers_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+    ).values_list('author_id', flat=True))
+    if not popular:
+        return [inbox]
+    return [inbox, posts.filter(author_id__in=popular).annotate(
+        feed_date=F('pub_date'), feed_id=F('id'))]
+
+
+def timeline_page(request, user):
+    paginator = MergedKeysetPaginator(
+        timeline_sources(user), settings.POSTS_IN_PAGE, TIMELINE_KEYS)
+    return paginator.get_page(request.GET.get('cursor'))
@@ -1,4 +1,4 @@
-from django.urls import path
+from django.urls import path, re_path
 
 from . import views
 
@@ -8,7 +8,21 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path('search/', views.search, name='search'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path('posts/<int:post_id>/comment/', views.add_comment,
+         name='add_comment'),
+    path('follow/', views.follow_index, name='follow_index'),
+    path('profile/<str:username>/follow/', views.profile_follow,
+         name='profile_follow'),
+    path('profile/<str:username>/unfollow/', views.profile_unfollow,
+         name='profile_unfollow'),
+    re_path(r'^feeds/(?P<fmt>atom|rss)/$', views.index_feed,
+            name='index_feed'),
+    re_path(r'^group/(?P<slug>[-a-zA-Z0-9_]+)/(?P<fmt>atom|rss)/$',
+            views.group_feed, name='group_feed'),
+    re_path(r'^profile/(?P<username>[^/]+)/(?P<fmt>atom|rss)/$',
+            views.profile_feed, name='profile_feed'),
 ]
@@ -1,66 +1,221 @@
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.utils.http import urlencode
 
-from .forms import PostForm
-from .models import Group, Post, User
+from core.routers import read_from_replicas
 
+from .cards import render_cards
+from .conditional import (conditional_page, group_state, index_state,
+                          page_state, post_state, profile_state)
+from .counters import author_posts_count
+from .feeds import feed_response
+from .forms import CommentForm, PostForm, PostImageForm
+from .front_page import front_page
+from .lookups import group_by_slug, user_by_username
+from .models import Follow, Post
+from .page_cache import (cache_anonymous_page, group_scope, index_scope,
+                         profile_scope)
+from .paginators import KeysetPage, KeysetPaginator
+from .search import SearchResults
+from .timeline import timeline_page
 
-def paginator_func(request, query):
-    paginator = Paginator(query, settings.POSTS_IN_PAGE)
+
+def paginator_func(request, query, count=None):
+    """Страница ленты: по курсору ``?cursor=``, а для старых ссылок
+    с ``?page=`` - обычная постраничная выдача с OFFSET.
+
+    Известное заранее ``count`` избавляет паджинатор от ``COUNT(*)``.
+    """
     page = request.GET.get('page')
-    return paginator.get_page(page)
+    if page is not None:
+        paginator = Paginator(query, settings.POSTS_IN_PAGE)
+        if count is not None:
+            paginator.count = count
+        return paginator.get_page(page)
+    paginator = KeysetPaginator(query, settings.POSTS_IN_PAGE)
+    return paginator.get_page(request.GET.get('cursor'))
+
 
+def posts_count(request, owner):
+    """Число постов группы или автора из состояния страницы.
 
+    Группа и автор берутся из кэша (см. ``lookups``), их собственные
+    счётчики могут отставать, поэтому свежее число - из ``page_state``.
+    """
+    state = page_state(request)
+    if state is not None and state[1] is not None:
+        return state[1]
+    return owner.posts.count()
+
+
+@read_from_replicas
+@cache_anonymous_page(index_scope)
+@conditional_page(index_state)
 def index(request):
-    post_list = Post.objects.all()
+    page_obj = front_page(request)
+    if page_obj is not None:
+        cards = render_cards(page_obj, 'front_page')
+    else:
+        post_list = Post.objects.select_related('author', 'group')
+        page_obj = paginator_func(request, post_list)
+        cards = render_cards(page_obj, 'index')
     context = {
-        'page_obj': paginator_func(request, post_list),
+        'page_obj': page_obj,
+        'cards': cards,
     }
     return render(request, 'posts/index.html', context)
 
 
+@read_from_replicas
+@cache_anonymous_page(lambda request, slug: group_scope(slug))
+@conditional_page(group_state)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
+    group = group_by_slug(slug)
+    if group is None:
+        raise Http404
     posts = group.posts.select_related('author')
+    page_obj = paginator_func(request, posts, posts_count(request, group))
     context = {
         'group': group,
         'posts': posts,
-        'page_obj': paginator_func(request, posts),
+        'page_obj': page_obj,
+        'cards': render_cards(page_obj, 'group_list'),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@read_from_replicas
+@cache_anonymous_page(lambda request, username: profile_scope(username))
+@conditional_page(profile_state)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.select_related('author')
+    author = user_by_username(username)
+    if author is None:
+        raise Http404
+    posts = author.posts.select_related('author', 'group')
+    count = posts_count(request, author)
+    page_obj = paginator_func(request, posts, count)
     context = {
-        'page_obj': paginator_func(request, posts),
+        'page_obj': page_obj,
+        'cards': render_cards(page_obj, 'profile'),
         'author': author,
         'posts': posts,
+        'posts_count': count,
+        'following': request.user.is_authenticated and (
+            Follow.objects.filter(user=request.user, author=author).exists()),
     }
     return render(request, 'posts/profile.html', context)
 
 
+def feed_updated(request):
+    state = page_state(request)
+    return state[0] if state is not None else None
+
+
+@read_from_replicas
+@conditional_page(lambda request, fmt: index_state(request))
+def index_feed(request, fmt):
+    return feed_response(
+        request, fmt, 'Yatube', 'Последние обновления на сайте',
+        reverse('posts:index'), Post.objects.all(), feed_updated(request))
+
+
+@read_from_replicas
+@conditional_page(lambda request, slug, fmt: group_state(request, slug))
+def group_feed(request, slug, fmt):
+    group = group_by_slug(slug)
+    if group is None:
+        raise Http404
+    return feed_response(
+        request, fmt, f'Yatube: {group.title}', group.description or '',
+        reverse('posts:group_list', kwargs={'slug': slug}),
+        Post.objects.filter(group_id=group.pk), feed_updated(request))
+
+
+@read_from_replicas
+@conditional_page(
+    lambda request, username, fmt: profile_state(request, username))
+def profile_feed(request, username, fmt):
+    author = user_by_username(username)
+    if author is None:
+        raise Http404
+    return feed_response(
+        request, fmt, f'Yatube: {author.get_full_name() or username}',
+        f'Посты пользователя {username}',
+        reverse('posts:profile', kwargs={'username': username}),
+        Post.objects.filter(author_id=author.pk), feed_updated(request))
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    results = SearchResults(
+        Post.objects.select_related('author', 'group'), query)
+    paginator = Paginator(results, settings.POSTS_IN_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'page_obj': page_obj,
+        'cards': render_cards(page_obj, 'index'),
+        'search_query': query,
+        'query': urlencode({'q': query}),
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@read_from_replicas
+@conditional_page(post_state)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), id=post_id)
+    # В память попадает одна страница обсуждения, а не всё оно,
+    # а по счётчику без комментариев их не приходится и искать.
+    paginator = KeysetPaginator(
+        post.comments.select_related('author').only(
+            'post', 'text', 'created', 'author__username'),
+        settings.COMMENTS_IN_PAGE, ('created', 'id'))
+    if post.comments_count:
+        comments = paginator.get_page(request.GET.get('cursor'))
+    else:
+        comments = KeysetPage([], paginator)
     context = {
         'post': post,
+        'posts_count': author_posts_count(post.author),
+        'comments': comments,
+        'form': CommentForm(),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
 @login_required
-def post_create(request):
-    form = PostForm(request.POST or None)
+def add_comment(request, post_id):
+    post = get_object_or_404(Post, id=post_id)
+    form = CommentForm(request.POST or None)
     if form.is_valid():
-        post = form.save(commit=False)
-        post.author = request.user
-        post.save()
+        comment = form.save(commit=False)
+        comment.author = request.user
+        comment.post = post
+        comment.save()
+    return redirect('posts:post_detail', post_id=post_id)
+
+
+@login_required
+def post_create(request):
+    post = Post(author=request.user)
+    # Обе формы заполняют один и тот же объект поста.
+    form = PostForm(request.POST or None, instance=post)
+    image_form = PostImageForm(request.POST or None, request.FILES or None,
+                               instance=post)
+    if form.is_valid() and image_form.is_valid():
+        form.save()
         return redirect('posts:profile', post.author)
-    return render(request, 'posts/create_post.html',
-                  {'form': form, 'is_edit': False, })
+    context = {
+        'form': form,
+        'image_form': image_form,
+        'is_edit': False,
+    }
+    return render(request, 'posts/create_post.html', context)
 
 
 @login_required
@@ -69,12 +224,44 @@ def post_edit(request, post_id):
     if post.author != request.user:
         return redirect('posts:post_detail', post_id=post.id)
     form = PostForm(request.POST or None, instance=post)
-    if form.is_valid():
+    image_form = PostImageForm(request.POST or None, request.FILES or None,
+                               instance=post)
+    if form.is_valid() and image_form.is_valid():
         form.save()
         return redirect('posts:post_detail', post_id=post.id)
     context = {
         'form': form,
+        'image_form': image_form,
         'is_edit': True,
         'post': post,
     }
     return render(request, 'posts/create_post.html', context)
+
+
+@login_required
+def follow_index(request):
+    page_obj = timeline_page(request, request.user)
+    context = {
+        'page_obj': page_obj,
+        'cards': render_cards(page_obj, 'index'),
+    }
+    return render(request, 'posts/follow.html', context)
+
+
+@login_required
+def profile_follow(request, username):
+    author = user_by_username(username)
+    if author is None:
+        raise Http404
+    if author != request.user:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return redirect('posts:profile', username=username)
+
+
+@login_required
+def profile_unfollow(request, username):
+    author = user_by_username(username)
+    if author is None:
+        raise Http404
+    Follow.objects.filter(user=request.user, author=author).delete()
+    return redirect('posts:profile', username=username)
@@ -0,0 +1,26 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named
+``application``. Run it with an ASGI server, for example::
+
+    uvicorn yatube.asgi:application
+"""
+
+import os
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+from core import template_cache
+from core.asgi import ASGIHandler
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+application = ASGIHandler(
+    get_wsgi_application(),
+    read_threads=settings.ASGI_READ_THREADS,
+    write_threads=settings.ASGI_WRITE_THREADS,
+    max_pending=settings.ASGI_MAX_PENDING,
+)
+template_cache.start()
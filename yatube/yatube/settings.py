@@ -52,12 +52,20 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'about.apps.AboutConfig',
     'core.apps.CoreConfig',
+    'api.apps.ApiConfig',
+    'jobs.apps.JobsConfig',
+    'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.ProfilingMiddleware',
+    'core.routers.ReplicaMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -66,12 +74,25 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+# С TEMPLATE_CACHE шаблоны разбираются один раз за жизнь процесса, а
+# воркер компилирует их все при старте (core.template_cache). Выкладка
+# просит работающие воркеры перекомпилировать шаблоны, меняя время
+# изменения TEMPLATE_RELOAD_FILE: manage.py compile_templates --touch.
+TEMPLATE_CACHE = not DEBUG or bool(os.environ.get('YATUBE_TEMPLATE_CACHE'))
+TEMPLATE_RELOAD_FILE = os.path.join(BASE_DIR, 'templates.reload')
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if TEMPLATE_CACHE:
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)]
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -89,13 +110,33 @@ STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# core.db.sqlite3 - обычный бэкенд SQLite, который включает WAL и
+# настраивает PRAGMA (см. core/db/sqlite3/base.py). Соединение живёт
+# между запросами воркера до CONN_MAX_AGE секунд.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.db.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 600,
     }
 }
 
+# Реплики только для чтения лент (core.routers): пути к файлам через
+# запятую в YATUBE_REPLICAS. Клиент, который что-то записал, ещё
+# REPLICA_PIN_SECONDS читает основную базу.
+DATABASE_REPLICAS = []
+for number, name in enumerate(
+        filter(None, os.environ.get('YATUBE_REPLICAS', '').split(',')), 1):
+    DATABASE_REPLICAS.append(f'replica{number}')
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'core.db.sqlite3',
+        'NAME': name,
+        'CONN_MAX_AGE': 600,
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -134,7 +175,121 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
+# collectstatic собирает сюда файлы с хэшем в имени и их сжатые копии
+# .gz и .br (core.storage), а core.middleware.StaticFilesMiddleware
+# отдаёт их с кэшированием на STATIC_MAX_AGE секунд.
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+STATIC_MAX_AGE = 60 * 60 * 24 * 365
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Миниатюры картинок постов: имя -> (геометрия, параметры) для
+# sorl-thumbnail. Их заранее создаёт очередь задач (posts.images), а
+# карточки берут small и card, страница поста - large.
+POST_IMAGE_SIZES = {
+    'small': ('480x170', {'crop': 'center'}),
+    'card': ('960x339', {'crop': 'center'}),
+    'large': ('1200', {}),
+}
+THUMBNAIL_QUALITY = 85
+
+# Ответы короче этого не сжимаются: выигрыш меньше накладных расходов.
+# Уровень brotli для ответов на лету - компромисс скорости и размера.
+COMPRESS_MIN_SIZE = 1024
+BROTLI_QUALITY = 5
 
 POSTS_IN_PAGE = 10
+COMMENTS_IN_PAGE = 20
 
 LEN_OF_POSTS = 15
+
+# Сколько новых постов главной хранится готовыми (posts.FrontPageEntry)
+# и сколько символов текста попадает в их карточки.
+FRONT_PAGE_SIZE = POSTS_IN_PAGE * 10
+FRONT_PAGE_EXCERPT_LENGTH = 1000
+
+# Посты автора с большим числом подписчиков не раскладываются по
+# лентам подписок, а читаются вместе с ними (posts.timeline). При
+# подписке в ленту копируются последние TIMELINE_BACKFILL постов автора.
+TIMELINE_FANOUT_LIMIT = 1000
+TIMELINE_BACKFILL = POSTS_IN_PAGE * 10
+
+# Очередь фоновых задач (jobs.queue), воркеры - manage.py run_jobs.
+# Упавшая задача повторяется через JOBS_RETRY_DELAY, 2 * JOBS_RETRY_DELAY,
+# ... секунд, не больше JOBS_MAX_ATTEMPTS раз. Задачи воркера, не
+# ответившего за JOBS_LOCK_TIMEOUT секунд, забирают другие. С
+# JOBS_RUN_INLINE задачи выполняются сразу, без очереди.
+JOBS_RUN_INLINE = False
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_DELAY = 10
+JOBS_LOCK_TIMEOUT = 60 * 5
+JOBS_POLL_INTERVAL = 1
+
+# Наибольший ?limit= страницы постов в API.
+API_MAX_LIMIT = 100
+
+# Сколько постов отдают ленты Atom и RSS и сколько слов текста
+# становится заголовком записи.
+FEED_SIZE = 20
+FEED_TITLE_WORDS = 8
+
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Кэш страниц лент для анонимных читателей. Для нескольких процессов
+# на одной машине подойдёт файловый бэкенд:
+# 'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+# 'LOCATION': os.path.join(BASE_DIR, 'cache'),
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'pages',
+    },
+}
+
+PAGE_CACHE_ALIAS = 'pages'
+PAGE_CACHE_TIMEOUT = 60 * 15
+REPLICA_PAGE_CACHE_TIMEOUT = REPLICA_PIN_SECONDS
+
+# Кэш групп и авторов по slug и имени (posts.lookups): сколько записей
+# держит каждый процесс и сколько секунд. Если указан алиас, промахи
+# сначала ищутся в этом общем кэше. Статистика - /admin/lookups/.
+LOOKUP_CACHE_SIZE = 1024
+LOOKUP_CACHE_TTL = 60
+LOOKUP_CACHE_ALIAS = None
+
+# Доля запросов, которые профилирует core.middleware.ProfilingMiddleware.
+# Отчёт - /admin/profiling/. Если задан файл, каждый замер пишется туда
+# строкой JSON с ротацией.
+PROFILING_SAMPLE_RATE = 0.01
+PROFILING_LOG_FILE = os.environ.get('YATUBE_PROFILING_LOG')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {},
+    'loggers': {},
+}
+if PROFILING_LOG_FILE:
+    LOGGING['handlers']['profiling'] = {
+        'class': 'logging.handlers.RotatingFileHandler',
+        'filename': PROFILING_LOG_FILE,
+        'maxBytes': 10 * 1024 * 1024,
+        'backupCount': 5,
+        'encoding': 'utf-8',
+    }
+    LOGGING['loggers']['core.profiling'] = {
+        'handlers': ['profiling'],
+        'level': 'INFO',
+        'propagate': False,
+    }
+
+# Пулы потоков ASGI-приложения (yatube.asgi): чтения идут параллельно,
+# записи в SQLite - по одной. Запросы сверх ASGI_MAX_PENDING получают 503.
+ASGI_READ_THREADS = 16
+ASGI_WRITE_THREADS = 1
+ASGI_MAX_PENDING = 1000
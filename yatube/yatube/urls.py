@@ -1,10 +1,21 @@
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from core.views import lookup_report, profiling_report
+
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
+    path('admin/profiling/', profiling_report, name='profiling'),
+    path('admin/lookups/', lookup_report, name='lookups'),
     path('admin/', admin.site.urls),
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
+    path('api/v1/', include('api.urls', namespace='api')),
 ]
+
+if settings.DEBUG:
+    urlpatterns += static(settings.MEDIA_URL,
+                          document_root=settings.MEDIA_ROOT)